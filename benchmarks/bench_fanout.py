@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+基准测试：/run 并发吞吐（热点捕获后三分支扇出）
+
+用带固定延迟的模拟服务（CLIENT_MODE=sim）替换外部集成，在进程内通过 ASGI 调用 /run，
+统计不同并发下的 runs/sec。
+
+--mode async     分支节点走原生异步客户端，等待期间不占线程（当前实现）
+--mode blocking  模拟服务在事件循环默认线程池中阻塞等待（SIM_BLOCKING_IO），
+                 复现改造前同步节点由 LangGraph 丢进线程池执行的方式
+
+用法：
+    python benchmarks/bench_fanout.py --mode async
+    python benchmarks/bench_fanout.py --mode blocking --concurrency 1,16,128
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+os.environ.setdefault("COZE_WORKSPACE_PATH", str(ROOT_DIR))
+os.environ.setdefault("COZE_PROJECT_ENV", "PROD")  # 关闭节点文件日志，避免磁盘 IO 干扰
+os.environ.setdefault("COZE_WORKLOAD_IDENTITY_API_KEY", "bench")
+os.environ.setdefault("COZE_INTEGRATION_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("COZE_INTEGRATION_MODEL_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("NODE_CACHE_BACKEND", "none")  # 关闭节点结果缓存，每次运行都走完整链路
+
+# 模拟的外部调用耗时（秒）
+SEARCH_LATENCY = 0.05
+LLM_LATENCY = 0.2
+TTS_LATENCY = 0.1
+VIDEO_LATENCY = 0.3
+
+
+def install_fake_clients(mode: str) -> None:
+    """把进程级客户端提供者切换为带固定延迟的模拟服务"""
+    from utils.clients import ClientProvider, LatencyModel, Simulator, set_client_provider
+
+    simulator = Simulator(blocking_io=mode == "blocking")
+    simulator.latency.update(
+        search=LatencyModel("fixed", [SEARCH_LATENCY]),
+        llm_first_token=LatencyModel("fixed", [LLM_LATENCY]),
+        llm_chunk=LatencyModel("fixed", [0]),
+        tts=LatencyModel("fixed", [TTS_LATENCY]),
+        video=LatencyModel("fixed", [VIDEO_LATENCY]),
+    )
+    set_client_provider(ClientProvider("sim", simulator))
+
+
+async def run_level(client, concurrency: int, total: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with sem:
+            t0 = time.perf_counter()
+            resp = await client.post("/run", json={"domain": f"科技{i % 4}"})
+            latencies.append(time.perf_counter() - t0)
+            if resp.status_code != 200 or "final_result" not in resp.json():
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "runs": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "runs_per_sec": round(total / elapsed, 2),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 1),
+    }
+
+
+async def main_async(args) -> list:
+    import httpx
+    install_fake_clients(args.mode)
+    import main
+
+    results = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for c in args.concurrency:
+            total = max(c * args.rounds, args.min_runs)
+            result = await run_level(client, c, total)
+            result["mode"] = args.mode
+            results.append(result)
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark /run fan-out throughput")
+    parser.add_argument("--mode", choices=["async", "blocking"], default="async")
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 16, 128])
+    parser.add_argument("--rounds", type=int, default=2, help="每个并发档位的运行轮数（总运行数 = 并发 * 轮数）")
+    parser.add_argument("--min-runs", type=int, default=8)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main_async(parse_args()))
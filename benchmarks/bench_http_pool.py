@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+微基准：集成服务客户端的连接复用
+
+本地 uvicorn 作为集成服务的替身（真实 TCP 连接），按节点的用法每次调用新建 SDK 客户端对象：
+
+video_poll   AsyncVideoGenerationClient.aget_task（原生异步，httpx）
+search       PooledSearchClient.search（同步，requests，在线程池中并发）
+
+每个场景分别在 per_call（HTTP_POOL_ENABLED=false，每次调用新建连接，改造前的做法）
+与 pooled（共享连接池）两种模式下运行，统计吞吐、延迟分位数与服务端看到的 TCP 连接数。
+替身服务为明文 HTTP，真实集成服务走 TLS 时每次新建连接还要多一次握手，节省会更明显。
+
+用法：
+    python benchmarks/bench_http_pool.py
+    python benchmarks/bench_http_pool.py --requests 2000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import ServerThread, setup_env, summarize_ms
+
+setup_env()
+
+from coze_coding_dev_sdk.core.config import Config
+from fastapi import FastAPI, Request
+
+import utils.clients.base as clients_base
+import utils.clients.http_pool as http_pool
+from utils.clients import AsyncVideoGenerationClient, get_http_pool
+from utils.clients.search import PooledSearchClient
+
+logging.getLogger("cozeloop").setLevel(logging.ERROR)  # @observe 在未配置 workspace 时每次调用都会告警
+
+
+def create_stand_in(connections: Set[Tuple[str, int]], delay: float) -> FastAPI:
+    """视频任务查询与搜索接口的替身，按客户端地址记录 TCP 连接"""
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def record_connection(request: Request, call_next):
+        connections.add(tuple(request.scope["client"]))
+        if delay:
+            await asyncio.sleep(delay)
+        return await call_next(request)
+
+    @app.get("/api/v3/contents/generations/tasks/{task_id}")
+    async def get_task(task_id: str):
+        return {"id": task_id, "status": "running"}
+
+    @app.post("/api/search_api/web_search")
+    async def web_search():
+        return {"ResponseMetadata": {}, "Result": {"WebResults": []}}
+
+    return app
+
+
+def set_pool_enabled(enabled: bool) -> None:
+    http_pool.HTTP_POOL_ENABLED = enabled
+    clients_base.HTTP_POOL_ENABLED = enabled
+
+
+async def run_video_poll(config: Config, requests: int, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    queue = iter(range(requests))
+
+    async def worker():
+        for i in queue:
+            t0 = time.perf_counter()
+            await AsyncVideoGenerationClient(config=config).aget_task(f"task-{i}")
+            latencies.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    await get_http_pool().aclose()
+    return latencies
+
+
+def run_search(config: Config, requests: int, concurrency: int) -> List[float]:
+    def one(_: int) -> float:
+        t0 = time.perf_counter()
+        PooledSearchClient(config=config).search(query="bench")
+        return time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(one, range(requests)))
+
+
+def measure(
+    fn: Callable[[], List[float]], connections: Set[Tuple[str, int]]
+) -> Dict[str, Any]:
+    connections.clear()
+    t0 = time.perf_counter()
+    latencies = fn()
+    elapsed = time.perf_counter() - t0
+    return {
+        "requests": len(latencies),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "tcp_connections": len(connections),
+        **summarize_ms(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-call HTTP connections")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--server-delay-ms", type=float, default=0.0, help="替身服务的处理延迟")
+    args = parser.parse_args()
+
+    connections: Set[Tuple[str, int]] = set()
+    app = create_stand_in(connections, args.server_delay_ms / 1000)
+    results: Dict[str, Any] = {"requests": args.requests, "concurrency": args.concurrency, "scenarios": {}}
+    with ServerThread(app) as server:
+        config = Config(api_key="bench", base_url=server.base_url, base_model_url=server.base_url)
+        scenarios = {
+            "video_poll": lambda: asyncio.run(run_video_poll(config, args.requests, args.concurrency)),
+            "search": lambda: run_search(config, args.requests, args.concurrency),
+        }
+        for name, fn in scenarios.items():
+            fn()  # 预热：导入与首个连接
+            entry = {}
+            for mode, enabled in (("per_call", False), ("pooled", True)):
+                set_pool_enabled(enabled)
+                entry[mode] = measure(fn, connections)
+            entry["speedup"] = round(entry["pooled"]["requests_per_sec"] / entry["per_call"]["requests_per_sec"], 2)
+            results["scenarios"][name] = entry
+    results["http_pool"] = get_http_pool().stats()
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
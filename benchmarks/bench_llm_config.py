@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+微基准：节点读取 LLM 配置并渲染提示词的单次开销
+
+uncached  每次 open + json.load + Template 编译 + render（改造前节点的做法）
+cached    LLMConfigRegistry.get（一次 stat）+ render
+
+用法：
+    python benchmarks/bench_llm_config.py --iterations 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+os.environ.setdefault("COZE_WORKSPACE_PATH", str(ROOT_DIR))
+
+from jinja2 import Template
+
+from utils.llm import LLMConfigRegistry
+
+CFG_FILES = [
+    "config/learning_guide_cfg.json",
+    "config/podcast_script_cfg.json",
+    "config/video_recreation_cfg.json",
+]
+VARIABLES = {"transcript": "核心要点与实际案例。" * 200, "video_title": "bench"}
+
+
+def uncached(cfg: str) -> str:
+    cfg_file = os.path.join(os.getenv("COZE_WORKSPACE_PATH"), cfg)
+    with open(cfg_file, 'r', encoding='utf-8') as fd:
+        llm_cfg = json.load(fd)
+    return Template(llm_cfg.get("up", "")).render(VARIABLES)
+
+
+def cached(registry: LLMConfigRegistry, cfg: str) -> str:
+    return registry.get(cfg).render_up(VARIABLES)
+
+
+def measure(fn, iterations: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(iterations):
+        fn(CFG_FILES[i % len(CFG_FILES)])
+    return (time.perf_counter() - t0) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM config/template loading")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    registry = LLMConfigRegistry()
+    results = {
+        "iterations": args.iterations,
+        "uncached_us": round(measure(uncached, args.iterations), 2),
+        "cached_us": round(measure(lambda cfg: cached(registry, cfg), args.iterations), 2),
+        "registry": registry.stats(),
+    }
+    results["speedup"] = round(results["uncached_us"] / results["cached_us"], 1)
+    print(json.dumps(results, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
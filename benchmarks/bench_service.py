@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+端到端基准：GraphService 与各 HTTP 接口
+
+在进程内使用模拟服务（CLIENT_MODE=sim）驱动以下场景，统计 p50/p95/p99 延迟、runs/sec、
+流式场景的首个事件耗时（time-to-first-event）、峰值 RSS 与峰值线程数。
+GraphService 场景直接调用服务对象；HTTP 场景访问同进程后台线程中启动的 uvicorn：
+
+service_run      GraphService.run
+service_stream   GraphService.stream_sse（内部走 GraphService.astream）
+http_run         POST /run
+http_stream_run  POST /stream_run
+http_node_run    POST /node_run/{node_id}
+openai_chat      POST /v1/chat/completions（stream=true）
+                 workflow 项目中该接口把对话消息作为图输入，缺少 domain 时计为错误
+
+模拟服务的延迟、错误率可通过 SIM_* 环境变量调整（见 utils/clients/simulation.py）。
+结果默认保存到 benchmarks/results/，--compare 可与之前保存的结果逐项对比。
+
+用法：
+    python benchmarks/bench_service.py
+    python benchmarks/bench_service.py --scenarios http_run,http_stream_run --concurrency 1,32,128
+    python benchmarks/bench_service.py --compare benchmarks/results/bench_service_abc1234_20260101-120000.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import ResourceSampler, ServerThread, compare_results, git_revision, save_results, setup_env, summarize_ms
+
+setup_env()
+
+SCENARIOS = ["service_run", "service_stream", "http_run", "http_stream_run", "http_node_run", "openai_chat"]
+COMPARE_KEYS = ["runs_per_sec", "p50_ms", "p95_ms", "p99_ms", "ttfe_p50_ms", "peak_rss_mb", "peak_threads"]
+
+# 一次操作的返回：(是否成功, 首个事件耗时（秒），非流式场景为 None)
+Operation = Callable[[int], Awaitable[Tuple[bool, Optional[float]]]]
+
+
+def is_error_event(data: str) -> bool:
+    """SSE data 是否为错误事件（服务端消息或 OpenAI 格式的错误块）"""
+    data = data.strip()
+    if not data or data == "[DONE]":
+        return False
+    try:
+        event = json.loads(data)
+    except json.JSONDecodeError:
+        return False
+    if not isinstance(event, dict):
+        return False
+    return event.get("type") == "error" or bool(event.get("error")) or bool((event.get("content") or {}).get("error"))
+
+
+def build_operations(client, node_id: str) -> Dict[str, Operation]:
+    import main
+    from coze_coding_utils.runtime_ctx.context import new_context
+
+    def payload(i: int) -> Dict[str, Any]:
+        return {"domain": f"科技{i % 4}"}
+
+    async def service_run(i: int):
+        result = await main.service.run(payload(i), new_context(method="bench"))
+        return isinstance(result, dict) and "final_result" in result, None
+
+    async def service_stream(i: int):
+        t0 = time.perf_counter()
+        ttfe = None
+        ok = True
+        async for event in main.service.stream_sse(payload(i), new_context(method="bench")):
+            if ttfe is None:
+                ttfe = time.perf_counter() - t0
+            if is_error_event(event.partition("data:")[2]):
+                ok = False
+        return ok and ttfe is not None, ttfe
+
+    async def http_run(i: int):
+        resp = await client.post("/run", json=payload(i))
+        return resp.status_code == 200 and "final_result" in resp.json(), None
+
+    async def stream_request(url: str, body: Dict[str, Any]):
+        t0 = time.perf_counter()
+        ttfe = None
+        ok = True
+        async with client.stream("POST", url, json=body) as resp:
+            if resp.status_code != 200:
+                await resp.aread()
+                return False, None
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                if ttfe is None:
+                    ttfe = time.perf_counter() - t0
+                if is_error_event(line[len("data:"):]):
+                    ok = False
+        return ok and ttfe is not None, ttfe
+
+    async def http_stream_run(i: int):
+        return await stream_request("/stream_run", payload(i))
+
+    async def http_node_run(i: int):
+        body = {"transcript": "核心要点与实际案例。" * 60, "video_title": f"bench {i % 4}"}
+        resp = await client.post(f"/node_run/{node_id}", json=body)
+        return resp.status_code == 200, None
+
+    async def openai_chat(i: int):
+        body = {
+            "model": "bench",
+            "session_id": f"bench-{i}",
+            "stream": True,
+            "messages": [{"role": "user", "content": json.dumps(payload(i), ensure_ascii=False)}],
+        }
+        return await stream_request("/v1/chat/completions", body)
+
+    return {
+        "service_run": service_run,
+        "service_stream": service_stream,
+        "http_run": http_run,
+        "http_stream_run": http_stream_run,
+        "http_node_run": http_node_run,
+        "openai_chat": openai_chat,
+    }
+
+
+async def run_level(scenario: str, op: Operation, concurrency: int, total: int) -> Dict[str, Any]:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    ttfes: List[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                ok, ttfe = await op(i)
+            except Exception:
+                ok, ttfe = False, None
+            latencies.append(time.perf_counter() - t0)
+            if ttfe is not None:
+                ttfes.append(ttfe)
+            if not ok:
+                errors += 1
+
+    with ResourceSampler() as sampler:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - t0
+
+    result: Dict[str, Any] = {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "runs": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "runs_per_sec": round(total / elapsed, 2),
+    }
+    result.update(summarize_ms(latencies))
+    if ttfes:
+        result.update({f"ttfe_{k}": v for k, v in summarize_ms(ttfes).items()})
+    result.update(sampler.result())
+    return result
+
+
+async def main_async(args) -> Dict[str, Any]:
+    import httpx
+    import main
+
+    results = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=max(args.concurrency))
+    with ServerThread(main.app) as server:
+        async with httpx.AsyncClient(base_url=server.base_url, timeout=None, limits=limits) as client:
+            operations = build_operations(client, args.node_id)
+            for scenario in args.scenarios:
+                op = operations[scenario]
+                # 预热：加载配置、编译子图等一次性开销不计入结果
+                await op(0)
+                for c in args.concurrency:
+                    total = max(c * args.rounds, args.min_runs)
+                    result = await run_level(scenario, op, c, total)
+                    results.append(result)
+                    print(json.dumps(result, ensure_ascii=False), flush=True)
+
+    return {
+        "meta": {
+            "benchmark": "bench_service",
+            "git_revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            "sim_env": {k: v for k, v in os.environ.items() if k.startswith("SIM_") or k == "CLIENT_MODE"},
+        },
+        "results": results,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark for the workflow service")
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=SCENARIOS)
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 16, 64])
+    parser.add_argument("--rounds", type=int, default=2, help="每个并发档位的运行轮数（总运行数 = 并发 * 轮数）")
+    parser.add_argument("--min-runs", type=int, default=8)
+    parser.add_argument("--node-id", default="learning_guide_node", help="http_node_run 场景调用的节点函数名")
+    parser.add_argument("--output", help="结果 JSON 路径，默认写入 benchmarks/results/")
+    parser.add_argument("--compare", help="与之前保存的结果 JSON 对比")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main_async(args))
+    path = save_results("bench_service", report, args.output)
+    print(f"results saved to {path}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        for row in compare_results(baseline, report, COMPARE_KEYS):
+            print(json.dumps(row, ensure_ascii=False))
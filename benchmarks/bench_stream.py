@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+基准：GraphService.astream 的两种流式实现
+
+thread   每个请求一个后台线程，在线程自己的事件循环中驱动 graph.astream，经队列回传（STREAM_NATIVE_ASYNC=false）
+native   在服务的事件循环上直接消费 graph.astream（STREAM_NATIVE_ASYNC=true）
+
+同时发起 --streams 个 GraphService.stream_sse 流并读完全部事件，统计峰值线程数、峰值 RSS、
+事件吞吐与首个事件耗时。每种实现在独立子进程中运行，RSS 与线程数互不影响。
+
+--read-delay-ms 模拟读得慢的客户端（每读一个事件等待一次），配合 STREAM_BUFFER_POLICY /
+STREAM_BUFFER_HIGH_WATER 环境变量观察缓冲区深度与合并情况。
+
+graph_queue_peak 是 LangGraph 内部流队列（无界）的峰值深度。native 方式下生产者阻塞在缓冲区上时，
+尚未取走的 token 达到高水位后节点内的 LLM token 输出暂停（emitter_waits），该队列最多为
+高水位加上每个进行中的 LLM 调用一条；thread 方式下生产者阻塞时整个图的事件循环一起暂停。
+
+用法：
+    python benchmarks/bench_stream.py
+    python benchmarks/bench_stream.py --streams 500 --modes thread,native
+    STREAM_BUFFER_HIGH_WATER=16 python benchmarks/bench_stream.py --streams 200 --read-delay-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import ResourceSampler, setup_env, summarize_ms
+
+MODES = ["thread", "native"]
+
+
+def track_graph_queue_peak() -> Dict[str, int]:
+    """替换 LangGraph 流队列的实现，记录所有流队列的峰值深度"""
+    from langgraph.pregel import main as pregel_main
+
+    peak = {"depth": 0}
+
+    class TrackedQueue(pregel_main.AsyncQueue):
+        def put_nowait(self, item):
+            super().put_nowait(item)
+            peak["depth"] = max(peak["depth"], self.qsize())
+
+    pregel_main.AsyncQueue = TrackedQueue
+    return peak
+
+
+async def run_streams(streams: int, read_delay: float) -> Dict[str, Any]:
+    import main
+    from utils.serving import get_stream_buffers
+    from coze_coding_utils.runtime_ctx.context import new_context
+
+    graph_queue = track_graph_queue_peak()
+    first_event: List[float] = []
+    durations: List[float] = []
+    events = 0
+    errors = 0
+
+    async def one(i: int):
+        nonlocal events, errors
+        t0 = time.perf_counter()
+        first = True
+        async for chunk in main.service.stream_sse({"domain": f"科技{i}"}, new_context(method="bench")):
+            if first:
+                first_event.append(time.perf_counter() - t0)
+                first = False
+            events += 1
+            if '"type": "message_end"' in chunk and '"code": "0"' not in chunk:
+                errors += 1
+            if read_delay:
+                await asyncio.sleep(read_delay)
+        durations.append(time.perf_counter() - t0)
+
+    # 预热：导入与首次编译
+    await one(-1)
+    first_event.clear()
+    durations.clear()
+    events = 0
+    errors = 0
+    graph_queue["depth"] = 0
+
+    with ResourceSampler() as sampler:
+        t0 = time.perf_counter()
+        await asyncio.gather(*[one(i) for i in range(streams)])
+        elapsed = time.perf_counter() - t0
+    return {
+        "streams": streams,
+        "errors": errors,
+        "events": events,
+        "elapsed_s": round(elapsed, 2),
+        "events_per_sec": round(events / elapsed, 1),
+        **sampler.result(),
+        "first_event": summarize_ms(first_event),
+        "stream_duration": summarize_ms(durations),
+        "stream_buffers": {
+            k: v for k, v in get_stream_buffers().stats().items()
+            if k in ("policy", "high_water", "peak_depth", "coalesced", "producer_waits", "emitter_waits", "disconnected")
+        },
+        "graph_queue_peak": graph_queue["depth"],
+    }
+
+
+def run_mode(mode: str, streams: int, read_delay_ms: float) -> Dict[str, Any]:
+    """在子进程中运行一种实现（环境变量需在导入 main 之前设置）"""
+    output = subprocess.check_output(
+        [sys.executable, __file__, "--child", mode, "--streams", str(streams), "--read-delay-ms", str(read_delay_ms)],
+        text=True,
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark thread-based vs native async streaming")
+    parser.add_argument("--streams", type=int, default=500)
+    parser.add_argument("--modes", type=lambda s: s.split(","), default=MODES)
+    parser.add_argument("--read-delay-ms", type=float, default=0.0, help="客户端每读一个事件后的等待")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        import os
+
+        os.environ["STREAM_NATIVE_ASYNC"] = str(args.child == "native").lower()
+        setup_env()
+        logging.disable(logging.CRITICAL)  # 500 个并发流的请求日志会淹没结果
+        print(json.dumps(asyncio.run(run_streams(args.streams, args.read_delay_ms / 1000))))
+        return
+
+    results = {mode: run_mode(mode, args.streams, args.read_delay_ms) for mode in args.modes}
+    if "thread" in results and "native" in results:
+        results["speedup"] = round(results["native"]["events_per_sec"] / results["thread"]["events_per_sec"], 2)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+基准测试公共工具：运行环境、模拟服务、延迟统计、资源采样、结果保存与对比
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT_DIR / "benchmarks" / "results"
+
+
+def setup_env() -> None:
+    """在导入 main 之前调用：指定工作目录、关闭文件日志与节点缓存、切换到模拟服务"""
+    if str(ROOT_DIR / "src") not in sys.path:
+        sys.path.insert(0, str(ROOT_DIR / "src"))
+    os.environ.setdefault("COZE_WORKSPACE_PATH", str(ROOT_DIR))
+    os.environ.setdefault("COZE_PROJECT_ENV", "PROD")  # 关闭节点文件日志，避免磁盘 IO 干扰
+    os.environ.setdefault("COZE_WORKLOAD_IDENTITY_API_KEY", "bench")
+    os.environ.setdefault("COZE_INTEGRATION_BASE_URL", "http://127.0.0.1:9")
+    os.environ.setdefault("COZE_INTEGRATION_MODEL_BASE_URL", "http://127.0.0.1:9")
+    os.environ.setdefault("NODE_CACHE_BACKEND", "none")  # 关闭节点结果缓存，每次运行都走完整链路
+    os.environ.setdefault("CLIENT_MODE", "sim")
+
+
+class ServerThread:
+    """
+    在后台线程中启动 uvicorn 服务（独立事件循环），HTTP 场景经真实的 TCP 连接访问
+
+    httpx.ASGITransport 会把响应体收齐后才返回，无法测量流式接口的首个事件耗时。
+    """
+
+    def __init__(self, app, host: str = "127.0.0.1"):
+        import uvicorn
+
+        with socket.socket() as sock:
+            sock.bind((host, 0))
+            port = sock.getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        config = uvicorn.Config(app, host=host, port=port, log_level="warning", timeout_keep_alive=60)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "ServerThread":
+        self._thread.start()
+        deadline = time.time() + 10
+        while not self._server.started:
+            if time.time() > deadline:
+                raise RuntimeError("uvicorn server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize_ms(values: List[float]) -> Dict[str, float]:
+    """秒 -> 毫秒的 p50/p95/p99/max"""
+    values = sorted(values)
+    return {
+        "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+        "max_ms": round(values[-1] * 1000, 1) if values else 0.0,
+    }
+
+
+class ResourceSampler:
+    """后台线程定期采样进程 RSS 与线程数，记录峰值"""
+
+    def __init__(self, interval: float = 0.05):
+        import psutil
+
+        self.interval = interval
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.peak_rss = 0
+        self.peak_threads = 0
+
+    def _sample(self) -> None:
+        with self._process.oneshot():
+            self.peak_rss = max(self.peak_rss, self._process.memory_info().rss)
+            self.peak_threads = max(self.peak_threads, self._process.num_threads())
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "ResourceSampler":
+        self._sample()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "peak_rss_mb": round(self.peak_rss / 1024 / 1024, 1),
+            "peak_threads": self.peak_threads,
+        }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def save_results(name: str, results: Dict[str, Any], output: Optional[str] = None) -> Path:
+    """保存为 JSON，默认路径 benchmarks/results/<name>_<git 短哈希>_<时间>.json"""
+    if output:
+        path = Path(output)
+    else:
+        path = RESULTS_DIR / f"{name}_{results['meta']['git_revision']}_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], keys: List[str]) -> List[Dict[str, Any]]:
+    """按 (scenario, concurrency) 对齐两次结果，返回各指标的相对变化"""
+    base_index = {(r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])}
+    rows = []
+    for r in current.get("results", []):
+        base = base_index.get((r["scenario"], r["concurrency"]))
+        if base is None:
+            continue
+        row: Dict[str, Any] = {"scenario": r["scenario"], "concurrency": r["concurrency"]}
+        for key in keys:
+            old, new = base.get(key), r.get(key)
+            if isinstance(old, (int, float)) and isinstance(new, (int, float)) and old:
+                row[key] = f"{old} -> {new} ({(new - old) / old * 100:+.1f}%)"
+        rows.append(row)
+    return rows
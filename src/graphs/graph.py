@@ -1,4 +1,5 @@
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
 from langchain_core.runnables import RunnableConfig
 from langgraph.runtime import Runtime
 from graphs.state import (
@@ -7,40 +8,79 @@ from graphs.state import (
     GraphOutput
 )
 from graphs.nodes.hotspot_capture_node import hotspot_capture_node
+from graphs.nodes.transcript_digest_node import transcript_digest_node
 from graphs.nodes.video_recreation_node import video_recreation_node
 from graphs.nodes.learning_guide_node import learning_guide_node
 from graphs.nodes.podcast_script_node import podcast_script_node
 from graphs.nodes.result_summary_node import result_summary_node
+from graphs.nodes.video_pipeline_node import video_pipeline_node
+from graphs.state import VideoPipelineInput
+from utils.cache import cached_node
+from utils.serving.checkpoints import RUN_CHECKPOINT_ENABLED
+from langgraph.checkpoint.memory import MemorySaver
+
+BRANCH_NODES = ["video_recreation", "learning_guide", "podcast_script"]
+
+
+def route_videos(state: GlobalState):
+    """
+    热点捕获后的分发逻辑
+    
+    - 单视频：先生成转录文本摘要，再并行执行三个分支节点
+    - Top-N 模式：通过 Send 为每个视频分发一次单视频流水线（map），由 video_results 的 reducer 汇总（reduce）
+    """
+    if len(state.videos) <= 1:
+        return "transcript_digest"
+    return [
+        Send("video_pipeline", VideoPipelineInput(
+            domain=state.domain,
+            rank=rank,
+            video_callback_url=state.video_callback_url,
+            **video.model_dump()
+        ))
+        for rank, video in enumerate(state.videos)
+    ]
 
 
 # 创建状态图，指定工作流的入参和出参
 builder = StateGraph(GlobalState, input_schema=GraphInput, output_schema=GraphOutput)
 
 # 添加节点
+# LLM 节点均经过结果缓存包装：输入、LLM 配置、节点代码均未变化时直接复用上次的输出
 # 热点捕获节点
 builder.add_node("hotspot_capture", hotspot_capture_node)
 
+# 转录文本摘要节点（Agent节点，使用LLM）：长文本切块并发提炼，三个分支共用
+builder.add_node(
+    "transcript_digest",
+    cached_node(transcript_digest_node),
+    metadata={"type": "agent", "llm_cfg": "config/transcript_digest_cfg.json"}
+)
+
 # AI视频二创节点（Agent节点，使用LLM）
 builder.add_node(
     "video_recreation",
-    video_recreation_node,
+    cached_node(video_recreation_node),
     metadata={"type": "agent", "llm_cfg": "config/video_recreation_cfg.json"}
 )
 
 # 深度学习指南节点（Agent节点，使用LLM）
 builder.add_node(
     "learning_guide",
-    learning_guide_node,
+    cached_node(learning_guide_node),
     metadata={"type": "agent", "llm_cfg": "config/learning_guide_cfg.json"}
 )
 
 # 播客对谈脚本节点（Agent节点，使用LLM）
 builder.add_node(
     "podcast_script",
-    podcast_script_node,
+    cached_node(podcast_script_node),
     metadata={"type": "agent", "llm_cfg": "config/podcast_script_cfg.json"}
 )
 
+# 单视频产物流水线节点（Top-N 模式，每个视频一次）
+builder.add_node("video_pipeline", video_pipeline_node)
+
 # 结果汇总节点
 builder.add_node("result_summary", result_summary_node)
 
@@ -48,19 +88,26 @@ builder.add_node("result_summary", result_summary_node)
 builder.set_entry_point("hotspot_capture")
 
 # 添加边
-# 热点捕获后，并行执行三个任务
-builder.add_edge("hotspot_capture", "video_recreation")
-builder.add_edge("hotspot_capture", "learning_guide")
-builder.add_edge("hotspot_capture", "podcast_script")
+# 热点捕获后生成转录文本摘要，Top-N 模式下改为按视频分发到 video_pipeline
+builder.add_conditional_edges("hotspot_capture", route_videos, ["transcript_digest", "video_pipeline"])
+
+# 摘要完成后，并行执行三个任务
+# 三个分支均为异步节点（async def），在事件循环上并发等待外部 IO，不占用线程池线程
+for node_name in BRANCH_NODES:
+    builder.add_edge("transcript_digest", node_name)
 
 # 三个并行任务都完成后，汇聚到结果汇总节点
 builder.add_edge(
     ["video_recreation", "learning_guide", "podcast_script"],
     "result_summary"
 )
+# Top-N 模式：所有视频的流水线完成后汇聚到结果汇总节点
+builder.add_edge("video_pipeline", "result_summary")
 
 # 结果汇总后结束
 builder.add_edge("result_summary", END)
 
 # 编译图
-main_graph = builder.compile()
+# 挂载 checkpointer：每个超步完成后保存状态，失败的运行可通过 /resume/{run_id} 只重跑失败或未完成的节点
+# 以进程内 MemorySaver 编译，Postgres checkpointer 在服务启动时于事件循环上创建并替换（见 RunCheckpointRegistry.open）
+main_graph = builder.compile(checkpointer=MemorySaver() if RUN_CHECKPOINT_ENABLED else None)
@@ -1,29 +1,23 @@
 import os
 import json
-from coze_coding_dev_sdk import SearchClient, LLMClient
+from concurrent.futures import ThreadPoolExecutor
+from coze_coding_dev_sdk.search.models import WebItem
 from coze_coding_utils.runtime_ctx.context import new_context
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import SystemMessage, HumanMessage
 from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context
-from graphs.state import HotspotCaptureInput, HotspotCaptureOutput
+from utils.blob import store_text
+from utils.cache import get_search_cache
+from utils.clients import get_client_provider
+from utils.llm import get_text_content
+from utils.ranking import quality_scores, rank_hotspot_candidates, select_source_text
+from graphs.state import HotspotCaptureInput, HotspotCaptureOutput, VideoItem
 
-
-def get_text_content(content):
-    """安全提取文本内容"""
-    if isinstance(content, str):
-        return content
-    elif isinstance(content, list):
-        if content and isinstance(content[0], str):
-            return " ".join(content)
-        else:
-            text_parts = [
-                item.get("text", "") 
-                for item in content 
-                if isinstance(item, dict) and item.get("type") == "text"
-            ]
-            return " ".join(text_parts)
-    return str(content)
+# 每个领域默认处理的热门视频数，大于 1 时启用 Top-N 并行模式
+HOTSPOT_TOP_N = int(os.getenv("HOTSPOT_TOP_N", "1"))
+# 每次搜索请求的候选数，候选越多越容易找到无需 LLM 增强的结果
+HOTSPOT_SEARCH_COUNT = int(os.getenv("HOTSPOT_SEARCH_COUNT", "10"))
 
 
 def hotspot_capture_node(
@@ -40,91 +34,112 @@ def hotspot_capture_node(
     
     # 初始化搜索客户端
     search_ctx = new_context(method="search.web")
-    client = SearchClient(ctx=search_ctx)
+    client = get_client_provider().search(ctx=search_ctx)
     
     # 优化1：使用时间范围筛选最新内容（过去24小时的热门内容）
     search_query = f"site:youtube.com {state.domain} 热门 trending popular 最新"
     
-    # 执行搜索，获取Top 5结果
-    response = client.search(
+    # 每个领域处理的视频数，未指定时取 HOTSPOT_TOP_N
+    top_n = state.top_n if state.top_n > 0 else HOTSPOT_TOP_N
+    
+    # 执行搜索，获取 HOTSPOT_SEARCH_COUNT 条候选（Top-N 模式下至少 N 条）
+    # 搜索结果按 (query, search_type, count, time_range) 缓存，同一领域的并发请求只触发一次上游搜索
+    response = get_search_cache().search(
+        client,
         query=search_query,
         search_type="web",
-        count=5,
+        count=max(HOTSPOT_SEARCH_COUNT, top_n),
         need_content=True,
         need_summary=True,
         time_range="24h"  # 筛选过去24小时的内容
     )
     
-    # 优化2：热度排序逻辑
-    # 利用 search 返回的 rank_score（相关性评分）进行筛选
+    # 优化2：多信号综合排序
+    # 对全部候选同时计算 rank_score、可用文本长度与质量、关键词密度，
+    # 可用文本不足（需要 LLM 增强）的候选排在后面
     if response.web_items and len(response.web_items) > 0:
-        # 按 rank_score 降序排序，选择相关性最高的视频
-        sorted_videos = sorted(
-            response.web_items,
-            key=lambda x: x.rank_score if x.rank_score else 0,
-            reverse=True
-        )
+        order = rank_hotspot_candidates(response.web_items, domain=state.domain)
+        sorted_videos = [response.web_items[i] for i in order]
         
-        # 选择 Top 1
-        selected_video = sorted_videos[0]
-        video_title = selected_video.title
-        video_description = selected_video.snippet or selected_video.summary or ""
-        video_url = selected_video.url
-        
-        # 优化3：文本提取策略（优先级降序）
-        # 1. 完整内容（如果有的话）
-        # 2. AI摘要（summary）
-        # 3. 片段描述（snippet）
-        # 4. 如果以上都不足，使用 LLM 增强
-        transcript = ""
-        
-        if selected_video.content and len(selected_video.content) > 200:
-            # 有完整内容，直接使用
-            transcript = selected_video.content
-        elif selected_video.summary and len(selected_video.summary) > 100:
-            # 有AI摘要，使用摘要
-            transcript = selected_video.summary
-        elif selected_video.snippet and len(selected_video.snippet) > 50:
-            # 使用片段描述
-            transcript = selected_video.snippet
-        else:
-            # 优化4：描述增强逻辑
-            # 如果文本质量极差，利用 LLM 对标题、描述、摘要进行整合
-            transcript = _enhance_video_content(
-                video_title=video_title,
-                description=video_description,
-                summary=selected_video.summary or "",
-                domain=state.domain
+        # Top-N 模式：取前 N 个视频，后续通过 Send 按视频并行执行三个分支
+        if top_n > 1:
+            selected_videos = sorted_videos[:top_n]
+            with ThreadPoolExecutor(max_workers=len(selected_videos)) as executor:
+                videos = list(executor.map(lambda v: _to_video_item(v, state.domain), selected_videos))
+            top_video = videos[0]
+            return HotspotCaptureOutput(
+                video_title=top_video.video_title,
+                video_description=top_video.video_description,
+                video_url=top_video.video_url,
+                transcript=top_video.transcript,
+                videos=videos
             )
+        
+        # 选择 Top 1
+        video = _to_video_item(sorted_videos[0], state.domain)
+        video_title = video.video_title
+        video_description = video.video_description
+        video_url = video.video_url
+        transcript = video.transcript
     
     else:
         # 如果没有搜索到视频，使用默认值并标记
         video_title = f"{state.domain}领域热门视频"
         video_description = f"这是关于{state.domain}的热门视频内容，包含核心知识点和实践案例。"
         video_url = "https://youtube.com/example"
-        transcript = _enhance_video_content(
+        transcript = _mark_low_quality(_enhance_video_content(
             video_title=video_title,
             description=video_description,
             summary="",
             domain=state.domain
-        )
-    
-    # 优化5：文本质量校验
-    # 检查文本长度和质量
-    text_quality_score = _evaluate_text_quality(transcript)
-    
-    # 如果文本质量较低，在文本开头添加标记
-    if text_quality_score < 50:
-        transcript = f"[⚠️ 注意：本文本为基于视频元数据生成的内容概览，非完整转录]\n\n{transcript}"
+        ))
     
+    # 长转录文本存入 BlobStore，图状态、checkpoint 和节点日志中只保留引用
     return HotspotCaptureOutput(
         video_title=video_title,
         video_description=video_description,
         video_url=video_url,
-        transcript=transcript
+        transcript=store_text(transcript)
+    )
+
+
+def _to_video_item(selected_video: WebItem, domain: str) -> VideoItem:
+    """从搜索结果中提取视频信息与转录文本"""
+    video_title = selected_video.title
+    video_description = selected_video.snippet or selected_video.summary or ""
+    
+    # 优化3：文本提取策略（优先级降序）
+    # 1. 完整内容（如果有的话）
+    # 2. AI摘要（summary）
+    # 3. 片段描述（snippet）
+    # 4. 如果以上都不足，使用 LLM 增强
+    transcript = select_source_text(selected_video.content, selected_video.summary, selected_video.snippet)
+    if transcript is None:
+        # 优化4：描述增强逻辑
+        # 如果文本质量极差，利用 LLM 对标题、描述、摘要进行整合
+        transcript = _enhance_video_content(
+            video_title=video_title,
+            description=video_description,
+            summary=selected_video.summary or "",
+            domain=domain
+        )
+    
+    return VideoItem(
+        video_title=video_title,
+        video_description=video_description,
+        video_url=selected_video.url,
+        transcript=store_text(_mark_low_quality(transcript))
     )
 
 
+def _mark_low_quality(transcript: str) -> str:
+    """优化5：文本质量校验，质量较低时在文本开头添加标记"""
+    text_quality_score = _evaluate_text_quality(transcript)
+    if text_quality_score < 50:
+        return f"[⚠️ 注意：本文本为基于视频元数据生成的内容概览，非完整转录]\n\n{transcript}"
+    return transcript
+
+
 def _enhance_video_content(
     video_title: str,
     description: str,
@@ -145,7 +160,7 @@ def _enhance_video_content(
     """
     try:
         llm_ctx = new_context(method="llm.invoke")
-        llm_client = LLMClient(ctx=llm_ctx)
+        llm_client = get_client_provider().llm(ctx=llm_ctx)
         
         prompt = f"""请根据以下视频元数据，生成一份详细的内容概览。
 
@@ -230,31 +245,4 @@ def _evaluate_text_quality(text: str) -> int:
     Returns:
         质量评分（0-100）
     """
-    if not text:
-        return 0
-    
-    score = 0
-    
-    # 长度评分（0-40分）
-    if len(text) >= 500:
-        score += 40
-    elif len(text) >= 300:
-        score += 30
-    elif len(text) >= 100:
-        score += 20
-    else:
-        score += 10
-    
-    # 结构评分（0-30分）
-    has_structure = any(marker in text for marker in ["第一部分", "1.", "1）", "一、"])
-    if has_structure:
-        score += 30
-    elif any(marker in text for marker in ["。", "？", "！"]):
-        score += 15
-    
-    # 内容丰富度评分（0-30分）
-    content_keywords = ["核心", "关键", "重点", "要点", "案例", "实际", "应用", "趋势", "发展"]
-    keyword_count = sum(1 for keyword in content_keywords if keyword in text)
-    score += min(keyword_count * 5, 30)
-    
-    return min(score, 100)
+    return int(quality_scores([text or ""])[0])
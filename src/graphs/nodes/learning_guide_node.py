@@ -1,7 +1,6 @@
-import os
-import json
-from jinja2 import Template
-from coze_coding_dev_sdk import LLMClient
+from utils.llm import HedgedLLMClient, fit_prompt, get_llm_config, get_text_content
+from utils.blob import aresolve_text
+from utils.clients import get_client_provider
 from coze_coding_utils.runtime_ctx.context import new_context
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -10,24 +9,7 @@ from coze_coding_utils.runtime_ctx.context import Context
 from graphs.state import LearningGuideInput, LearningGuideOutput
 
 
-def get_text_content(content):
-    """安全提取文本内容"""
-    if isinstance(content, str):
-        return content
-    elif isinstance(content, list):
-        if content and isinstance(content[0], str):
-            return " ".join(content)
-        else:
-            text_parts = [
-                item.get("text", "") 
-                for item in content 
-                if isinstance(item, dict) and item.get("type") == "text"
-            ]
-            return " ".join(text_parts)
-    return str(content)
-
-
-def learning_guide_node(
+async def learning_guide_node(
     state: LearningGuideInput,
     config: RunnableConfig,
     runtime: Runtime[Context]
@@ -39,40 +21,40 @@ def learning_guide_node(
     """
     ctx = runtime.context
     
-    # 读取LLM配置
-    cfg_file = os.path.join(os.getenv("COZE_WORKSPACE_PATH"), config['metadata']['llm_cfg'])
-    with open(cfg_file, 'r', encoding='utf-8') as fd:
-        llm_cfg = json.load(fd)
-    
-    model_config = llm_cfg.get("config", {})
-    sp = llm_cfg.get("sp", "")
-    up = llm_cfg.get("up", "")
-    
-    # 渲染提示词
-    up_tpl = Template(up)
-    user_prompt = up_tpl.render({
-        "transcript": state.transcript,
-        "video_title": state.video_title
-    })
+    # 读取LLM配置（进程级缓存，配置文件变更时自动重新加载）
+    llm_cfg = get_llm_config(config['metadata']['llm_cfg'])
+    model_config = llm_cfg.model_config
+    
+    # 渲染提示词：转录文本按 token 预算在句子边界截断，提示词与输出合计不超过上下文窗口
+    prompt = fit_prompt(
+        llm_cfg,
+        {
+            "transcript": await aresolve_text(state.transcript_digest or state.transcript),  # 长文本使用切块提炼后的摘要，状态中只保存引用
+            "video_title": state.video_title
+        },
+        fit_field="transcript",
+        max_completion_tokens=model_config.get("max_completion_tokens", 4096)
+    )
     
     # 调用LLM生成学习指南
-    llm_ctx = new_context(method="llm.invoke")
-    llm_client = LLMClient(ctx=llm_ctx)
+    llm_ctx = new_context(method="llm.stream")
+    llm_client = HedgedLLMClient(get_client_provider().async_llm(ctx=llm_ctx), name="learning_guide")
     
     messages = [
-        SystemMessage(content=sp),
-        HumanMessage(content=user_prompt)
+        SystemMessage(content=prompt.sp),
+        HumanMessage(content=prompt.user_prompt)
     ]
     
-    response = llm_client.invoke(
+    # 流式调用，/stream_run 可逐 token 推送学习指南
+    chunks = []
+    async for chunk in llm_client.astream(
         messages=messages,
         model=model_config.get("model", "doubao-seed-1-8-251228"),
         temperature=model_config.get("temperature", 0.7),
-        max_completion_tokens=model_config.get("max_completion_tokens", 4096)
-    )
-    
-    # 提取生成的Markdown内容
-    learning_guide = get_text_content(response.content)
+        max_completion_tokens=prompt.max_completion_tokens
+    ):
+        chunks.append(get_text_content(chunk.content))
+    learning_guide = "".join(chunks)
     
     return LearningGuideOutput(
         learning_guide=learning_guide
@@ -2,6 +2,7 @@ from langchain_core.runnables import RunnableConfig
 from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context
 from graphs.state import ResultSummaryInput, ResultSummaryOutput
+from utils.serving import artifact_url
 
 
 def result_summary_node(
@@ -16,19 +17,57 @@ def result_summary_node(
     """
     ctx = runtime.context
     
+    # Top-N 模式：各视频产物已由单视频流水线汇总，按热度排名输出，首个视频同时作为顶层结果
+    if state.video_results:
+        videos = sorted(state.video_results, key=lambda v: v.get("rank", 0))
+        final_result = {
+            "source_video": videos[0]["source_video"],
+            "products": videos[0]["products"],
+            "videos": videos
+        }
+        return ResultSummaryOutput(
+            final_result=final_result
+        )
+    
     # 构建汇总结果
     final_result = {
         "source_video": {
             "title": state.video_title,
             "url": state.video_url
         },
-        "products": {
-            "short_video": state.short_video_url,
-            "learning_guide": state.learning_guide,
-            "podcast_audio": state.podcast_audio_url
-        }
+        "products": build_products(
+            run_id=ctx.run_id,
+            short_video_url=state.short_video_url,
+            video_job_id=state.video_job_id,
+            learning_guide=state.learning_guide,
+            podcast_audio_url=state.podcast_audio_url
+        )
     }
     
     return ResultSummaryOutput(
         final_result=final_result
     )
+
+
+def build_products(
+    run_id: str,
+    short_video_url: str,
+    video_job_id: str,
+    learning_guide: str,
+    podcast_audio_url: str
+) -> dict:
+    """
+    构建单个视频的产物信息
+    
+    视频任务模式下视频仍在生成，短视频先给出该视频任务的产物查询地址，完成后通过 /artifacts 或回调获取
+    """
+    products = {
+        "short_video": short_video_url,
+        "learning_guide": learning_guide,
+        "podcast_audio": podcast_audio_url
+    }
+    if video_job_id:
+        products["short_video"] = artifact_url(run_id, video_job_id)
+        products["short_video_status"] = "pending"
+        products["short_video_job_id"] = video_job_id
+    return products
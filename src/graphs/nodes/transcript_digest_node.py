@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+from typing import List
+from utils.blob import aresolve_text, blob_content_id, is_blob_ref, store_text
+from utils.llm import HedgedLLMClient, LLMConfigEntry, count_tokens, count_tokens_cached, get_llm_config, get_text_content, split_by_tokens
+from utils.clients import get_client_provider
+from coze_coding_utils.runtime_ctx.context import new_context
+from langchain_core.runnables import RunnableConfig
+from langchain_core.messages import HumanMessage, SystemMessage
+from langgraph.runtime import Runtime
+from coze_coding_utils.runtime_ctx.context import Context
+from graphs.state import TranscriptDigestInput, TranscriptDigestOutput
+
+logger = logging.getLogger(__name__)
+
+# 转录文本不超过该 token 数时直接使用原文，不做摘要
+TRANSCRIPT_DIGEST_THRESHOLD_TOKENS = int(os.getenv("TRANSCRIPT_DIGEST_THRESHOLD_TOKENS", "3000"))
+# 每个切块的 token 上限
+TRANSCRIPT_CHUNK_TOKENS = int(os.getenv("TRANSCRIPT_CHUNK_TOKENS", "2000"))
+# 同时进行的切块提炼请求数
+TRANSCRIPT_DIGEST_CONCURRENCY = int(os.getenv("TRANSCRIPT_DIGEST_CONCURRENCY", "8"))
+# 归并轮数上限，合并后的要点仍超过阈值时对要点再做一轮提炼
+TRANSCRIPT_DIGEST_MAX_ROUNDS = int(os.getenv("TRANSCRIPT_DIGEST_MAX_ROUNDS", "3"))
+
+
+async def transcript_digest_node(
+    state: TranscriptDigestInput,
+    config: RunnableConfig,
+    runtime: Runtime[Context]
+) -> TranscriptDigestOutput:
+    """
+    title: 转录文本摘要
+    desc: 将长转录文本按 token 切块，并发提炼各块要点后归并为紧凑摘要，供三个分支共用
+    integrations: 大语言模型
+    """
+    ctx = runtime.context
+
+    # 状态中的长转录文本以引用传递，这里读取原文
+    transcript = await aresolve_text(state.transcript)
+
+    # 短文本直接使用原文（沿用输入中的引用，不再重复存储）
+    transcript_id = blob_content_id(state.transcript) if is_blob_ref(state.transcript) else None
+    if count_tokens_cached(transcript, transcript_id) <= TRANSCRIPT_DIGEST_THRESHOLD_TOKENS:
+        return TranscriptDigestOutput(
+            transcript_digest=state.transcript
+        )
+
+    # 读取LLM配置（进程级缓存，配置文件变更时自动重新加载）
+    llm_cfg = get_llm_config(config['metadata']['llm_cfg'])
+
+    llm_ctx = new_context(method="llm.invoke")
+    llm_client = HedgedLLMClient(get_client_provider().async_llm(ctx=llm_ctx), name="transcript_digest")
+    semaphore = asyncio.Semaphore(max(1, TRANSCRIPT_DIGEST_CONCURRENCY))
+
+    # map：各切块并发提炼要点；reduce：按原顺序拼接，仍超过阈值时对要点再提炼一轮
+    digest = transcript
+    digest_tokens = count_tokens_cached(digest, transcript_id)
+    for round_index in range(TRANSCRIPT_DIGEST_MAX_ROUNDS):
+        chunks = split_by_tokens(digest, TRANSCRIPT_CHUNK_TOKENS)
+        notes = await asyncio.gather(*[
+            _extract_chunk(llm_client, llm_cfg, semaphore, state.video_title, chunk, index, len(chunks))
+            for index, chunk in enumerate(chunks, start=1)
+        ])
+        merged = "\n\n".join(note for note in notes if note.strip())
+        merged_tokens = count_tokens(merged)
+        logger.info(
+            f"Transcript digest round {round_index + 1}: {len(chunks)} chunks, {digest_tokens} -> {merged_tokens} tokens"
+        )
+        # 本轮没有压缩效果（如提炼失败回退为原文）时停止，保留上一轮结果
+        if merged_tokens >= digest_tokens:
+            break
+        digest, digest_tokens = merged, merged_tokens
+        if digest_tokens <= TRANSCRIPT_DIGEST_THRESHOLD_TOKENS:
+            break
+
+    return TranscriptDigestOutput(
+        transcript_digest=store_text(digest)
+    )
+
+
+async def _extract_chunk(
+    llm_client: HedgedLLMClient,
+    llm_cfg: LLMConfigEntry,
+    semaphore: asyncio.Semaphore,
+    video_title: str,
+    chunk: str,
+    index: int,
+    total: int
+) -> str:
+    """提炼单个切块的要点，失败时保留原文切块"""
+    model_config = llm_cfg.model_config
+    messages = [
+        SystemMessage(content=llm_cfg.sp),
+        HumanMessage(content=llm_cfg.render_up({
+            "video_title": video_title,
+            "chunk": chunk,
+            "index": index,
+            "total": total
+        }))
+    ]
+    try:
+        async with semaphore:
+            response = await llm_client.ainvoke(
+                messages=messages,
+                model=model_config.get("model", "doubao-seed-1-8-251228"),
+                temperature=model_config.get("temperature", 0.3),
+                max_completion_tokens=model_config.get("max_completion_tokens", 800)
+            )
+        return get_text_content(response.content)
+    except Exception as e:
+        logger.warning(f"Transcript chunk {index}/{total} extraction failed: {e}, keep original chunk")
+        return chunk
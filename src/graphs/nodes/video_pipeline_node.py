@@ -0,0 +1,69 @@
+import asyncio
+import os
+import weakref
+from typing import Dict
+from langchain_core.runnables import RunnableConfig
+from langgraph.runtime import Runtime
+from coze_coding_utils.runtime_ctx.context import Context
+from graphs.state import VideoPipelineInput, VideoPipelineOutput
+from graphs.nodes.result_summary_node import build_products
+from graphs.video_pipeline import video_pipeline_graph
+
+# 同一领域同时处理的视频数上限（跨运行共享）
+HOTSPOT_DOMAIN_CONCURRENCY = int(os.getenv("HOTSPOT_DOMAIN_CONCURRENCY", "3"))
+
+# 按事件循环隔离的领域信号量
+_domain_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def _domain_semaphore(domain: str) -> asyncio.Semaphore:
+    semaphores = _domain_semaphores.setdefault(asyncio.get_running_loop(), {})
+    if domain not in semaphores:
+        semaphores[domain] = asyncio.Semaphore(max(1, HOTSPOT_DOMAIN_CONCURRENCY))
+    return semaphores[domain]
+
+
+async def video_pipeline_node(
+    state: VideoPipelineInput,
+    config: RunnableConfig,
+    runtime: Runtime[Context]
+) -> VideoPipelineOutput:
+    """
+    title: 单视频产物流水线
+    desc: Top-N 模式下对单个热门视频并行执行视频二创、学习指南和播客三个分支
+    integrations: 大语言模型, 视频生成大模型, 语音大模型
+    """
+    ctx = runtime.context
+    
+    async with _domain_semaphore(state.domain):
+        result = await video_pipeline_graph.ainvoke(
+            {
+                "domain": state.domain,
+                "video_title": state.video_title,
+                "video_description": state.video_description,
+                "video_url": state.video_url,
+                "transcript": state.transcript,
+                "video_callback_url": state.video_callback_url
+            },
+            config=config,
+            context=ctx
+        )
+    
+    video_result = {
+        "rank": state.rank,
+        "source_video": {
+            "title": state.video_title,
+            "url": state.video_url
+        },
+        "products": build_products(
+            run_id=ctx.run_id,
+            short_video_url=result.get("short_video_url", ""),
+            video_job_id=result.get("video_job_id", ""),
+            learning_guide=result.get("learning_guide", ""),
+            podcast_audio_url=result.get("podcast_audio_url", "")
+        )
+    }
+    
+    return VideoPipelineOutput(
+        video_results=[video_result]
+    )
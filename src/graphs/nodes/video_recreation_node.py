@@ -1,8 +1,10 @@
+import logging
 import os
-import json
-from jinja2 import Template
-from coze_coding_dev_sdk.video import VideoGenerationClient, TextContent
-from coze_coding_dev_sdk import LLMClient
+from coze_coding_dev_sdk.video import TextContent
+from utils.llm import HedgedLLMClient, fit_prompt, get_llm_config, get_text_content, truncate_to_tokens
+from utils.blob import aresolve_text
+from utils.clients import get_client_provider
+from utils.serving import VIDEO_JOB_MODE, get_video_job_registry
 from coze_coding_utils.runtime_ctx.context import new_context, Context
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -10,25 +12,13 @@ from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context as RuntimeContext
 from graphs.state import VideoRecreationInput, VideoRecreationOutput
 
+logger = logging.getLogger(__name__)
 
-def get_text_content(content):
-    """安全提取文本内容"""
-    if isinstance(content, str):
-        return content
-    elif isinstance(content, list):
-        if content and isinstance(content[0], str):
-            return " ".join(content)
-        else:
-            text_parts = [
-                item.get("text", "") 
-                for item in content 
-                if isinstance(item, dict) and item.get("type") == "text"
-            ]
-            return " ".join(text_parts)
-    return str(content)
+# 视频生成提示词中高光分析部分的 token 上限（在句子边界截断）
+VIDEO_PROMPT_ANALYSIS_TOKENS = int(os.getenv("VIDEO_PROMPT_ANALYSIS_TOKENS", "300"))
 
 
-def video_recreation_node(
+async def video_recreation_node(
     state: VideoRecreationInput,
     config: RunnableConfig,
     runtime: Runtime[RuntimeContext]
@@ -40,46 +30,46 @@ def video_recreation_node(
     """
     ctx = runtime.context
     
-    # 读取LLM配置
-    cfg_file = os.path.join(os.getenv("COZE_WORKSPACE_PATH"), config['metadata']['llm_cfg'])
-    with open(cfg_file, 'r', encoding='utf-8') as fd:
-        llm_cfg = json.load(fd)
+    # 读取LLM配置（进程级缓存，配置文件变更时自动重新加载）
+    llm_cfg = get_llm_config(config['metadata']['llm_cfg'])
+    model_config = llm_cfg.model_config
     
-    model_config = llm_cfg.get("config", {})
-    sp = llm_cfg.get("sp", "")
-    up = llm_cfg.get("up", "")
-    
-    # 渲染提示词
-    up_tpl = Template(up)
-    user_prompt = up_tpl.render({
-        "transcript": state.transcript[:2000],  # 限制长度避免token过多
-        "video_title": state.video_title
-    })
+    # 渲染提示词：转录文本按 token 预算在句子边界截断，提示词与输出合计不超过上下文窗口
+    prompt = fit_prompt(
+        llm_cfg,
+        {
+            "transcript": await aresolve_text(state.transcript_digest or state.transcript),  # 长文本使用切块提炼后的摘要，状态中只保存引用
+            "video_title": state.video_title
+        },
+        fit_field="transcript",
+        max_completion_tokens=model_config.get("max_completion_tokens", 2000)
+    )
     
     # 调用LLM分析高光时刻
-    llm_ctx = new_context(method="llm.invoke")
-    llm_client = LLMClient(ctx=llm_ctx)
+    llm_ctx = new_context(method="llm.stream")
+    llm_client = HedgedLLMClient(get_client_provider().async_llm(ctx=llm_ctx), name="video_recreation")
     
     messages = [
-        SystemMessage(content=sp),
-        HumanMessage(content=user_prompt)
+        SystemMessage(content=prompt.sp),
+        HumanMessage(content=prompt.user_prompt)
     ]
     
-    response = llm_client.invoke(
+    # 流式调用，/stream_run 可逐 token 推送高光分析
+    chunks = []
+    async for chunk in llm_client.astream(
         messages=messages,
         model=model_config.get("model", "doubao-seed-1-8-251228"),
         temperature=model_config.get("temperature", 0.7),
-        max_completion_tokens=model_config.get("max_completion_tokens", 2000)
-    )
-    
-    # 提取分析结果
-    analysis_text = get_text_content(response.content)
+        max_completion_tokens=prompt.max_completion_tokens
+    ):
+        chunks.append(get_text_content(chunk.content))
+    analysis_text = "".join(chunks)
     
     # 基于分析结果生成短视频提示词
     video_prompt = f"""生成一个60秒的短视频，主题是：{state.video_title}
 
 核心内容：
-{analysis_text[:500]}
+{truncate_to_tokens(analysis_text, VIDEO_PROMPT_ANALYSIS_TOKENS)}
 
 要求：
 1. 视觉风格：现代科技感，节奏明快
@@ -89,27 +79,50 @@ def video_recreation_node(
     
     # 初始化视频生成客户端
     video_ctx = new_context(method="video.generate")
-    video_client = VideoGenerationClient(ctx=video_ctx)
+    video_client = get_client_provider().video(ctx=video_ctx)
+    
+    generation_params = dict(
+        content_items=[
+            TextContent(text=video_prompt)
+        ],
+        model="doubao-seedance-1-5-pro-251215",
+        resolution="720p",
+        ratio="16:9",
+        duration=5,
+        watermark=False
+    )
+    placeholder_url = f"https://example.com/video/short_{state.video_title[:10]}.mp4"
+    
+    # 视频任务模式：只提交任务，由后台轮询跟踪完成情况，本次运行不等待视频渲染
+    if VIDEO_JOB_MODE:
+        # 提交前取出 run_id：任务一旦创建即开始计费，之后不能再有会退回占位 URL 的步骤
+        run_id = ctx.run_id
+        try:
+            task_id = await video_client.acreate_task(**generation_params)
+        except Exception as e:
+            # 提交失败时使用占位符
+            logger.error(f"Failed to create video job for run_id={run_id}: {e}", exc_info=True)
+            return VideoRecreationOutput(
+                short_video_url=placeholder_url
+            )
+        # 登记失败直接抛出，不把已提交的任务换成占位 URL
+        get_video_job_registry().submit(run_id, task_id, callback_url=state.video_callback_url)
+        return VideoRecreationOutput(
+            short_video_url="",
+            video_job_id=task_id
+        )
     
     # 生成短视频
     try:
-        video_url, response_data, _ = video_client.video_generation(
-            content_items=[
-                TextContent(text=video_prompt)
-            ],
-            model="doubao-seedance-1-5-pro-251215",
-            resolution="720p",
-            ratio="16:9",
-            duration=5,
-            watermark=False
-        )
+        video_url, response_data, _ = await video_client.avideo_generation(**generation_params)
         
         if video_url is None:
             # 如果视频生成失败，使用占位符
-            video_url = f"https://example.com/video/short_{state.video_title[:10]}.mp4"
+            video_url = placeholder_url
     except Exception as e:
         # 异常时使用占位符
-        video_url = f"https://example.com/video/short_{state.video_title[:10]}.mp4"
+        logger.error(f"Video generation failed: {e}", exc_info=True)
+        video_url = placeholder_url
     
     return VideoRecreationOutput(
         short_video_url=video_url
@@ -1,23 +1,40 @@
-from typing import Optional
+import operator
+from typing import Annotated, List, Optional
 from pydantic import BaseModel, Field
 
 
+class VideoItem(BaseModel):
+    """热点视频信息（Top-N 模式下每个视频一条）"""
+    video_title: str = Field(default="", description="视频标题")
+    video_description: str = Field(default="", description="视频描述")
+    video_url: str = Field(default="", description="视频URL")
+    transcript: str = Field(default="", description="视频转录文本")
+
+
 class GlobalState(BaseModel):
     """全局状态定义"""
     domain: str = Field(..., description="领域关键词（如：科技、教育、娱乐）")
+    top_n: int = Field(default=0, description="处理的热门视频数，0 表示使用服务默认值")
+    video_callback_url: str = Field(default="", description="视频任务完成回调地址（视频任务模式）")
     video_title: str = Field(default="", description="视频标题")
     video_description: str = Field(default="", description="视频描述")
     video_url: str = Field(default="", description="视频URL")
     transcript: str = Field(default="", description="视频转录文本")
+    transcript_digest: str = Field(default="", description="转录文本摘要（长文本经切块提炼后的要点，短文本即原文）")
     short_video_url: str = Field(default="", description="生成的短视频URL")
+    video_job_id: str = Field(default="", description="视频生成任务ID（视频任务模式）")
     learning_guide: str = Field(default="", description="学习指南Markdown内容")
     podcast_audio_url: str = Field(default="", description="播客音频URL")
+    videos: List[VideoItem] = Field(default=[], description="Top-N 模式下的候选视频列表")
+    video_results: Annotated[List[dict], operator.add] = Field(default=[], description="Top-N 模式下各视频的产物")
     final_result: dict = Field(default={}, description="最终汇总结果")
 
 
 class GraphInput(BaseModel):
     """工作流的输入"""
     domain: str = Field(..., description="领域关键词（如：科技、教育、娱乐）")
+    top_n: int = Field(default=0, description="处理的热门视频数，大于 1 时按视频并行生成产物，0 表示使用服务默认值")
+    video_callback_url: str = Field(default="", description="视频任务完成回调地址（视频任务模式）")
 
 
 class GraphOutput(BaseModel):
@@ -28,6 +45,7 @@ class GraphOutput(BaseModel):
 class HotspotCaptureInput(BaseModel):
     """热点捕获节点的输入"""
     domain: str = Field(..., description="领域关键词")
+    top_n: int = Field(default=0, description="处理的热门视频数，0 表示使用服务默认值")
 
 
 class HotspotCaptureOutput(BaseModel):
@@ -36,23 +54,39 @@ class HotspotCaptureOutput(BaseModel):
     video_description: str = Field(..., description="视频描述")
     video_url: str = Field(..., description="视频URL")
     transcript: str = Field(..., description="视频转录文本")
+    videos: List[VideoItem] = Field(default=[], description="Top-N 模式下的候选视频列表（按热度降序）")
+
+
+class TranscriptDigestInput(BaseModel):
+    """转录文本摘要节点的输入"""
+    transcript: str = Field(..., description="视频转录文本")
+    video_title: str = Field(..., description="原始视频标题")
+
+
+class TranscriptDigestOutput(BaseModel):
+    """转录文本摘要节点的输出"""
+    transcript_digest: str = Field(..., description="转录文本摘要")
 
 
 class VideoRecreationInput(BaseModel):
     """AI视频二创节点的输入"""
     transcript: str = Field(..., description="视频转录文本")
     video_title: str = Field(..., description="原始视频标题")
+    transcript_digest: str = Field(default="", description="转录文本摘要，为空时使用原文")
+    video_callback_url: str = Field(default="", description="视频任务完成回调地址（视频任务模式）")
 
 
 class VideoRecreationOutput(BaseModel):
     """AI视频二创节点的输出"""
     short_video_url: str = Field(..., description="生成的短视频URL")
+    video_job_id: str = Field(default="", description="视频生成任务ID，视频任务模式下视频异步生成")
 
 
 class LearningGuideInput(BaseModel):
     """深度学习指南节点的输入"""
     transcript: str = Field(..., description="视频转录文本")
     video_title: str = Field(..., description="原始视频标题")
+    transcript_digest: str = Field(default="", description="转录文本摘要，为空时使用原文")
 
 
 class LearningGuideOutput(BaseModel):
@@ -64,6 +98,7 @@ class PodcastScriptInput(BaseModel):
     """播客对谈脚本节点的输入"""
     transcript: str = Field(..., description="视频转录文本")
     video_title: str = Field(..., description="原始视频标题")
+    transcript_digest: str = Field(default="", description="转录文本摘要，为空时使用原文")
 
 
 class PodcastScriptOutput(BaseModel):
@@ -76,8 +111,22 @@ class ResultSummaryInput(BaseModel):
     video_title: str = Field(..., description="视频标题")
     video_url: str = Field(..., description="视频URL")
     short_video_url: str = Field(default="", description="短视频URL")
+    video_job_id: str = Field(default="", description="视频生成任务ID")
     learning_guide: str = Field(default="", description="学习指南内容")
     podcast_audio_url: str = Field(default="", description="播客音频URL")
+    video_results: List[dict] = Field(default=[], description="Top-N 模式下各视频的产物")
+
+
+class VideoPipelineInput(VideoItem):
+    """单视频产物流水线节点的输入（由 Send 按视频分发）"""
+    domain: str = Field(..., description="领域关键词")
+    rank: int = Field(default=0, description="视频热度排名，从 0 开始")
+    video_callback_url: str = Field(default="", description="视频任务完成回调地址（视频任务模式）")
+
+
+class VideoPipelineOutput(BaseModel):
+    """单视频产物流水线节点的输出"""
+    video_results: List[dict] = Field(..., description="本视频的产物（单元素列表，由 reducer 汇总）")
 
 
 class ResultSummaryOutput(BaseModel):
@@ -0,0 +1,42 @@
+from langgraph.graph import StateGraph, START, END
+from graphs.state import GlobalState
+from graphs.nodes.transcript_digest_node import transcript_digest_node
+from graphs.nodes.video_recreation_node import video_recreation_node
+from graphs.nodes.learning_guide_node import learning_guide_node
+from graphs.nodes.podcast_script_node import podcast_script_node
+from utils.cache import cached_node
+
+
+# 单视频产物子图：Top-N 模式下由 video_pipeline 节点对每个视频调用一次
+builder = StateGraph(GlobalState)
+
+# 摘要节点与三个分支节点与主图一致（同样经过结果缓存包装）
+builder.add_node(
+    "transcript_digest",
+    cached_node(transcript_digest_node),
+    metadata={"type": "agent", "llm_cfg": "config/transcript_digest_cfg.json"}
+)
+builder.add_node(
+    "video_recreation",
+    cached_node(video_recreation_node),
+    metadata={"type": "agent", "llm_cfg": "config/video_recreation_cfg.json"}
+)
+builder.add_node(
+    "learning_guide",
+    cached_node(learning_guide_node),
+    metadata={"type": "agent", "llm_cfg": "config/learning_guide_cfg.json"}
+)
+builder.add_node(
+    "podcast_script",
+    cached_node(podcast_script_node),
+    metadata={"type": "agent", "llm_cfg": "config/podcast_script_cfg.json"}
+)
+
+# 先生成转录文本摘要，三个分支再并行执行后结束
+builder.add_edge(START, "transcript_digest")
+for node_name in ["video_recreation", "learning_guide", "podcast_script"]:
+    builder.add_edge("transcript_digest", node_name)
+    builder.add_edge(node_name, END)
+
+# 编译子图
+video_pipeline_graph = builder.compile()
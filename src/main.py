@@ -1,15 +1,17 @@
 import argparse
 import asyncio
 import json
+import os
 import traceback
 import logging
-from typing import Any, Dict, Iterable, AsyncIterable, AsyncGenerator, Optional
+from typing import Any, Dict, Iterable, AsyncIterable, AsyncIterator, AsyncGenerator, Optional
 import threading
 import contextvars
+import contextlib
 import cozeloop
 import uvicorn
 import time
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse, JSONResponse
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
@@ -23,9 +25,35 @@ from utils.log.config import LOG_LEVEL
 from utils.messages.server import (
     create_message_end_dict,
     create_message_error_dict,
+    MESSAGE_TYPE_MESSAGE_END,
     MESSAGE_END_CODE_CANCELED,
+    MESSAGE_END_CODE_SLOW_CONSUMER,
 )
 from utils.error import ErrorClassifier, classify_error
+from utils.cache import NODE_CACHE_HEADER, set_node_cache_mode
+from utils.clients import get_client_provider, get_http_pool
+from utils.llm import set_run_deadline
+from utils.serving import (
+    RunCheckpointRegistry,
+    RunCoalescer,
+    RUN_COALESCE_ENABLED,
+    BatchRunner,
+    BATCH_RUN_CONCURRENCY,
+    parse_batch_input,
+    get_video_job_registry,
+    get_run_registry,
+    StreamBackpressureHandler,
+    get_stream_buffers,
+    StreamBuffer,
+    SlowConsumerError,
+    HTTP_WORKERS,
+    RUN_REGISTRY_ENABLED,
+    AdmissionRejected,
+    AdmissionTicket,
+    get_admission_controller,
+    parse_priority,
+    queue_wait_ms,
+)
 
 setup_logging(
     log_file=LOG_FILE,
@@ -41,6 +69,11 @@ from utils.helper.agent_helper import (
     to_stream_input,
     to_client_message,
     agent_iter_server_messages,
+    agent_aiter_server_messages,
+    iter_workflow_stream_items,
+    aiter_workflow_stream_items,
+    STREAM_NATIVE_ASYNC,
+    ServerMessageCoalescer,
 )
 from utils.openai.handler import OpenAIChatHandler
 from utils.log.parser import LangGraphParser
@@ -50,6 +83,10 @@ from utils.log.loop_trace import init_run_config, init_agent_config
 
 # 超时配置常量
 TIMEOUT_SECONDS = 900  # 15分钟
+# 响应头：请求在准入队列中的等待时间（毫秒）
+QUEUE_WAIT_HEADER = "x-queue-wait-ms"
+# 启动时预先编译全部节点的单节点图（/node_run），否则在每个节点首次调用时编译
+NODE_GRAPH_PRECOMPILE = os.getenv("NODE_GRAPH_PRECOMPILE", "false").lower() in ("1", "true", "yes")
 
 class GraphService:
     def __init__(self):
@@ -58,8 +95,18 @@ class GraphService:
 
         # 用于跟踪正在运行的任务（使用asyncio.Task）
         self.running_tasks: Dict[str, asyncio.Task] = {}
+        # 运行归属与状态登记，多 worker 时据此把取消、状态查询、恢复转发到归属进程
+        self.run_registry = get_run_registry()
         # 错误分类器
         self.error_classifier = ErrorClassifier()
+        # 相同 payload 的运行合并（RUN_COALESCE_ENABLED 开启）
+        self.run_coalescer: Optional[RunCoalescer] = RunCoalescer() if RUN_COALESCE_ENABLED else None
+        # 工作流运行的 checkpoint 保留策略：成功即删除，失败保留以便 /resume
+        self.run_checkpoints = RunCheckpointRegistry(None if graph_helper.is_agent_proj() else self.graph)
+        # 单节点运行（/node_run、-m node）的已编译图，按 node_id 缓存，进程内只做一次节点解析与编译
+        self._node_graphs: Dict[str, CompiledStateGraph] = {}
+        self._node_graphs_lock = threading.Lock()
+        self._graph_parser: Optional[LangGraphParser] = None
 
     
     def _get_graph(self, ctx=Context):
@@ -69,6 +116,52 @@ class GraphService:
             return self.graph
     
     
+    @staticmethod
+    def _thread_id(session_id: str, ctx: Context) -> str:
+        # agent 项目按会话保存对话历史；工作流项目每次运行独立，以 run_id 作为 checkpoint 的 thread_id
+        if graph_helper.is_agent_proj():
+            return session_id
+        return ctx.run_id
+
+    @staticmethod
+    def _to_stream_input(payload: Dict[str, Any], client_msg) -> Dict[str, Any]:
+        # agent 项目的输入是对话消息；工作流项目直接以 payload 作为图输入
+        if graph_helper.is_agent_proj():
+            return to_stream_input(client_msg)
+        return payload
+
+    @staticmethod
+    def _stream_kwargs(run_config: RunnableConfig, ctx: Context) -> Dict[str, Any]:
+        # subgraphs=True 同时输出子图（Top-N 模式的单视频流水线）中的 token，去掉命名空间后与主图消息格式一致
+        # 工作流项目同时订阅 updates：各分支节点一完成即推送 node_update 事件，不必等待最慢的分支
+        stream_mode = "messages" if graph_helper.is_agent_proj() else ["messages", "updates"]
+        return dict(stream_mode=stream_mode, subgraphs=True, config=run_config, context=ctx)
+
+    @staticmethod
+    def _iter_stream_items(graph, stream_input: Dict[str, Any], run_config: RunnableConfig, ctx: Context) -> Iterable[Any]:
+        items = graph_helper.iter_graph_stream(graph, stream_input, **GraphService._stream_kwargs(run_config, ctx))
+        if graph_helper.is_agent_proj():
+            return (item for _, item in items)
+        return iter_workflow_stream_items(items)
+
+    @staticmethod
+    async def _aiter_stream_items(items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """_iter_stream_items 的异步版本，items 为 graph.astream(**_stream_kwargs(...)) 的输出"""
+        if graph_helper.is_agent_proj():
+            async for _, item in items:
+                yield item
+            return
+        async for item in aiter_workflow_stream_items(items):
+            yield item
+
+    @staticmethod
+    def _with_queue_wait(msg: Any) -> Any:
+        """HTTP 入口准入排队的时间写入 message_end"""
+        wait_ms = queue_wait_ms.get()
+        if wait_ms is not None and isinstance(msg, dict) and msg.get("type") == MESSAGE_TYPE_MESSAGE_END:
+            msg["content"]["message_end"]["queue_wait_ms"] = wait_ms
+        return msg
+
     @staticmethod
     def _sse_event(data: Any) -> str:
         return f"event: message\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
@@ -77,11 +170,11 @@ class GraphService:
     def stream(self, payload: Dict[str, Any], run_config: RunnableConfig, ctx=Context) -> Iterable[Any]:
         client_msg, session_id = to_client_message(payload)
         run_config["recursion_limit"] = 100
-        run_config["configurable"] = {"thread_id": session_id}
-        stream_input = to_stream_input(client_msg)
+        run_config["configurable"] = {"thread_id": self._thread_id(session_id, ctx)}
+        stream_input = self._to_stream_input(payload, client_msg)
         t0 = time.time()
         try:
-            items = self._get_graph(ctx).stream(stream_input, stream_mode="messages", config=run_config, context=ctx)
+            items = self._iter_stream_items(self._get_graph(ctx), stream_input, run_config, ctx)
             server_msgs_iter = agent_iter_server_messages(
                 items,
                 session_id=client_msg.session_id,
@@ -130,14 +223,11 @@ class GraphService:
         logger.info(f"Starting run with run_id: {run_id}")
 
         try:
-            graph = self._get_graph(ctx)
-            # custom tracer
-            run_config = init_run_config(graph, ctx)
-            run_config["configurable"] = {"thread_id": ctx.run_id}
-
-            # 直接调用，LangGraph会在当前任务上下文中执行
-            # 如果当前任务被取消，LangGraph的执行也会被取消
-            return await graph.ainvoke(payload, config=run_config, context=ctx)
+            with self.run_registry.track(run_id, "run"):
+                if self.run_coalescer is not None:
+                    # 相同 payload 的并发请求共享同一次图执行
+                    return await self.run_coalescer.run(payload, lambda: self._invoke(payload, ctx), run_id=run_id)
+                return await self._invoke(payload, ctx)
 
         except asyncio.CancelledError:
             logger.info(f"Run {run_id} was cancelled")
@@ -157,6 +247,48 @@ class GraphService:
             # 清理任务记录
             self.running_tasks.pop(run_id, None)
 
+    async def _invoke(self, payload: Optional[Dict[str, Any]], ctx: Context) -> Dict[str, Any]:
+        """payload 为 None 时从 thread_id=ctx.run_id 的最后一个 checkpoint 继续执行"""
+        graph = self._get_graph(ctx)
+        # custom tracer
+        run_config = init_run_config(graph, ctx)
+        run_config["configurable"] = {"thread_id": ctx.run_id}
+        # 节点内的 LLM 调用据此计算剩余时间
+        set_run_deadline(TIMEOUT_SECONDS)
+
+        # 直接调用，LangGraph会在当前任务上下文中执行
+        # 如果当前任务被取消，LangGraph的执行也会被取消
+        # durability="exit"：只在运行结束（含失败）时写 checkpoint，成功节点的输出仍会保存，恢复时不必重跑
+        try:
+            result = await graph.ainvoke(payload, config=run_config, context=ctx, durability="exit")
+        except BaseException:
+            await self.run_checkpoints.unfinished(ctx.run_id)
+            raise
+        await self.run_checkpoints.finished(ctx.run_id)
+        return result
+
+    # 恢复运行：从失败运行的最后一个 checkpoint 继续，只重跑失败或未完成的节点
+    async def resume(self, run_id: str, ctx=None) -> Dict[str, Any]:
+        if ctx is None:
+            ctx = new_context(method="resume")
+        # 沿用原运行的 run_id，checkpoint 以其为 thread_id
+        ctx.run_id = run_id
+        if not self.run_checkpoints.enabled:
+            raise KeyError("checkpointing is disabled, set RUN_CHECKPOINT_ENABLED=true")
+        if not await self.run_checkpoints.is_resumable(run_id):
+            raise KeyError(f"No resumable checkpoint found for run_id: {run_id}")
+        snapshot = await self.graph.aget_state({"configurable": {"thread_id": run_id}})
+        logger.info(f"Resuming run_id {run_id} at nodes: {list(snapshot.next)}")
+
+        try:
+            with self.run_registry.track(run_id, "resume"):
+                return await self._invoke(None, ctx)
+        except asyncio.CancelledError:
+            logger.info(f"Resumed run {run_id} was cancelled")
+            return {"status": "cancelled", "run_id": run_id, "message": "Execution was cancelled"}
+        finally:
+            self.running_tasks.pop(run_id, None)
+
     # 流式运行（SSE 格式化）：HTTP 路由使用
     async def stream_sse(self, payload: Dict[str, Any], ctx=None) -> AsyncGenerator[str, None]:
         if ctx is None:
@@ -171,8 +303,9 @@ class GraphService:
             run_config = init_run_config(graph, ctx)  # vibeflow
 
         try:
-            async for chunk in self.astream(payload, graph, run_config=run_config, ctx=ctx):
-                yield self._sse_event(chunk)
+            with self.run_registry.track(run_id, "stream"):
+                async for chunk in self.astream(payload, graph, run_config=run_config, ctx=ctx):
+                    yield self._sse_event(self._with_queue_wait(chunk))
         finally:
             # 清理任务记录
             self.running_tasks.pop(run_id, None)
@@ -216,26 +349,66 @@ class GraphService:
                 "message": "No active task found with this run_id. Task may have already completed or run_id is invalid."
             }
 
+    # 查询本进程登记的运行状态，未找到时返回 None
+    async def run_status(self, run_id: str) -> Optional[Dict[str, Any]]:
+        record = self.run_registry.get(run_id)
+        if record is None:
+            return None
+        status = record.to_dict()
+        status["resumable"] = await self.run_checkpoints.is_resumable(run_id)
+        return status
+
     # 运行指定节点：本地/HTTP 通用
     async def run_node(self, node_id: str, payload: Dict[str, Any], ctx=None) -> Any:
         if ctx is None or Context.run_id == "":
             ctx = new_context(method="node_run")
 
+        _graph = self._get_node_graph(node_id)
+        run_config = init_run_config(_graph, ctx)
+        # 登记运行，其他 worker 可据此转发 /artifacts 查询（视频任务模式）
+        with self.run_registry.track(ctx.run_id, "node_run"):
+            return await _graph.ainvoke(payload, config=run_config, context=ctx)
+
+    def _get_node_graph(self, node_id: str) -> CompiledStateGraph:
+        """取单节点图，首次调用时解析节点出入参并编译，之后复用"""
+        _graph = self._node_graphs.get(node_id)
+        if _graph is not None:
+            return _graph
+        with self._node_graphs_lock:
+            _graph = self._node_graphs.get(node_id)
+            if _graph is None:
+                _graph = self._node_graphs[node_id] = self._compile_node_graph(node_id)
+        return _graph
+
+    def _compile_node_graph(self, node_id: str) -> CompiledStateGraph:
+        assert self.graph is not None, "Graph is not initialized"
         node_func, input_cls, output_cls = graph_helper.get_graph_node_func_with_inout(self.graph.get_graph(), node_id)
         if node_func is None or input_cls is None:
             raise KeyError(f"node_id '{node_id}' not found")
-        assert self.graph is not None, "Graph is not initialized"
-        parser = LangGraphParser(self.graph)
-        metadata = parser.get_node_metadata(node_id) or {}
+        if self._graph_parser is None:
+            self._graph_parser = LangGraphParser(self.graph)
+        metadata = self._graph_parser.get_node_metadata(node_id) or {}
 
         _g = StateGraph(input_cls, input_schema=input_cls, output_schema=output_cls)
         _g.add_node("sn", node_func, metadata=metadata)
         _g.set_entry_point("sn")
         _g.add_edge("sn", END)
-        _graph = _g.compile()
+        logger.info(f"Compiled single-node graph for node_id: {node_id}")
+        return _g.compile()
 
-        run_config = init_run_config(_graph, ctx)
-        return await _graph.ainvoke(payload, config=run_config)
+    def precompile_node_graphs(self) -> int:
+        """预先编译全部节点的单节点图，返回编译成功的数量"""
+        if graph_helper.is_agent_proj():
+            return 0
+        compiled = 0
+        for _, node_func in graph_helper.iter_graph_node_funcs(self.graph.get_graph()):
+            try:
+                self._get_node_graph(node_func.__name__)
+                compiled += 1
+            except Exception as e:
+                # 出入参无法解析的节点不影响启动，调用时再报错
+                logger.warning(f"Failed to precompile single-node graph for {node_func.__name__}: {e}")
+        return compiled
 
     # 获取工作流的出入参Schema
     def graph_inout_schema(self) -> Any:
@@ -249,114 +422,288 @@ class GraphService:
     async def astream(self, payload: Dict[str, Any], graph: CompiledStateGraph, run_config: RunnableConfig, ctx=Context) -> AsyncIterable[Any]:
         client_msg, session_id = to_client_message(payload)
         run_config["recursion_limit"] = 100
-        run_config["configurable"] = {"thread_id": session_id}
-        stream_input = to_stream_input(client_msg)
-
-        # 使用后台线程拉取同步流，并通过事件循环安全地推送到异步队列
-        loop = asyncio.get_running_loop()
-        q: asyncio.Queue = asyncio.Queue()
-        context = contextvars.copy_context()
+        run_config["configurable"] = {"thread_id": self._thread_id(session_id, ctx)}
+        stream_input = self._to_stream_input(payload, client_msg)
+        set_run_deadline(TIMEOUT_SECONDS)
         start_time = time.time()
-        # 取消标志，用于通知 producer 线程停止
-        cancelled = threading.Event()
-
-        def producer():
-            last_seq = 0
-            try:
-                # 在开始前检查是否已取消
-                if cancelled.is_set():
-                    logger.info(f"Producer cancelled before start for run_id: {ctx.run_id}")
-                    return
-
-                items = graph.stream(stream_input, stream_mode="messages", config=run_config, context=ctx)
-                server_msgs_iter = agent_iter_server_messages(
-                    items,
-                    session_id=client_msg.session_id,
-                    query_msg_id=client_msg.local_msg_id,
-                    local_msg_id=client_msg.local_msg_id,
-                    run_id=ctx.run_id,
-                    log_id=ctx.logid,
-                )
-                for sm in server_msgs_iter:
-                    # 检查是否已取消
+        # 生产者与 SSE 响应之间的有界缓冲区：客户端读得慢时按 STREAM_BUFFER_POLICY 等待、合并增量或断开
+        with get_stream_buffers().open(ctx.run_id, coalescer=ServerMessageCoalescer()) as buffer:
+            if STREAM_NATIVE_ASYNC:
+                # 客户端读得慢时节点内的 LLM token 输出随之暂停，LangGraph 内部的流队列不再增长
+                backpressure = StreamBackpressureHandler(buffer)
+                run_config["callbacks"] = [*run_config.get("callbacks", []), backpressure]
+                items = self._astream_native(graph, stream_input, run_config, client_msg, ctx, backpressure)
+
+                async def pump():
+                    try:
+                        async for item in items:
+                            if not await buffer.put(item):
+                                break
+                    finally:
+                        await items.aclose()
+                        buffer.close()
+
+                pump_task = None
+                try:
+                    # message_start 直接发出，不必等后台任务被调度（并发启动时图的初始化会排在前面）
+                    async for item in items:
+                        yield item
+                        break
+                    pump_task = asyncio.create_task(pump())
+                    async for item in self._iter_buffer(buffer, client_msg, ctx, start_time):
+                        yield item
+                finally:
+                    # 消费者离开（取消、断开）时取消仍在执行的图
+                    if pump_task is None:
+                        await items.aclose()
+                    else:
+                        pump_task.cancel()
+                        with contextlib.suppress(asyncio.CancelledError):
+                            await pump_task
+                return
+
+            # 使用后台线程拉取同步流，并通过事件循环安全地推送到缓冲区
+            context = contextvars.copy_context()
+            # 取消标志，用于通知 producer 线程停止
+            cancelled = threading.Event()
+            # checkpoint 的保留与删除在事件循环上执行（Postgres checkpointer 绑定该事件循环）
+            loop = asyncio.get_running_loop()
+
+            def producer():
+                last_seq = 0
+                completed = False
+                try:
+                    # 在开始前检查是否已取消
                     if cancelled.is_set():
-                        logger.info(f"Producer cancelled during iteration for run_id: {ctx.run_id}")
-                        # 发送取消结束消息
-                        cancel_msg = create_message_end_dict(
-                            code=MESSAGE_END_CODE_CANCELED,
-                            message="Stream cancelled by upstream",
-                            session_id=client_msg.session_id,
-                            query_msg_id=client_msg.local_msg_id,
-                            log_id=ctx.logid,
-                            time_cost_ms=int((time.time() - start_time) * 1000),
-                            reply_id=getattr(sm, 'reply_id', ''),
-                            sequence_id=last_seq + 1,
-                        )
-                        loop.call_soon_threadsafe(q.put_nowait, cancel_msg)
+                        logger.info(f"Producer cancelled before start for run_id: {ctx.run_id}")
                         return
 
-                    # 主动检查执行时间，及时中断
-                    if time.time() - start_time > TIMEOUT_SECONDS:
-                        logger.error(f"Agent execution timeout after {TIMEOUT_SECONDS}s for run_id: {ctx.run_id}")
-                        timeout_msg = create_message_end_dict(
-                            code="TIMEOUT",
-                            message=f"Execution timeout: exceeded {TIMEOUT_SECONDS} seconds",
-                            session_id=client_msg.session_id,
-                            query_msg_id=client_msg.local_msg_id,
-                            log_id=ctx.logid,
-                            time_cost_ms=int((time.time() - start_time) * 1000),
-                            reply_id=getattr(sm, 'reply_id', ''),
-                            sequence_id=last_seq + 1,
-                        )
-                        loop.call_soon_threadsafe(q.put_nowait, timeout_msg)
+                    items = self._iter_stream_items(graph, stream_input, run_config, ctx)
+                    server_msgs_iter = agent_iter_server_messages(
+                        items,
+                        session_id=client_msg.session_id,
+                        query_msg_id=client_msg.local_msg_id,
+                        local_msg_id=client_msg.local_msg_id,
+                        run_id=ctx.run_id,
+                        log_id=ctx.logid,
+                    )
+                    for sm in server_msgs_iter:
+                        # 检查是否已取消
+                        if cancelled.is_set():
+                            logger.info(f"Producer cancelled during iteration for run_id: {ctx.run_id}")
+                            # 发送取消结束消息
+                            cancel_msg = create_message_end_dict(
+                                code=MESSAGE_END_CODE_CANCELED,
+                                message="Stream cancelled by upstream",
+                                session_id=client_msg.session_id,
+                                query_msg_id=client_msg.local_msg_id,
+                                log_id=ctx.logid,
+                                time_cost_ms=int((time.time() - start_time) * 1000),
+                                reply_id=getattr(sm, 'reply_id', ''),
+                                sequence_id=last_seq + 1,
+                            )
+                            buffer.put_threadsafe(cancel_msg)
+                            return
+
+                        # 主动检查执行时间，及时中断
+                        if time.time() - start_time > TIMEOUT_SECONDS:
+                            logger.error(f"Agent execution timeout after {TIMEOUT_SECONDS}s for run_id: {ctx.run_id}")
+                            timeout_msg = create_message_end_dict(
+                                code="TIMEOUT",
+                                message=f"Execution timeout: exceeded {TIMEOUT_SECONDS} seconds",
+                                session_id=client_msg.session_id,
+                                query_msg_id=client_msg.local_msg_id,
+                                log_id=ctx.logid,
+                                time_cost_ms=int((time.time() - start_time) * 1000),
+                                reply_id=getattr(sm, 'reply_id', ''),
+                                sequence_id=last_seq + 1,
+                            )
+                            buffer.put_threadsafe(timeout_msg)
+                            return
+                        # 缓冲区已断开（客户端过慢或已离开）时停止
+                        if not buffer.put_threadsafe(sm.dict()):
+                            logger.info(f"Producer stopped, stream buffer closed for run_id: {ctx.run_id}")
+                            return
+                        last_seq = sm.sequence_id
+                    completed = True
+                except Exception as ex:
+                    # 如果已取消，不再发送错误消息
+                    if cancelled.is_set():
+                        logger.info(f"Producer exception after cancel for run_id: {ctx.run_id}, ignoring: {ex}")
                         return
-                    loop.call_soon_threadsafe(q.put_nowait, sm.dict())
-                    last_seq = sm.sequence_id
-            except Exception as ex:
-                # 如果已取消，不再发送错误消息
-                if cancelled.is_set():
-                    logger.info(f"Producer exception after cancel for run_id: {ctx.run_id}, ignoring: {ex}")
-                    return
-                # 使用错误分类器获取错误码
-                err = classify_error(ex, {"node_name": "astream"})
-                end_msg = create_message_end_dict(
-                    code=str(err.code),
-                    message=err.message,
-                    session_id=client_msg.session_id,
-                    query_msg_id=client_msg.local_msg_id,
-                    log_id=ctx.logid,
-                    time_cost_ms=int((time.time() - start_time) * 1000),
-                    reply_id="",
-                    sequence_id=last_seq + 1,
-                )
-                loop.call_soon_threadsafe(q.put_nowait, end_msg)
-            finally:
-                loop.call_soon_threadsafe(q.put_nowait, None)
-
-        threading.Thread(target=lambda: context.run(producer), daemon=True).start()
+                    # 使用错误分类器获取错误码
+                    err = classify_error(ex, {"node_name": "astream"})
+                    end_msg = create_message_end_dict(
+                        code=str(err.code),
+                        message=err.message,
+                        session_id=client_msg.session_id,
+                        query_msg_id=client_msg.local_msg_id,
+                        log_id=ctx.logid,
+                        time_cost_ms=int((time.time() - start_time) * 1000),
+                        reply_id="",
+                        sequence_id=last_seq + 1,
+                    )
+                    buffer.put_threadsafe(end_msg)
+                finally:
+                    done = self.run_checkpoints.finished if completed else self.run_checkpoints.unfinished
+                    try:
+                        asyncio.run_coroutine_threadsafe(done(ctx.run_id), loop).result()
+                    except Exception as e:
+                        logger.warning(f"Failed to update checkpoint for run_id {ctx.run_id}: {e}")
+                    buffer.close_threadsafe()
+
+            threading.Thread(target=lambda: context.run(producer), daemon=True).start()
 
+            try:
+                async for item in self._iter_buffer(buffer, client_msg, ctx, start_time):
+                    yield item
+            except asyncio.CancelledError:
+                logger.info(f"Stream cancelled for run_id: {ctx.run_id}, signaling producer to stop")
+                # 设置取消标志，通知 producer 线程停止
+                cancelled.set()
+                raise
+
+    async def _iter_buffer(self, buffer: StreamBuffer, client_msg, ctx: Context, start_time: float) -> AsyncIterable[Any]:
+        """按序读出缓冲区中的消息；客户端过慢被断开时以 message_end 结束"""
+        last_seq = 0
         try:
-            while True:
-                item = await q.get()
-                if item is None:
-                    break
+            async for item in buffer:
+                last_seq = item.get("sequence_id", last_seq)
                 yield item
+        except SlowConsumerError as e:
+            logger.warning(f"Slow consumer disconnected for run_id: {ctx.run_id}: {e}")
+            yield create_message_end_dict(
+                code=MESSAGE_END_CODE_SLOW_CONSUMER,
+                message=str(e),
+                session_id=client_msg.session_id,
+                query_msg_id=client_msg.local_msg_id,
+                log_id=ctx.logid,
+                time_cost_ms=int((time.time() - start_time) * 1000),
+                sequence_id=last_seq + 1,
+            )
+
+    async def _astream_native(self, graph: CompiledStateGraph, stream_input: Dict[str, Any], run_config: RunnableConfig,
+                              client_msg, ctx: Context,
+                              backpressure: Optional[StreamBackpressureHandler] = None) -> AsyncIterable[Any]:
+        """
+        在当前事件循环上直接消费 graph.astream，不为每个请求创建线程
+
+        消息编号、超时与取消的结束消息与线程方式一致；取消时 CancelledError 直接传入正在执行的节点，
+        不必等到下一条消息。
+        """
+        start_time = time.time()
+        last_seq = 0
+        completed = False
+        graph_items = graph.astream(stream_input, **self._stream_kwargs(run_config, ctx))
+        server_msgs = agent_aiter_server_messages(
+            self._aiter_stream_items(backpressure.track(graph_items) if backpressure is not None else graph_items),
+            session_id=client_msg.session_id,
+            query_msg_id=client_msg.local_msg_id,
+            local_msg_id=client_msg.local_msg_id,
+            run_id=ctx.run_id,
+            log_id=ctx.logid,
+        )
+        try:
+            async for sm in server_msgs:
+                # 主动检查执行时间，及时中断
+                if time.time() - start_time > TIMEOUT_SECONDS:
+                    logger.error(f"Agent execution timeout after {TIMEOUT_SECONDS}s for run_id: {ctx.run_id}")
+                    yield create_message_end_dict(
+                        code="TIMEOUT",
+                        message=f"Execution timeout: exceeded {TIMEOUT_SECONDS} seconds",
+                        session_id=client_msg.session_id,
+                        query_msg_id=client_msg.local_msg_id,
+                        log_id=ctx.logid,
+                        time_cost_ms=int((time.time() - start_time) * 1000),
+                        reply_id=getattr(sm, 'reply_id', ''),
+                        sequence_id=last_seq + 1,
+                    )
+                    return
+                yield sm.dict()
+                last_seq = sm.sequence_id
+            completed = True
         except asyncio.CancelledError:
-            logger.info(f"Stream cancelled for run_id: {ctx.run_id}, signaling producer to stop")
-            # 设置取消标志，通知 producer 线程停止
-            cancelled.set()
+            logger.info(f"Stream cancelled for run_id: {ctx.run_id}")
             raise
+        except Exception as ex:
+            err = classify_error(ex, {"node_name": "astream"})
+            yield create_message_end_dict(
+                code=str(err.code),
+                message=err.message,
+                session_id=client_msg.session_id,
+                query_msg_id=client_msg.local_msg_id,
+                log_id=ctx.logid,
+                time_cost_ms=int((time.time() - start_time) * 1000),
+                reply_id="",
+                sequence_id=last_seq + 1,
+            )
+        finally:
+            # 提前结束（超时、取消、客户端断开）时关闭图的流，取消仍在执行的节点
+            await server_msgs.aclose()
+            await graph_items.aclose()
+            if completed:
+                await self.run_checkpoints.finished(ctx.run_id)
+            else:
+                await self.run_checkpoints.unfinished(ctx.run_id)
 
 
 service = GraphService()
-app = FastAPI()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_: FastAPI):
+    # 在服务的事件循环上挂载持久化 checkpointer（配置了数据库时），不可用时保留进程内 MemorySaver
+    await service.run_checkpoints.open()
+    # 多 worker 时监听控制 socket，接收其他 worker 转发来的取消、状态查询与恢复请求
+    if RUN_REGISTRY_ENABLED:
+        service.run_registry.register_handler("cancel", _registry_cancel)
+        service.run_registry.register_handler("status", _registry_status)
+        service.run_registry.register_handler("resume", _registry_resume)
+        service.run_registry.register_handler("artifacts", _registry_artifacts)
+        await service.run_registry.serve()
+    if NODE_GRAPH_PRECOMPILE:
+        t0 = time.perf_counter()
+        compiled = await asyncio.to_thread(service.precompile_node_graphs)
+        logger.info(f"Precompiled {compiled} single-node graphs in {time.perf_counter() - t0:.2f}s")
+    try:
+        yield
+    finally:
+        await service.run_registry.aclose()
+        await service.run_checkpoints.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # OpenAI 兼容接口处理器
 openai_handler = OpenAIChatHandler(service)
 
 
+class AdmittedStreamingResponse(StreamingResponse):
+    """流式响应：发送结束（含客户端断开、取消）后归还准入名额"""
+
+    def __init__(self, content: Any, ticket: AdmissionTicket, **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self.ticket = ticket
+        self.headers[QUEUE_WAIT_HEADER] = str(ticket.wait_ms)
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.ticket.release()
+
+
+async def _admit(endpoint: str, request: Request) -> AdmissionTicket:
+    """按入口获取执行名额，名额已满时按优先级请求头排队；队列已满返回 429，排队超时返回 503"""
+    try:
+        return await get_admission_controller().acquire(endpoint, parse_priority(request.headers))
+    except AdmissionRejected as e:
+        logger.warning(f"Rejected {endpoint} request: {e}, retry after {e.retry_after}s")
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
 @app.post("/run")
-async def http_run(request: Request) -> Dict[str, Any]:
+async def http_run(request: Request, response: Response) -> Dict[str, Any]:
     global result
     raw_body = await request.body()
     try:
@@ -369,6 +716,7 @@ async def http_run(request: Request) -> Dict[str, Any]:
     ctx = new_context(method="run", headers=request.headers)
     run_id = ctx.run_id
     request_context.set(ctx)
+    set_node_cache_mode(request.headers)
 
     logger.info(
         f"Received request for /run: "
@@ -377,6 +725,8 @@ async def http_run(request: Request) -> Dict[str, Any]:
         f"body={body_text}"
     )
 
+    ticket = await _admit("run", request)
+    response.headers[QUEUE_WAIT_HEADER] = str(ticket.wait_ms)
     try:
         payload = await request.json()
 
@@ -429,6 +779,7 @@ async def http_run(request: Request) -> Dict[str, Any]:
             }
         )
     finally:
+        ticket.release()
         cozeloop.flush()
 
 
@@ -436,6 +787,7 @@ async def http_run(request: Request) -> Dict[str, Any]:
 async def http_stream_run(request: Request):
     ctx = new_context(method="stream_run", headers=request.headers)
     request_context.set(ctx)
+    set_node_cache_mode(request.headers)
     raw_body = await request.body()
     try:
         body_text = raw_body.decode("utf-8")
@@ -458,6 +810,8 @@ async def http_stream_run(request: Request):
         logger.error(f"JSON decode error in http_stream_run: {e}, traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=400, detail=f"Invalid JSON format:{extract_core_stack()}")
 
+    ticket = await _admit("stream_run", request)
+
     # 包装stream_sse为可取消的任务
     async def cancellable_stream():
         # 将真正的流式任务登记到 running_tasks，确保 /cancel 能定位到它
@@ -484,7 +838,7 @@ async def http_stream_run(request: Request):
                 reply_id="",
                 sequence_id=1,
             )
-            yield service._sse_event(end_msg)
+            yield service._sse_event(service._with_queue_wait(end_msg))
             raise
         except Exception as ex:
             # 使用错误分类器获取错误码
@@ -505,10 +859,34 @@ async def http_stream_run(request: Request):
             )
             yield service._sse_event(error_msg)
 
-    # 注意：StreamingResponse会在后台运行generator
-    response = StreamingResponse(cancellable_stream(), media_type="text/event-stream")
+    # 注意：StreamingResponse会在后台运行generator，名额在响应发送结束后归还
+    response = AdmittedStreamingResponse(cancellable_stream(), ticket, media_type="text/event-stream")
     return response
 
+@app.post("/batch_run")
+async def http_batch_run(request: Request):
+    """
+    批量运行：请求体为 JSON 数组、{"items": [...], "concurrency": N} 或 JSONL，
+    结果按完成顺序以 NDJSON 流式返回，每行一个条目
+    """
+    raw_body = await request.body()
+    try:
+        payloads, concurrency = parse_batch_input(raw_body.decode("utf-8"))
+        concurrency = int(request.query_params.get("concurrency") or concurrency or BATCH_RUN_CONCURRENCY)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch input: {e}")
+
+    logger.info(f"Received request for /batch_run: items={len(payloads)}, concurrency={concurrency}")
+    set_node_cache_mode(request.headers)
+    runner = BatchRunner(service, concurrency=concurrency, item_timeout=float(TIMEOUT_SECONDS))
+
+    async def ndjson_stream():
+        async for item in runner.run(payloads):
+            yield json.dumps(item, ensure_ascii=False, default=str) + "\n"
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+
 @app.post("/cancel/{run_id}")
 async def http_cancel(run_id: str, request: Request):
     """
@@ -521,9 +899,110 @@ async def http_cancel(run_id: str, request: Request):
     request_context.set(ctx)
     logger.info(f"Received cancel request for run_id: {run_id}")
     result = service.cancel_run(run_id, ctx)
+    if result["status"] == "not_found" and service.run_registry.serving:
+        # 运行不在本进程：转发给归属 worker
+        forwarded = await service.run_registry.forward(run_id, "cancel")
+        if forwarded is not None:
+            return forwarded
     return result
 
 
+@app.get("/runs/{run_id}")
+async def http_run_status(run_id: str):
+    """查询运行状态：running / succeeded / failed / cancelled，以及所在 worker 与是否可恢复"""
+    status = await service.run_status(run_id)
+    if status is None and service.run_registry.serving:
+        status = await service.run_registry.forward(run_id, "status")
+    if not status:
+        raise HTTPException(status_code=404, detail=f"No run found for run_id: {run_id}")
+    return status
+
+
+async def _registry_cancel(message: Dict[str, Any]) -> Dict[str, Any]:
+    return service.cancel_run(message["run_id"])
+
+
+async def _registry_status(message: Dict[str, Any]) -> Dict[str, Any]:
+    return await service.run_status(message["run_id"]) or {}
+
+
+async def _registry_resume(message: Dict[str, Any]) -> Dict[str, Any]:
+    # 在归属 worker 上执行恢复，HTTP 错误以 status_code / detail 返回给转发方
+    ctx = new_context(method="resume")
+    request_context.set(ctx)
+    set_node_cache_mode({NODE_CACHE_HEADER: message.get("node_cache_mode") or ""})
+    try:
+        return {"result": await _resume(message["run_id"], ctx)}
+    except HTTPException as e:
+        return {"status_code": e.status_code, "detail": e.detail}
+
+
+async def _registry_artifacts(message: Dict[str, Any]) -> Dict[str, Any]:
+    return _run_artifacts(message["run_id"], message.get("task_id")) or {}
+
+
+@app.post("/resume/{run_id}")
+async def http_resume(run_id: str, request: Request):
+    """
+    恢复失败、取消或超时的运行
+
+    从 run_id 的最后一个 checkpoint 继续：已完成节点（热点捕获、成功的分支）的输出直接复用，
+    只重跑失败或未完成的节点，返回值与 /run 相同
+    """
+    ctx = new_context(method="resume", headers=request.headers)
+    request_context.set(ctx)
+    set_node_cache_mode(request.headers)
+    logger.info(f"Received resume request for run_id: {run_id}")
+
+    if (service.run_registry.serving and not service.run_checkpoints.persistent
+            and not await service.run_checkpoints.is_resumable(run_id)):
+        # checkpoint 保存在归属 worker 的 MemorySaver 中：转发过去执行
+        forwarded = await service.run_registry.forward(
+            run_id, "resume", timeout=float(TIMEOUT_SECONDS) + 30,
+            node_cache_mode=request.headers.get(NODE_CACHE_HEADER),
+        )
+        if forwarded is not None and "result" in forwarded:
+            return forwarded["result"]
+        if forwarded is not None and "status_code" in forwarded:
+            raise HTTPException(status_code=forwarded["status_code"], detail=forwarded["detail"])
+    return await _resume(run_id, ctx)
+
+
+async def _resume(run_id: str, ctx: Context) -> Dict[str, Any]:
+    task = asyncio.create_task(service.resume(run_id, ctx))
+    service.running_tasks[run_id] = task
+    try:
+        result = await asyncio.wait_for(task, timeout=float(TIMEOUT_SECONDS))
+        if isinstance(result, dict):
+            result["run_id"] = run_id
+        return result
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0] if e.args else str(e))
+    except asyncio.TimeoutError:
+        logger.error(f"Resume execution timeout after {TIMEOUT_SECONDS}s for run_id: {run_id}")
+        return {
+            "status": "timeout",
+            "run_id": run_id,
+            "message": f"Execution timeout: exceeded {TIMEOUT_SECONDS} seconds"
+        }
+    except Exception as e:
+        error_response = service.error_classifier.get_error_response(e, {"node_name": "http_resume", "run_id": run_id})
+        logger.error(
+            f"Unexpected error in http_resume: [{error_response['error_code']}] {error_response['error_message']}, "
+            f"traceback: {traceback.format_exc()}", exc_info=True
+        )
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error_code": error_response["error_code"],
+                "error_message": error_response["error_message"],
+                "stack_trace": extract_core_stack(),
+            }
+        )
+    finally:
+        cozeloop.flush()
+
+
 @app.post(path="/node_run/{node_id}")
 async def http_node_run(node_id: str, request: Request):
     raw_body = await request.body()
@@ -534,6 +1013,7 @@ async def http_node_run(node_id: str, request: Request):
         raise HTTPException(status_code=400, detail=f"Invalid JSON format: {body_text}")
     ctx = new_context(method="node_run", headers=request.headers)
     request_context.set(ctx)
+    set_node_cache_mode(request.headers)
     logger.info(
         f"Received request for /node_run/{node_id}: "
         f"query={dict(request.query_params)}, "
@@ -574,16 +1054,33 @@ async def openai_chat_completions(request: Request):
     """OpenAI Chat Completions API 兼容接口"""
     ctx = new_context(method="openai_chat", headers=request.headers)
     request_context.set(ctx)
+    set_node_cache_mode(request.headers)
 
     logger.info(f"Received request for /v1/chat/completions: run_id={ctx.run_id}")
 
+    ticket = await _admit("openai_chat", request)
+    streaming = False
     try:
         payload = await request.json()
-        return await openai_handler.handle(payload, ctx)
+        response = await openai_handler.handle(payload, ctx)
+        if isinstance(response, StreamingResponse):
+            streaming = True
+            return AdmittedStreamingResponse(
+                response.body_iterator,
+                ticket,
+                status_code=response.status_code,
+                headers=dict(response.headers),
+                background=response.background,
+            )
+        response.headers[QUEUE_WAIT_HEADER] = str(ticket.wait_ms)
+        return response
     except json.JSONDecodeError as e:
         logger.error(f"JSON decode error in openai_chat_completions: {e}")
         raise HTTPException(status_code=400, detail="Invalid JSON format")
     finally:
+        # 流式响应的名额在发送结束后归还
+        if not streaming:
+            ticket.release()
         cozeloop.flush()
 
 
@@ -599,16 +1096,78 @@ async def health_check():
         raise HTTPException(status_code=503, detail=str(e))
 
 
+@app.get("/stats")
+async def http_stats():
+    """
+    集成服务客户端、共享 HTTP 连接池、跨 worker 运行登记、运行 checkpoint、运行合并、流式缓冲区与准入控制的统计
+
+    统计均为处理本次请求的 worker 进程内的数据，多 worker 部署时以 worker 字段区分
+    """
+    return {
+        "worker": {"pid": os.getpid(), "workers": HTTP_WORKERS},
+        "clients": get_client_provider().stats(),
+        "http_pool": get_http_pool().stats(),
+        "run_registry": service.run_registry.stats(),
+        "run_checkpoints": service.run_checkpoints.stats(),
+        "run_coalescer": service.run_coalescer.stats() if service.run_coalescer is not None else None,
+        "stream_buffers": get_stream_buffers().stats(),
+        "admission": get_admission_controller().stats(),
+    }
+
+
+@app.get("/artifacts/{run_id}")
+async def http_artifacts(run_id: str):
+    """查询运行的异步产物（视频任务模式下的全部短视频），视频任务在其他 worker 上时转发过去查询"""
+    artifacts = _run_artifacts(run_id)
+    if artifacts is None and service.run_registry.serving:
+        artifacts = await service.run_registry.forward(run_id, "artifacts")
+    if not artifacts:
+        raise HTTPException(status_code=404, detail=f"No artifacts found for run_id: {run_id}")
+    return artifacts
+
+
+@app.get("/artifacts/{run_id}/{task_id}")
+async def http_video_artifact(run_id: str, task_id: str):
+    """查询运行中单个视频任务的产物，即 result_summary 给出的短视频占位地址"""
+    artifacts = _run_artifacts(run_id, task_id)
+    if artifacts is None and service.run_registry.serving:
+        artifacts = await service.run_registry.forward(run_id, "artifacts", task_id=task_id)
+    if not artifacts:
+        raise HTTPException(status_code=404, detail=f"No artifacts found for run_id: {run_id}, task_id: {task_id}")
+    return artifacts
+
+
+def _run_artifacts(run_id: str, task_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """本进程登记的视频任务，指定 task_id 时只返回该任务，未找到时返回 None"""
+    registry = get_video_job_registry()
+    if task_id:
+        job = registry.get(run_id, task_id)
+        if job is None:
+            return None
+        return {
+            "run_id": run_id,
+            "short_video": job.to_dict(),
+        }
+    jobs = registry.list(run_id)
+    if not jobs:
+        return None
+    return {
+        "run_id": run_id,
+        "short_videos": [job.to_dict() for job in jobs],
+    }
+
+
 @app.get(path="/graph_parameter")
 async def http_graph_inout_parameter(request: Request):
     return service.graph_inout_schema()
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Start FastAPI server")
-    parser.add_argument("-m", type=str, default="http", help="Run mode, support http,flow,node")
+    parser.add_argument("-m", type=str, default="http", help="Run mode, support http,flow,node,batch")
     parser.add_argument("-n", type=str, default="", help="Node ID for single node run")
     parser.add_argument("-p", type=int, default=5000, help="HTTP server port")
-    parser.add_argument("-i", type=str, default="", help="Input JSON string for flow/node mode")
+    parser.add_argument("-i", type=str, default="", help="Input JSON string for flow/node mode, JSON list or JSONL file path for batch mode")
+    parser.add_argument("-c", type=int, default=BATCH_RUN_CONCURRENCY, help="Concurrency for batch mode")
     return parser.parse_args()
 
 
@@ -625,10 +1184,12 @@ def parse_input(input_str: str) -> Dict[str, Any]:
         return {"text": input_str}
 
 def start_http_server(port):
-    workers = 1
+    workers = HTTP_WORKERS
     reload = False
     if graph_helper.is_dev_env():
+        # 热重载只支持单进程
         reload = True
+        workers = 1
 
     logger.info(f"Start HTTP Server, Port: {port}, Workers: {workers}")
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=reload, workers=workers)
@@ -641,6 +1202,18 @@ if __name__ == "__main__":
         payload = parse_input(args.i)
         result = asyncio.run(service.run(payload))
         print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.m == "batch":
+        batch_input = args.i
+        if os.path.isfile(batch_input):
+            with open(batch_input, "r", encoding="utf-8") as f:
+                batch_input = f.read()
+        payloads, _ = parse_batch_input(batch_input)
+
+        async def run_batch():
+            async for item in BatchRunner(service, concurrency=args.c, item_timeout=float(TIMEOUT_SECONDS)).run(payloads):
+                print(json.dumps(item, ensure_ascii=False, default=str), flush=True)
+
+        asyncio.run(run_batch())
     elif args.m == "node" and args.n:
         payload = parse_input(args.i)
         result = asyncio.run(service.run_node(args.n, payload))
@@ -5,4 +5,18 @@ import datetime
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 class Base(DeclarativeBase):
-    pass
\ No newline at end of file
+    pass
+
+
+class CacheEntry(Base):
+    __tablename__ = 'cache_entry'
+    __table_args__ = (
+        PrimaryKeyConstraint('namespace', 'cache_key', name='cache_entry_pkey'),
+        Index('ix_cache_entry_expires_at', 'expires_at'),
+    )
+
+    namespace: Mapped[str] = mapped_column(Text)
+    cache_key: Mapped[str] = mapped_column(Text)
+    value: Mapped[dict] = mapped_column(JSON)
+    expires_at: Mapped[datetime.datetime] = mapped_column(DateTime(True))
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime(True), server_default=text('now()'))
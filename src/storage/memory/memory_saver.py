@@ -1,4 +1,6 @@
+import asyncio
 import psycopg
+from psycopg.rows import dict_row
 from psycopg_pool import AsyncConnectionPool
 from langgraph.checkpoint.postgres import PostgresSaver
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
@@ -81,6 +83,51 @@ class MemoryManager:
             logger.warning(f"Failed to get db_url: {e}, will fallback to MemorySaver")
             return None
 
+    @staticmethod
+    def _with_search_path(db_url: str) -> str:
+        if "?" in db_url:
+            return f"{db_url}&options=-csearch_path%3Dmemory"
+        return f"{db_url}?options=-csearch_path%3Dmemory"
+
+    async def acreate_postgres_checkpointer(self) -> Optional[AsyncPostgresSaver]:
+        """
+        在当前事件循环上创建 AsyncPostgresSaver，数据库不可用时返回 None
+
+        AsyncPostgresSaver 与连接池绑定创建时的事件循环，需在服务的事件循环上（如 FastAPI lifespan）调用，
+        不能在模块导入时创建。连接与建表放到线程中执行，不阻塞事件循环。
+        """
+        db_url = await asyncio.to_thread(self._get_db_url_safe)
+        if not db_url:
+            return None
+        if not await asyncio.to_thread(self._setup_schema_and_tables, db_url):
+            return None
+
+        pool = AsyncConnectionPool(
+            conninfo=self._with_search_path(db_url),
+            timeout=DB_CONNECTION_TIMEOUT,
+            min_size=1,
+            max_idle=300,
+            open=False,
+            # AsyncPostgresSaver 要求的连接参数
+            kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        )
+        try:
+            await pool.open(wait=True, timeout=DB_CONNECTION_TIMEOUT)
+            checkpointer = AsyncPostgresSaver(pool)
+        except Exception as e:
+            logger.warning(f"Failed to create AsyncPostgresSaver: {e}")
+            await pool.close()
+            return None
+        self._pool = pool
+        logger.info("AsyncPostgresSaver initialized successfully")
+        return checkpointer
+
+    async def aclose(self) -> None:
+        """关闭 acreate_postgres_checkpointer 打开的连接池"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
     def _create_fallback_checkpointer(self) -> MemorySaver:
         """创建内存兜底 checkpointer"""
         self._checkpointer = MemorySaver()
@@ -102,10 +149,7 @@ class MemoryManager:
             return self._create_fallback_checkpointer()
 
         # 3. 连接字符串加上 search_path
-        if "?" in db_url:
-            db_url = f"{db_url}&options=-csearch_path%3Dmemory"
-        else:
-            db_url = f"{db_url}?options=-csearch_path%3Dmemory"
+        db_url = self._with_search_path(db_url)
 
         # 4. 尝试创建连接池和 checkpointer
         try:
@@ -126,9 +170,13 @@ class MemoryManager:
 _memory_manager: Optional[MemoryManager] = None
 
 
-def get_memory_saver() -> BaseCheckpointSaver:
-    """获取 checkpointer，优先使用 PostgresSaver，db_url 不可用或连接失败时退化为 MemorySaver"""
+def get_memory_manager() -> MemoryManager:
     global _memory_manager
     if _memory_manager is None:
         _memory_manager = MemoryManager()
-    return _memory_manager.get_checkpointer()
\ No newline at end of file
+    return _memory_manager
+
+
+def get_memory_saver() -> BaseCheckpointSaver:
+    """获取 checkpointer，优先使用 PostgresSaver，db_url 不可用或连接失败时退化为 MemorySaver"""
+    return get_memory_manager().get_checkpointer()
\ No newline at end of file
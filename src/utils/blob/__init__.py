@@ -0,0 +1,31 @@
+"""大文本按引用传递"""
+
+from utils.blob.store import (
+    BLOB_REF_MIN_CHARS,
+    BlobStore,
+    amaterialize_refs,
+    aresolve_text,
+    blob_content_id,
+    canonical_refs,
+    get_blob_store,
+    is_blob_ref,
+    require_durable_refs,
+    resolve_text,
+    restore_refs,
+    store_text,
+)
+
+__all__ = [
+    "BLOB_REF_MIN_CHARS",
+    "BlobStore",
+    "amaterialize_refs",
+    "aresolve_text",
+    "blob_content_id",
+    "canonical_refs",
+    "get_blob_store",
+    "is_blob_ref",
+    "require_durable_refs",
+    "resolve_text",
+    "restore_refs",
+    "store_text",
+]
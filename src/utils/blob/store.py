@@ -0,0 +1,265 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 状态中的文本字段达到该字符数时按引用传递，0 表示关闭
+BLOB_REF_MIN_CHARS = int(os.getenv("BLOB_REF_MIN_CHARS", "4096"))
+# 引用内容的存储位置：memory（进程内）、s3（对象存储，多实例部署或进程重启后恢复运行时使用）
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "memory")
+# 进程内保留时间（秒），需长于单次运行的超时时间；每次读写都会续期
+BLOB_MEMORY_TTL = float(os.getenv("BLOB_MEMORY_TTL", "7200"))
+# s3 后端的对象 key 前缀
+BLOB_S3_PREFIX = os.getenv("BLOB_S3_PREFIX", "blobs")
+
+BLOB_REF_SCHEME = "blob://"
+# 节点缓存中记录哪些字段原本是引用
+BLOB_FIELDS_KEY = "__blob_fields__"
+
+
+# 引用是否需要在其他进程中可读（持久化 checkpoint 开启时由 require_durable_refs 设置）
+_durable_refs_required = False
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_REF_SCHEME)
+
+
+def blob_content_id(ref: str) -> str:
+    """引用对应内容的 sha256，同一文本在不同后端、不同实例上的引用取值相同"""
+    return ref[len(BLOB_REF_SCHEME):].split("/", 1)[0]
+
+
+class BlobStore:
+    """
+    按内容寻址的文本存储
+
+    引用形如 blob://<sha256>（memory）或 blob://<sha256>/<对象 key>（s3），
+    图状态、checkpoint、节点日志中只保留引用，节点需要原文时再按引用读取。
+    s3 后端在本进程内同样保留一份副本，同一进程内的读取不访问对象存储。
+    """
+
+    def __init__(self, backend: str = "memory", storage=None, ttl: float = BLOB_MEMORY_TTL):
+        """
+        Args:
+            backend: memory 或 s3
+            storage: s3 后端使用的对象存储，需提供 upload_file / read_file
+            ttl: 进程内副本的保留时间（秒）
+        """
+        self.backend = backend if storage is not None else "memory"
+        self.storage = storage
+        self.ttl = ttl
+        # sha256 -> (引用, 文本, 过期时间)
+        self._entries: Dict[str, Tuple[str, str, float]] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + ttl
+        self.puts = 0
+        self.dedup_hits = 0
+        self.gets = 0
+        self.remote_reads = 0
+
+    def _sweep(self, now: float) -> None:
+        """清理过期副本，调用方需持有锁"""
+        if now < self._next_sweep:
+            return
+        expired = [digest for digest, (_, _, expires) in self._entries.items() if expires <= now]
+        for digest in expired:
+            del self._entries[digest]
+        self._next_sweep = now + min(self.ttl, 60.0)
+
+    def put(self, text: str) -> str:
+        """保存文本并返回引用，相同内容只保存一次"""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        now = time.monotonic()
+        with self._lock:
+            self.puts += 1
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self.dedup_hits += 1
+                self._entries[digest] = (entry[0], text, now + self.ttl)
+                return entry[0]
+
+        ref = f"{BLOB_REF_SCHEME}{digest}"
+        if self.backend == "s3":
+            try:
+                key = self.storage.upload_file(
+                    file_content=text.encode("utf-8"),
+                    file_name=f"{BLOB_S3_PREFIX}/{digest}.txt",
+                    content_type="text/plain; charset=utf-8",
+                )
+                ref = f"{ref}/{key}"
+            except Exception as e:
+                # 上传失败时退化为进程内引用，本进程内的运行不受影响
+                logger.warning(f"Failed to upload blob {digest[:12]} to storage: {e}, keep it in memory")
+
+        with self._lock:
+            self._sweep(now)
+            self._entries[digest] = (ref, text, now + self.ttl)
+        return ref
+
+    def get_local(self, ref: str) -> Optional[str]:
+        """从进程内副本读取，未命中返回 None"""
+        digest = blob_content_id(ref)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            self.gets += 1
+            self._entries[digest] = (entry[0], entry[1], now + self.ttl)
+            return entry[1]
+
+    def get(self, ref: str) -> str:
+        """
+        按引用读取文本
+
+        Raises:
+            KeyError: 引用已过期，或是其他实例产生的进程内引用
+        """
+        text = self.get_local(ref)
+        if text is not None:
+            return text
+        digest, _, key = ref[len(BLOB_REF_SCHEME):].partition("/")
+        if not key or self.storage is None:
+            raise KeyError(f"Blob {digest[:12]} is not available in this process")
+        text = self.storage.read_file(file_key=key).decode("utf-8")
+        with self._lock:
+            self.gets += 1
+            self.remote_reads += 1
+            self._entries[digest] = (ref, text, time.monotonic() + self.ttl)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "entries": len(self._entries),
+                "bytes": sum(len(text.encode("utf-8")) for _, text, _ in self._entries.values()),
+                "puts": self.puts,
+                "dedup_hits": self.dedup_hits,
+                "gets": self.gets,
+                "remote_reads": self.remote_reads,
+            }
+
+
+def _create_blob_store() -> BlobStore:
+    """按 BLOB_STORE_BACKEND 创建存储，对象存储不可用时退化为进程内存储"""
+    if BLOB_STORE_BACKEND == "s3":
+        try:
+            from utils.clients import get_client_provider
+            return BlobStore("s3", storage=get_client_provider().storage())
+        except Exception as e:
+            logger.warning(f"Failed to init s3 blob store: {e}, will fallback to memory blob store")
+    return BlobStore("memory")
+
+
+_blob_store: Optional[BlobStore] = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        with _blob_store_lock:
+            if _blob_store is None:
+                _blob_store = _create_blob_store()
+    return _blob_store
+
+
+def require_durable_refs() -> None:
+    """
+    要求状态中的引用在其他进程中可读
+
+    持久化 checkpoint 会在进程重启后或其他 worker 上恢复运行，进程内引用届时已不可读。
+    此后 memory 后端不再产生引用，s3 上传失败的文本也直接内联在状态中。
+    """
+    global _durable_refs_required
+    if _durable_refs_required:
+        return
+    _durable_refs_required = True
+    if BLOB_REF_MIN_CHARS > 0 and get_blob_store().backend != "s3":
+        logger.warning(
+            "Persistent checkpoints with the memory blob store: long texts are inlined in checkpoints, "
+            "set BLOB_STORE_BACKEND=s3 to keep passing them by reference"
+        )
+
+
+def store_text(text: str) -> str:
+    """长文本存入 BlobStore 并返回引用；短文本、空文本和已是引用的值原样返回，引用无法跨进程读取时也返回原文"""
+    if BLOB_REF_MIN_CHARS <= 0 or not text or is_blob_ref(text) or len(text) < BLOB_REF_MIN_CHARS:
+        return text
+    return _put(get_blob_store(), text)
+
+
+def _put(store: BlobStore, text: str) -> str:
+    """存入 store 并返回引用，要求引用跨进程可读而只能得到进程内引用时返回原文"""
+    if _durable_refs_required and store.backend != "s3":
+        return text
+    ref = store.put(text)
+    if _durable_refs_required and "/" not in ref[len(BLOB_REF_SCHEME):]:
+        # 上传失败退化成了进程内引用
+        return text
+    return ref
+
+
+def resolve_text(value: str) -> str:
+    """引用解析为原文，普通文本原样返回（如 /node_run 直接传入的转录文本）"""
+    if not is_blob_ref(value):
+        return value
+    return get_blob_store().get(value)
+
+
+async def aresolve_text(value: str) -> str:
+    """resolve_text 的异步版本，需要读取对象存储时放到线程中执行"""
+    if not is_blob_ref(value):
+        return value
+    store = get_blob_store()
+    text = store.get_local(value)
+    if text is not None:
+        return text
+    return await asyncio.to_thread(store.get, value)
+
+
+def canonical_refs(value: Any) -> Any:
+    """把嵌套结构中的引用替换为内容 id，用于生成与存储位置无关的缓存 key"""
+    if is_blob_ref(value):
+        return f"{BLOB_REF_SCHEME}{blob_content_id(value)}"
+    if isinstance(value, dict):
+        return {k: canonical_refs(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [canonical_refs(v) for v in value]
+    return value
+
+
+async def amaterialize_refs(values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    把顶层字段中的引用替换为原文，并在 BLOB_FIELDS_KEY 中记录这些字段
+
+    用于写入持久缓存：缓存条目的有效期长于进程内引用，不能只保存引用。
+    """
+    fields: List[str] = [k for k, v in values.items() if is_blob_ref(v)]
+    if not fields:
+        return values
+    result = dict(values)
+    for field in fields:
+        result[field] = await aresolve_text(values[field])
+    result[BLOB_FIELDS_KEY] = fields
+    return result
+
+
+def restore_refs(values: Dict[str, Any]) -> Dict[str, Any]:
+    """amaterialize_refs 的逆操作：把记录过的字段重新存入 BlobStore，状态中仍只传引用"""
+    fields: Iterable[str] = values.get(BLOB_FIELDS_KEY) or ()
+    if not fields:
+        return values
+    result = {k: v for k, v in values.items() if k != BLOB_FIELDS_KEY}
+    store = get_blob_store()
+    for field in fields:
+        if isinstance(result.get(field), str):
+            result[field] = _put(store, result[field])
+    return result
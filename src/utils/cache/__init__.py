@@ -0,0 +1,27 @@
+"""缓存组件"""
+
+from utils.cache.backends import CacheBackend, DiskCacheBackend, MemoryCacheBackend, PostgresCacheBackend
+from utils.cache.single_flight import SingleFlight
+from utils.cache.search_cache import SearchResultCache, get_search_cache
+from utils.cache.node_cache import (
+    NODE_CACHE_HEADER,
+    NodeResultCache,
+    cached_node,
+    get_node_cache,
+    set_node_cache_mode,
+)
+
+__all__ = [
+    "CacheBackend",
+    "DiskCacheBackend",
+    "MemoryCacheBackend",
+    "PostgresCacheBackend",
+    "SingleFlight",
+    "SearchResultCache",
+    "get_search_cache",
+    "NODE_CACHE_HEADER",
+    "NodeResultCache",
+    "cached_node",
+    "get_node_cache",
+    "set_node_cache_mode",
+]
@@ -0,0 +1,289 @@
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """
+    缓存后端接口
+
+    值需可被 JSON 序列化（Postgres 等持久化后端要求），ttl 单位为秒。
+    """
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """进程内 TTL + LRU 缓存，条目数超过 max_entries 时淘汰最久未使用的条目"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()  # key -> (过期时间, 值)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DiskCacheBackend(CacheBackend):
+    """
+    本地磁盘缓存，进程重启后仍然有效，同一台机器上的多个 worker 可共享
+
+    每个条目存为 directory 下的一个 JSON 文件（按 key 前两位分目录），写入先落临时文件再原子替换；
+    读取时刷新文件 mtime，条目数超过 max_entries 时按 mtime 淘汰最久未使用的条目。
+    """
+
+    def __init__(self, directory: str, max_entries: int = 4096):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._count: Optional[int] = None
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                item = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Disk cache read failed, path={path}: {e}")
+            self.delete(key)
+            return None
+        if item["expires_at"] <= time.time():
+            self.delete(key)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return item["value"]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            existed = os.path.exists(path)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": time.time() + ttl, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Disk cache write failed, path={path}: {e}")
+            return
+        with self._lock:
+            if self._count is None:
+                self._count = sum(1 for _ in self._files())
+            elif not existed:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        """删除最久未使用的条目，直到条目数回落到 max_entries 的 90%"""
+        entries = []
+        for path in self._files():
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        entries.sort()
+        target = int(self.max_entries * 0.9)
+        for _, path in entries[:max(0, len(entries) - target)]:
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                pass
+        self._count = min(len(entries), target)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            return
+        with self._lock:
+            if self._count:
+                self._count -= 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in list(self._files()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._count = 0
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._files())
+
+
+class PostgresCacheBackend(CacheBackend):
+    """
+    基于 storage.database.db 的 Postgres 缓存，多进程/多实例共享
+
+    数据存放在 cache_entry 表中，按 namespace 隔离不同用途的缓存；
+    读取时过滤已过期条目，每 purge_every 次写入顺带清理一次过期数据。
+    数据库不可用时读写均降级为未命中，不影响调用方。
+    """
+
+    def __init__(self, namespace: str, purge_every: int = 100):
+        self.namespace = namespace
+        self.purge_every = purge_every
+        self._writes = 0
+        self._table_ready = False
+
+    def _get_engine(self):
+        from storage.database.db import get_engine
+        from storage.database.shared.model import CacheEntry
+
+        engine = get_engine()
+        if not self._table_ready:
+            CacheEntry.__table__.create(bind=engine, checkfirst=True)
+            self._table_ready = True
+        return engine
+
+    @staticmethod
+    def _now() -> datetime.datetime:
+        return datetime.datetime.now(datetime.timezone.utc)
+
+    def get(self, key: str) -> Optional[Any]:
+        from sqlalchemy import select
+        from storage.database.shared.model import CacheEntry
+
+        try:
+            with self._get_engine().connect() as conn:
+                row = conn.execute(
+                    select(CacheEntry.value).where(
+                        CacheEntry.namespace == self.namespace,
+                        CacheEntry.cache_key == key,
+                        CacheEntry.expires_at > self._now(),
+                    )
+                ).first()
+            return row[0] if row is not None else None
+        except Exception as e:
+            logger.warning(f"Postgres cache get failed, namespace={self.namespace}: {e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        from sqlalchemy.dialects.postgresql import insert
+        from storage.database.shared.model import CacheEntry
+
+        expires_at = self._now() + datetime.timedelta(seconds=ttl)
+        stmt = insert(CacheEntry).values(
+            namespace=self.namespace, cache_key=key, value=value, expires_at=expires_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CacheEntry.namespace, CacheEntry.cache_key],
+            set_={"value": stmt.excluded.value, "expires_at": stmt.excluded.expires_at},
+        )
+        try:
+            with self._get_engine().begin() as conn:
+                conn.execute(stmt)
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self.purge_expired()
+        except Exception as e:
+            logger.warning(f"Postgres cache set failed, namespace={self.namespace}: {e}")
+
+    def delete(self, key: str) -> None:
+        from sqlalchemy import delete
+        from storage.database.shared.model import CacheEntry
+
+        with self._get_engine().begin() as conn:
+            conn.execute(
+                delete(CacheEntry).where(CacheEntry.namespace == self.namespace, CacheEntry.cache_key == key)
+            )
+
+    def clear(self) -> None:
+        from sqlalchemy import delete
+        from storage.database.shared.model import CacheEntry
+
+        with self._get_engine().begin() as conn:
+            conn.execute(delete(CacheEntry).where(CacheEntry.namespace == self.namespace))
+
+    def purge_expired(self) -> int:
+        """删除当前 namespace 下已过期的条目，返回删除条数"""
+        from sqlalchemy import delete
+        from storage.database.shared.model import CacheEntry
+
+        with self._get_engine().begin() as conn:
+            result = conn.execute(
+                delete(CacheEntry).where(
+                    CacheEntry.namespace == self.namespace, CacheEntry.expires_at <= self._now()
+                )
+            )
+        return result.rowcount or 0
+
+    def __len__(self) -> int:
+        from sqlalchemy import func, select
+        from storage.database.shared.model import CacheEntry
+
+        try:
+            with self._get_engine().connect() as conn:
+                return conn.execute(
+                    select(func.count()).select_from(CacheEntry).where(CacheEntry.namespace == self.namespace)
+                ).scalar_one()
+        except Exception:
+            return 0
@@ -0,0 +1,196 @@
+import asyncio
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, get_type_hints
+
+from pydantic import BaseModel
+
+from utils.blob import amaterialize_refs, canonical_refs, restore_refs
+from utils.cache.backends import CacheBackend, DiskCacheBackend, MemoryCacheBackend, PostgresCacheBackend
+from utils.llm import get_llm_config
+
+logger = logging.getLogger(__name__)
+
+# 缓存后端：memory（进程内）、disk（本地磁盘）、postgres（多实例共享）、none（关闭缓存）
+NODE_CACHE_BACKEND = os.getenv("NODE_CACHE_BACKEND", "memory")
+# 缓存有效期（秒），需短于产物签名 URL 的有效期（24 小时）
+NODE_CACHE_TTL = float(os.getenv("NODE_CACHE_TTL", "21600"))
+# 缓存最大条目数（memory / disk 后端）
+NODE_CACHE_MAX_ENTRIES = int(os.getenv("NODE_CACHE_MAX_ENTRIES", "512"))
+# disk 后端的缓存目录
+NODE_CACHE_DIR = os.getenv("NODE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "node_cache"))
+# 额外的版本号，修改后使全部已有缓存失效
+NODE_CACHE_VERSION = os.getenv("NODE_CACHE_VERSION", "1")
+
+# 请求头：bypass 不读不写缓存；refresh 不读缓存，但用新结果覆盖
+NODE_CACHE_HEADER = "x-node-cache"
+NODE_CACHE_MODE_DEFAULT = "default"
+NODE_CACHE_MODE_BYPASS = "bypass"
+NODE_CACHE_MODE_REFRESH = "refresh"
+
+# 兜底占位产物的 URL 前缀，这类结果不缓存
+PLACEHOLDER_URL_PREFIX = "https://example.com/"
+
+node_cache_mode: contextvars.ContextVar[str] = contextvars.ContextVar("node_cache_mode", default=NODE_CACHE_MODE_DEFAULT)
+
+
+def set_node_cache_mode(headers: Optional[Mapping[str, str]]) -> str:
+    """按请求头设置当前请求的节点缓存模式，需在创建图运行任务之前调用"""
+    mode = ((headers or {}).get(NODE_CACHE_HEADER) or NODE_CACHE_MODE_DEFAULT).strip().lower()
+    if mode not in (NODE_CACHE_MODE_BYPASS, NODE_CACHE_MODE_REFRESH):
+        mode = NODE_CACHE_MODE_DEFAULT
+    node_cache_mode.set(mode)
+    return mode
+
+
+def is_complete_output(output: BaseModel) -> bool:
+    """兜底占位结果和尚未完成的异步视频任务不缓存"""
+    values = output.model_dump()
+    if values.get("video_job_id"):
+        return False
+    return not any(isinstance(v, str) and v.startswith(PLACEHOLDER_URL_PREFIX) for v in values.values())
+
+
+@functools.lru_cache(maxsize=None)
+def code_version(fn: Callable) -> str:
+    """节点所在模块源码的哈希，节点实现或其辅助函数修改后缓存自动失效"""
+    module = inspect.getmodule(fn)
+    try:
+        source = inspect.getsource(module) if module is not None else inspect.getsource(fn)
+    except (OSError, TypeError):
+        source = fn.__code__.co_code.hex()
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+
+class NodeResultCache:
+    """
+    LLM 节点结果缓存（按内容寻址）
+
+    key 为以下内容的哈希：节点名、节点代码版本、输入模型、解析后的 LLM 配置（模型参数与提示词）。
+    输入中的 BlobStore 引用按内容 id 参与哈希，与引用的存储位置无关。
+    同一视频重复运行时直接返回上次的节点输出，跳过 LLM / TTS / 视频生成调用。
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float = NODE_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def make_key(node_name: str, version: str, state: BaseModel, llm_cfg_path: Optional[str]) -> str:
+        llm_cfg: Dict[str, Any] = {}
+        if llm_cfg_path:
+            entry = get_llm_config(llm_cfg_path)
+            llm_cfg = {"model_config": entry.model_config, "sp": entry.sp, "up": entry.up}
+        raw = json.dumps(
+            [NODE_CACHE_VERSION, node_name, version, canonical_refs(state.model_dump(mode="json")), llm_cfg],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _incr(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    async def _call_backend(self, method: str, *args: Any) -> Any:
+        """disk / Postgres 后端的读写放到线程中执行，避免阻塞事件循环"""
+        fn = getattr(self.backend, method)
+        if isinstance(self.backend, MemoryCacheBackend):
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    def wrap(self, fn: Callable, cacheable: Callable[[BaseModel], bool] = is_complete_output) -> Callable:
+        """
+        包装异步节点函数，签名与原函数一致（LangGraph 据此推断输入模型并注入 config / runtime）
+
+        Args:
+            fn: 节点函数，形如 async def node(state, config, runtime) -> XxxOutput
+            cacheable: 判断输出是否可缓存
+        """
+        output_cls = get_type_hints(fn).get("return")
+        node_name = fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(state, config, **kwargs):
+            mode = node_cache_mode.get()
+            if self.backend is None or mode == NODE_CACHE_MODE_BYPASS:
+                self._incr("bypassed")
+                return await fn(state, config, **kwargs)
+
+            key = self.make_key(node_name, code_version(fn), state, (config.get("metadata") or {}).get("llm_cfg"))
+            if mode != NODE_CACHE_MODE_REFRESH:
+                t0 = time.time()
+                cached = await self._call_backend("get", key)
+                if cached is not None:
+                    self._incr("hits")
+                    logger.info(f"Node cache hit: {node_name}, {int((time.time() - t0) * 1000)}ms")
+                    return output_cls.model_validate(restore_refs(cached))
+
+            self._incr("misses")
+            output = await fn(state, config, **kwargs)
+            if isinstance(output, BaseModel) and cacheable(output):
+                # 缓存条目可能比进程内引用存活更久，引用字段按原文保存，读取时再重新存入 BlobStore
+                values = await amaterialize_refs(output.model_dump(mode="json"))
+                await self._call_backend("set", key, values, self.ttl)
+            return output
+
+        return wrapper
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else "none",
+            "entries": len(self.backend) if self.backend is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+        }
+
+
+def _create_backend() -> Optional[CacheBackend]:
+    """按 NODE_CACHE_BACKEND 创建后端，disk / Postgres 不可用时退化为进程内缓存"""
+    if NODE_CACHE_BACKEND == "none":
+        return None
+    if NODE_CACHE_BACKEND == "disk":
+        try:
+            return DiskCacheBackend(NODE_CACHE_DIR, max_entries=NODE_CACHE_MAX_ENTRIES)
+        except Exception as e:
+            logger.warning(f"Failed to init disk node cache: {e}, will fallback to memory cache")
+    if NODE_CACHE_BACKEND == "postgres":
+        try:
+            backend = PostgresCacheBackend(namespace="node_result")
+            backend._get_engine()
+            return backend
+        except Exception as e:
+            logger.warning(f"Failed to init Postgres node cache: {e}, will fallback to memory cache")
+    return MemoryCacheBackend(max_entries=NODE_CACHE_MAX_ENTRIES)
+
+
+_node_cache: Optional[NodeResultCache] = None
+_node_cache_lock = threading.Lock()
+
+
+def get_node_cache() -> NodeResultCache:
+    global _node_cache
+    if _node_cache is None:
+        with _node_cache_lock:
+            if _node_cache is None:
+                _node_cache = NodeResultCache(_create_backend())
+    return _node_cache
+
+
+def cached_node(fn: Callable, cacheable: Callable[[BaseModel], bool] = is_complete_output) -> Callable:
+    """用进程级节点缓存包装节点函数，不修改节点本身"""
+    return get_node_cache().wrap(fn, cacheable=cacheable)
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from coze_coding_dev_sdk.search.models import SearchResponse
+
+from utils.cache.backends import CacheBackend, MemoryCacheBackend, PostgresCacheBackend
+from utils.cache.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# 缓存后端：memory（进程内）、postgres（多实例共享）、none（关闭缓存）
+SEARCH_CACHE_BACKEND = os.getenv("SEARCH_CACHE_BACKEND", "memory")
+# 缓存有效期（秒）
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+# 进程内缓存最大条目数
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+
+
+class SearchResultCache:
+    """
+    搜索结果缓存
+
+    - 以归一化后的 (query, search_type, count, time_range) 为 key，TTL 内直接返回缓存结果
+    - 同一 key 的并发请求只向上游发起一次搜索（single-flight），其余请求共享结果
+    - 空结果不缓存，避免把上游的瞬时异常固化到 TTL 内
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float = SEARCH_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(query: str, search_type: str, count: Optional[int], time_range: Optional[str], **kwargs: Any) -> str:
+        normalized_query = " ".join(query.split()).casefold()
+        raw = json.dumps(
+            [normalized_query, search_type, count, time_range, sorted(kwargs.items())],
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _incr(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def search(
+        self,
+        client,
+        *,
+        query: str,
+        search_type: str = "web",
+        count: Optional[int] = 10,
+        time_range: Optional[str] = None,
+        **kwargs: Any,
+    ) -> SearchResponse:
+        """
+        带缓存的 SearchClient.search，参数与 SearchClient.search 一致
+
+        Args:
+            client: SearchClient 实例，仅在缓存未命中时使用
+        """
+        if self.backend is None:
+            return client.search(query=query, search_type=search_type, count=count, time_range=time_range, **kwargs)
+
+        key = self.make_key(query, search_type, count, time_range, **kwargs)
+        cached = self.backend.get(key)
+        if cached is not None:
+            self._incr("hits")
+            return SearchResponse.model_validate(cached)
+
+        def _fetch() -> SearchResponse:
+            response = client.search(query=query, search_type=search_type, count=count, time_range=time_range, **kwargs)
+            if response.web_items or response.image_items:
+                self.backend.set(key, response.model_dump(mode="json"), self.ttl)
+            return response
+
+        response, shared = self._flight.do(key, _fetch)
+        self._incr("coalesced" if shared else "misses")
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else "none",
+            "entries": len(self.backend) if self.backend is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": self._flight.in_flight(),
+        }
+
+
+def _create_backend() -> Optional[CacheBackend]:
+    """按 SEARCH_CACHE_BACKEND 创建后端，Postgres 不可用时退化为进程内缓存"""
+    if SEARCH_CACHE_BACKEND == "none":
+        return None
+    if SEARCH_CACHE_BACKEND == "postgres":
+        try:
+            backend = PostgresCacheBackend(namespace="search")
+            backend._get_engine()
+            return backend
+        except Exception as e:
+            logger.warning(f"Failed to init Postgres search cache: {e}, will fallback to memory cache")
+    return MemoryCacheBackend(max_entries=SEARCH_CACHE_MAX_ENTRIES)
+
+
+_search_cache: Optional[SearchResultCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchResultCache:
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchResultCache(_create_backend())
+    return _search_cache
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+测试：NodeResultCache 的 key 组成与可缓存判断
+
+运行（在 src 目录下）：python -m pytest utils/cache/test_node_cache.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+# 添加src目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.blob import BlobStore
+from utils.cache import node_cache
+from utils.cache.backends import MemoryCacheBackend
+from utils.cache.node_cache import NodeResultCache, is_complete_output, node_cache_mode
+
+
+class _Input(BaseModel):
+    transcript: str
+    video_title: str = ""
+
+
+class _Output(BaseModel):
+    short_video_url: str
+    video_job_id: str = ""
+
+
+def _fake_llm_config(model: str = "m1", sp: str = "sp", up: str = "up"):
+    return lambda _path: SimpleNamespace(model_config={"model": model}, sp=sp, up=up)
+
+
+def test_key_depends_on_node_version_input_and_llm_config(monkeypatch):
+    monkeypatch.setattr(node_cache, "get_llm_config", _fake_llm_config())
+    state = _Input(transcript="t", video_title="v")
+    key = NodeResultCache.make_key("node", "v1", state, "cfg.json")
+
+    assert key == NodeResultCache.make_key("node", "v1", _Input(transcript="t", video_title="v"), "cfg.json")
+    assert key != NodeResultCache.make_key("other_node", "v1", state, "cfg.json")
+    assert key != NodeResultCache.make_key("node", "v2", state, "cfg.json")
+    assert key != NodeResultCache.make_key("node", "v1", _Input(transcript="t2", video_title="v"), "cfg.json")
+    assert key != NodeResultCache.make_key("node", "v1", state, None)
+
+    for changed in (_fake_llm_config(model="m2"), _fake_llm_config(sp="sp2"), _fake_llm_config(up="up2")):
+        monkeypatch.setattr(node_cache, "get_llm_config", changed)
+        assert key != NodeResultCache.make_key("node", "v1", state, "cfg.json")
+
+
+def test_key_uses_blob_content_id_not_location():
+    text = "长文本" * 100
+    memory_ref = BlobStore("memory").put(text)
+    # s3 后端的引用带对象 key，内容相同时 key 应相同
+    s3_ref = f"{memory_ref}/blobs/some-object-key"
+    assert (
+        NodeResultCache.make_key("node", "v1", _Input(transcript=memory_ref), None)
+        == NodeResultCache.make_key("node", "v1", _Input(transcript=s3_ref), None)
+    )
+
+
+def test_placeholder_and_pending_outputs_are_not_cacheable():
+    assert is_complete_output(_Output(short_video_url="https://cdn/video.mp4"))
+    assert not is_complete_output(_Output(short_video_url="https://example.com/video/short_x.mp4"))
+    assert not is_complete_output(_Output(short_video_url="", video_job_id="task-1"))
+
+
+def _counting_node(outputs):
+    calls = []
+
+    async def node(state: _Input, config) -> _Output:
+        calls.append(state.transcript)
+        return outputs[len(calls) - 1]
+
+    return node, calls
+
+
+def test_wrap_caches_complete_output_only():
+    async def main():
+        cache = NodeResultCache(MemoryCacheBackend(max_entries=16))
+        node, calls = _counting_node([
+            _Output(short_video_url="https://example.com/video/placeholder.mp4"),
+            _Output(short_video_url="", video_job_id="task-1"),
+            _Output(short_video_url="https://cdn/video.mp4"),
+            _Output(short_video_url="https://cdn/other.mp4"),
+        ])
+        wrapped = cache.wrap(node)
+        state, config = _Input(transcript="t"), {"metadata": {}}
+
+        # 占位结果与未完成的视频任务不写入缓存，下一次仍然执行节点
+        await wrapped(state, config)
+        await wrapped(state, config)
+        assert len(calls) == 2 and len(cache.backend) == 0
+
+        assert (await wrapped(state, config)).short_video_url == "https://cdn/video.mp4"
+        assert (await wrapped(state, config)).short_video_url == "https://cdn/video.mp4"
+        assert len(calls) == 3
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+
+    asyncio.run(main())
+
+
+def test_bypass_and_refresh_modes():
+    async def main():
+        cache = NodeResultCache(MemoryCacheBackend(max_entries=16))
+        node, calls = _counting_node([
+            _Output(short_video_url="https://cdn/a.mp4"),
+            _Output(short_video_url="https://cdn/b.mp4"),
+            _Output(short_video_url="https://cdn/c.mp4"),
+        ])
+        wrapped = cache.wrap(node)
+        state, config = _Input(transcript="t"), {"metadata": {}}
+
+        await wrapped(state, config)
+        node_cache_mode.set("bypass")
+        assert (await wrapped(state, config)).short_video_url == "https://cdn/b.mp4"
+        node_cache_mode.set("refresh")
+        assert (await wrapped(state, config)).short_video_url == "https://cdn/c.mp4"
+        node_cache_mode.set("default")
+        # refresh 的结果覆盖了原条目，bypass 的结果没有写入
+        assert (await wrapped(state, config)).short_video_url == "https://cdn/c.mp4"
+        assert len(calls) == 3
+
+    asyncio.run(main())
@@ -0,0 +1,21 @@
+"""集成服务异步客户端"""
+
+from utils.clients.http_pool import HttpClientPool, get_http_pool
+from utils.clients.llm import AsyncLLMClient
+from utils.clients.tts import AsyncTTSClient
+from utils.clients.video import AsyncVideoGenerationClient
+from utils.clients.simulation import LatencyModel, Simulator
+from utils.clients.provider import ClientProvider, get_client_provider, set_client_provider
+
+__all__ = [
+    "HttpClientPool",
+    "get_http_pool",
+    "AsyncLLMClient",
+    "AsyncTTSClient",
+    "AsyncVideoGenerationClient",
+    "LatencyModel",
+    "Simulator",
+    "ClientProvider",
+    "get_client_provider",
+    "set_client_provider",
+]
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+import requests
+from coze_coding_utils.runtime_ctx.context import default_headers
+from coze_coding_dev_sdk.core.exceptions import APIError, NetworkError
+
+from utils.clients.http_pool import HTTP_POOL_ENABLED, get_http_pool
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRequestMixin:
+    """
+    为 SDK 的 BaseClient 子类提供基于 httpx 的原生异步请求能力
+
+    请求头的构造顺序与 BaseClient._request 保持一致：
+    ctx 透传头 -> custom_headers -> config 默认头（鉴权、SDK 版本）
+    连接来自按 http_pool_name 共享的连接池，客户端对象本身仍按调用创建以携带本次调用的 ctx。
+    """
+
+    http_pool_name = "default"
+
+    def _build_headers(self, headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        request_headers: Dict[str, str] = {}
+
+        if self.ctx is not None:
+            request_headers.update(default_headers(self.ctx))
+
+        if self.custom_headers:
+            request_headers.update(self.custom_headers)
+
+        request_headers.update(self.config.get_headers(headers))
+        return request_headers
+
+    async def _arequest(
+        self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs
+    ) -> dict:
+        request_headers = self._build_headers(headers)
+        last_error = None
+
+        for attempt in range(self.config.retry_times):
+            try:
+                async with get_http_pool().client(self.http_pool_name) as client:
+                    response = await client.request(
+                        method, url, headers=request_headers, timeout=self.config.timeout, **kwargs
+                    )
+                return self._ahandle_response(response)
+            except httpx.HTTPError as e:
+                last_error = NetworkError(str(e), e)
+                if attempt < self.config.retry_times - 1:
+                    await asyncio.sleep(self.config.retry_delay * (attempt + 1))
+                    continue
+
+        raise last_error
+
+    @staticmethod
+    def _ahandle_response(response: httpx.Response) -> dict:
+        logid = response.headers.get("X-Tt-Logid")
+        try:
+            data = response.json()
+        except Exception as e:
+            raise APIError(
+                f"响应解析失败: {str(e)}, logid: {logid}, 响应内容: {response.text[:200]}",
+                status_code=response.status_code,
+            )
+
+        if response.is_error:
+            error_msg = f"HTTP 错误: {response.status_code} {response.reason_phrase}, logid: {logid}"
+            if data:
+                error_msg += f", 响应数据: {data}"
+            raise APIError(error_msg, status_code=response.status_code, response_data=data)
+
+        return data
+
+
+class SessionRequestMixin:
+    """
+    为 SDK 的同步 BaseClient 子类提供共享连接池
+
+    SDK 的 _make_request 每次调用 requests.request，都会新建 TCP / TLS 连接；
+    这里改用按 http_pool_name 共享的 requests.Session，重试逻辑与 SDK 保持一致。
+    """
+
+    http_pool_name = "default"
+
+    def _make_request(self, method: str, url: str, **kwargs) -> requests.Response:
+        last_error = None
+        is_stream = kwargs.get("stream", False)
+        requester = get_http_pool().session(self.http_pool_name) if HTTP_POOL_ENABLED else requests
+
+        for attempt in range(self.config.retry_times):
+            try:
+                if attempt == 0:
+                    self._log_request(method, url, **kwargs)
+
+                response = requester.request(method=method, url=url, timeout=self.config.timeout, **kwargs)
+
+                if attempt == 0:
+                    self._log_response(response, is_stream=is_stream)
+
+                return response
+
+            except requests.exceptions.RequestException as e:
+                last_error = NetworkError(str(e), e)
+                if attempt < self.config.retry_times - 1:
+                    time.sleep(self.config.retry_delay * (attempt + 1))
+                    continue
+
+        raise last_error
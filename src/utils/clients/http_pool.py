@@ -0,0 +1,213 @@
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# 是否在调用之间复用 HTTP 连接；false 时每次调用新建客户端（用于排查问题或对比）
+HTTP_POOL_ENABLED = os.getenv("HTTP_POOL_ENABLED", "true").lower() == "true"
+# 每个集成服务的最大并发连接数
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+# 每个集成服务保留的空闲 keep-alive 连接数
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+# 空闲连接的保留时间（秒）
+HTTP_POOL_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "30"))
+# 请求未单独指定超时时使用的默认超时（秒）
+HTTP_POOL_DEFAULT_TIMEOUT = float(os.getenv("HTTP_POOL_DEFAULT_TIMEOUT", "60"))
+
+
+class _Counters:
+    """单个集成服务的计数，事件循环与执行器线程都会写入，读写均加锁"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self._lock = threading.Lock()
+
+    def incr(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "tls_handshakes": self.tls_handshakes,
+            }
+
+
+class HttpClientPool:
+    """
+    按集成服务（llm / tts / video / search / callback 等）共享的 HTTP 连接池
+
+    SDK 客户端对象仍按调用创建，携带本次调用的 ctx 用于链路追踪请求头；
+    底层的 TCP / TLS 连接由这里的长生命周期客户端持有，在调用之间复用。
+    httpx.AsyncClient 的连接绑定事件循环，因此异步客户端按 (事件循环, 集成服务) 保存，
+    事件循环被回收后对应客户端随之释放；同步客户端使用 requests.Session，进程内共享。
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive: int = HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry: float = HTTP_POOL_KEEPALIVE_EXPIRY,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._sessions: Dict[str, requests.Session] = {}
+        self._counters: Dict[str, _Counters] = {}
+        self._lock = threading.Lock()
+
+    def _counter(self, name: str) -> _Counters:
+        with self._lock:
+            counters = self._counters.get(name)
+            if counters is None:
+                counters = self._counters[name] = _Counters()
+            return counters
+
+    def _event_hooks(self, name: str) -> Dict[str, list]:
+        """统计请求数，并通过 httpcore 的 trace 扩展统计新建连接与 TLS 握手次数"""
+        counters = self._counter(name)
+
+        async def trace(event: str, info: dict) -> None:
+            if event == "connection.connect_tcp.complete":
+                counters.incr("connections_opened")
+            elif event == "connection.start_tls.complete":
+                counters.incr("tls_handshakes")
+
+        async def on_request(request: httpx.Request) -> None:
+            counters.incr("requests")
+            request.extensions["trace"] = trace
+
+        return {"request": [on_request]}
+
+    def new_async_client(self, name: str, **kwargs: Any) -> httpx.AsyncClient:
+        """新建一个带统计的异步客户端，由调用方负责关闭"""
+        kwargs.setdefault("timeout", HTTP_POOL_DEFAULT_TIMEOUT)
+        return httpx.AsyncClient(limits=self.limits, event_hooks=self._event_hooks(name), **kwargs)
+
+    def async_client(self, name: str) -> httpx.AsyncClient:
+        """当前事件循环中该集成服务的共享异步客户端，调用方不要关闭"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.get(loop)
+            if clients is None:
+                # 已关闭的事件循环上的连接不可再用，释放其客户端（连接持有事件循环的强引用，弱引用无法自动回收）
+                for closed in [l for l in self._async_clients.keys() if l.is_closed()]:
+                    del self._async_clients[closed]
+                clients = self._async_clients[loop] = {}
+            client = clients.get(name)
+        if client is None or client.is_closed:
+            client = self.new_async_client(name)
+            with self._lock:
+                clients[name] = client
+        return client
+
+    @contextlib.asynccontextmanager
+    async def client(self, name: str) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        单次调用使用的异步客户端：开启连接复用时为共享客户端，否则为用完即关闭的新客户端
+
+        超时等参数需在请求上单独指定，不要修改共享客户端的属性。
+        """
+        if HTTP_POOL_ENABLED:
+            yield self.async_client(name)
+            return
+        async with self.new_async_client(name) as client:
+            yield client
+
+    def session(self, name: str) -> requests.Session:
+        """该集成服务的共享同步会话（requests），线程间共享连接池"""
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.limits.max_keepalive_connections or 10)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[name] = session
+        self._counter(name).incr("requests")
+        return session
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环中的共享异步客户端"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.pop(loop, {})
+        for client in clients.values():
+            await client.aclose()
+
+    @staticmethod
+    def _async_pool_state(client: httpx.AsyncClient) -> Dict[str, int]:
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", ()))
+        return {
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+        }
+
+    @staticmethod
+    def _session_pool_state(session: requests.Session) -> Dict[str, int]:
+        opened = 0
+        idle = 0
+        for adapter in set(session.adapters.values()):
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    idle += pool.pool.qsize() if pool.pool is not None else 0
+        return {"connections_opened": opened, "idle_connections": idle}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            loops = list(self._async_clients.items())
+            sessions = dict(self._sessions)
+
+        result: Dict[str, Any] = {"enabled": HTTP_POOL_ENABLED, "event_loops": len(loops), "integrations": {}}
+        for name, c in counters.items():
+            entry: Dict[str, Any] = {
+                **c.snapshot(),
+                "open_connections": 0,
+                "idle_connections": 0,
+            }
+            for _, clients in loops:
+                if name in clients and not clients[name].is_closed:
+                    for key, value in self._async_pool_state(clients[name]).items():
+                        entry[key] += value
+            if name in sessions:
+                state = self._session_pool_state(sessions[name])
+                entry["connections_opened"] += state["connections_opened"]
+                entry["idle_connections"] += state["idle_connections"]
+            entry["reused_requests"] = max(0, entry["requests"] - entry["connections_opened"])
+            result["integrations"][name] = entry
+        return result
+
+
+_http_pool: Optional[HttpClientPool] = None
+_http_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpClientPool:
+    global _http_pool
+    if _http_pool is None:
+        with _http_pool_lock:
+            if _http_pool is None:
+                _http_pool = HttpClientPool()
+    return _http_pool
@@ -0,0 +1,109 @@
+from typing import AsyncIterator, Dict, List, Optional
+
+from coze_coding_dev_sdk import LLMClient
+from coze_coding_dev_sdk.llm.models import LLMConfig
+from cozeloop.decorator import observe
+from langchain_core.messages import AIMessage, BaseMessage, BaseMessageChunk
+from langchain_openai import ChatOpenAI
+
+from utils.clients.http_pool import HTTP_POOL_ENABLED, get_http_pool
+
+
+class AsyncLLMClient(LLMClient):
+    """
+    LLMClient 的异步版本
+
+    复用 SDK 的模型构建逻辑（_create_llm），通过 ChatOpenAI.astream 走原生异步 IO，
+    调用期间不占用线程池线程。
+    """
+
+    def _create_llm(
+        self,
+        llm_config: LLMConfig,
+        use_caching: bool = False,
+        previous_response_id: Optional[str] = None,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> ChatOpenAI:
+        """在 SDK 构建的模型上换用共享连接池，请求头（含本次调用的 ctx 透传头）保持不变"""
+        llm = super()._create_llm(
+            llm_config,
+            use_caching=use_caching,
+            previous_response_id=previous_response_id,
+            extra_headers=extra_headers,
+        )
+        if HTTP_POOL_ENABLED:
+            llm.root_async_client = llm.root_async_client.with_options(http_client=get_http_pool().async_client("llm"))
+            llm.async_client = llm.root_async_client.chat.completions
+        return llm
+
+    @observe(name="llm_astream")
+    async def astream(
+        self,
+        messages: List[BaseMessage],
+        model: str = "doubao-seed-1-8-251228",
+        thinking: Optional[str] = "disabled",
+        caching: Optional[str] = "disabled",
+        temperature: Optional[float] = 1.0,
+        frequency_penalty: Optional[float] = 0,
+        top_p: Optional[float] = 0,
+        max_tokens: Optional[int] = None,
+        max_completion_tokens: Optional[int] = 32768,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[BaseMessageChunk]:
+        """流式调用大语言模型，参数含义与 LLMClient.stream 一致"""
+        llm_config = LLMConfig(
+            model=model,
+            thinking=thinking,
+            caching=caching,
+            temperature=temperature,
+            frequency_penalty=frequency_penalty,
+            top_p=top_p,
+            max_tokens=max_tokens,
+            max_completion_tokens=max_completion_tokens,
+            streaming=True,
+        )
+        llm = self._create_llm(
+            llm_config,
+            use_caching=caching == "enabled",
+            extra_headers=extra_headers,
+        )
+
+        async for chunk in llm.astream(messages):
+            yield chunk
+
+    @observe(name="llm_ainvoke")
+    async def ainvoke(
+        self,
+        messages: List[BaseMessage],
+        model: str = "doubao-seed-1-8-251228",
+        thinking: Optional[str] = "disabled",
+        caching: Optional[str] = "disabled",
+        temperature: Optional[float] = 1.0,
+        frequency_penalty: Optional[float] = 0,
+        top_p: Optional[float] = 0,
+        max_tokens: Optional[int] = None,
+        max_completion_tokens: Optional[int] = 32768,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> AIMessage:
+        """非流式调用大语言模型，与 LLMClient.invoke 一样基于流式调用组装完整响应"""
+        full_content = ""
+        response_metadata = {}
+
+        async for chunk in self.astream(
+            messages=messages,
+            model=model,
+            thinking=thinking,
+            caching=caching,
+            temperature=temperature,
+            frequency_penalty=frequency_penalty,
+            top_p=top_p,
+            max_tokens=max_tokens,
+            max_completion_tokens=max_completion_tokens,
+            extra_headers=extra_headers,
+        ):
+            if chunk.content:
+                full_content += str(chunk.content)
+            if chunk.response_metadata:
+                response_metadata.update(chunk.response_metadata)
+
+        return AIMessage(content=full_content, response_metadata=response_metadata)
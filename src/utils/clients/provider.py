@@ -0,0 +1,120 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from coze_coding_dev_sdk import LLMClient
+
+from utils.clients.llm import AsyncLLMClient
+from utils.clients.search import PooledSearchClient
+from utils.clients.tts import AsyncTTSClient
+from utils.clients.video import AsyncVideoGenerationClient
+from utils.clients.simulation import (
+    SimulatedLLMClient,
+    SimulatedSearchClient,
+    SimulatedStorage,
+    SimulatedTTSClient,
+    SimulatedVideoGenerationClient,
+    Simulator,
+)
+
+logger = logging.getLogger(__name__)
+
+# 客户端模式：live 调用真实集成服务；sim 使用本地模拟服务（无需网络，可注入延迟与错误）
+CLIENT_MODE = os.getenv("CLIENT_MODE", "live")
+
+CLIENT_MODE_LIVE = "live"
+CLIENT_MODE_SIM = "sim"
+
+
+class ClientProvider:
+    """
+    集成服务客户端提供者
+
+    所有节点通过它创建搜索、LLM、TTS、视频生成客户端和对象存储，
+    切换 CLIENT_MODE 即可在真实服务与模拟服务之间切换，节点代码无需改动。
+    """
+
+    def __init__(self, mode: str = CLIENT_MODE, simulator: Optional[Simulator] = None):
+        if mode not in (CLIENT_MODE_LIVE, CLIENT_MODE_SIM):
+            raise ValueError(f"unknown CLIENT_MODE: {mode}")
+        self.mode = mode
+        self.simulator = simulator or (Simulator() if mode == CLIENT_MODE_SIM else None)
+        self._storage = None
+        self._storage_lock = threading.Lock()
+        if self.simulator is not None:
+            logger.info(f"Client provider in simulation mode, latency={self.simulator.latency}")
+
+    @property
+    def simulated(self) -> bool:
+        return self.mode == CLIENT_MODE_SIM
+
+    def search(self, ctx=None):
+        if self.simulated:
+            return SimulatedSearchClient(self.simulator, ctx=ctx)
+        return PooledSearchClient(ctx=ctx)
+
+    def llm(self, ctx=None):
+        """同步 LLM 客户端（invoke / stream）"""
+        if self.simulated:
+            return SimulatedLLMClient(self.simulator, ctx=ctx)
+        return LLMClient(ctx=ctx)
+
+    def async_llm(self, ctx=None):
+        """异步 LLM 客户端（ainvoke / astream）"""
+        if self.simulated:
+            return SimulatedLLMClient(self.simulator, ctx=ctx)
+        return AsyncLLMClient(ctx=ctx)
+
+    def tts(self, ctx=None):
+        if self.simulated:
+            return SimulatedTTSClient(self.simulator, ctx=ctx)
+        return AsyncTTSClient(ctx=ctx)
+
+    def video(self, ctx=None):
+        if self.simulated:
+            return SimulatedVideoGenerationClient(self.simulator, ctx=ctx)
+        return AsyncVideoGenerationClient(ctx=ctx)
+
+    def storage(self):
+        """
+        播客音频上传使用的对象存储
+
+        进程内共享同一个实例：boto3 客户端创建开销较大且持有连接池，可在线程间共享，
+        鉴权 token 由其 before-call 钩子按请求获取。
+        """
+        if self._storage is None:
+            with self._storage_lock:
+                if self._storage is None:
+                    if self.simulated:
+                        self._storage = SimulatedStorage(self.simulator)
+                    else:
+                        from utils.podcast.tts_pipeline import create_podcast_storage
+                        self._storage = create_podcast_storage()
+        return self._storage
+
+    def stats(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"mode": self.mode}
+        if self.simulator is not None:
+            result.update(self.simulator.stats())
+        return result
+
+
+_client_provider: Optional[ClientProvider] = None
+_client_provider_lock = threading.Lock()
+
+
+def get_client_provider() -> ClientProvider:
+    global _client_provider
+    if _client_provider is None:
+        with _client_provider_lock:
+            if _client_provider is None:
+                _client_provider = ClientProvider()
+    return _client_provider
+
+
+def set_client_provider(provider: Optional[ClientProvider]) -> None:
+    """替换进程级客户端提供者（基准测试等场景使用），传入 None 时下次按环境变量重新创建"""
+    global _client_provider
+    with _client_provider_lock:
+        _client_provider = provider
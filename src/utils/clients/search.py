@@ -0,0 +1,9 @@
+from coze_coding_dev_sdk import SearchClient
+
+from utils.clients.base import SessionRequestMixin
+
+
+class PooledSearchClient(SessionRequestMixin, SearchClient):
+    """SearchClient 复用共享连接池，接口与 SearchClient 一致"""
+
+    http_pool_name = "search"
@@ -0,0 +1,339 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from coze_coding_dev_sdk.core.exceptions import APIError
+from coze_coding_dev_sdk.search.models import SearchResponse, WebItem
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, BaseMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+logger = logging.getLogger(__name__)
+
+# 随机数种子，固定后延迟序列与错误注入可复现
+SIM_SEED = int(os.getenv("SIM_SEED", "0"))
+# 各服务的延迟分布（格式见 LatencyModel.parse）
+SIM_SEARCH_LATENCY = os.getenv("SIM_SEARCH_LATENCY", "fixed:0.05")
+SIM_LLM_FIRST_TOKEN_LATENCY = os.getenv("SIM_LLM_FIRST_TOKEN_LATENCY", "fixed:0.2")
+SIM_LLM_CHUNK_INTERVAL = os.getenv("SIM_LLM_CHUNK_INTERVAL", "fixed:0")
+SIM_TTS_LATENCY = os.getenv("SIM_TTS_LATENCY", "fixed:0.1")
+SIM_VIDEO_LATENCY = os.getenv("SIM_VIDEO_LATENCY", "fixed:0.3")
+SIM_STORAGE_LATENCY = os.getenv("SIM_STORAGE_LATENCY", "fixed:0")
+# LLM 每次输出的 token 数（不超过请求的 max_completion_tokens）与每个流式分块的 token 数
+SIM_LLM_OUTPUT_TOKENS = int(os.getenv("SIM_LLM_OUTPUT_TOKENS", "400"))
+SIM_LLM_CHUNK_TOKENS = int(os.getenv("SIM_LLM_CHUNK_TOKENS", "8"))
+# 错误注入概率，可按服务单独覆盖（SIM_LLM_ERROR_RATE 等）
+SIM_ERROR_RATE = float(os.getenv("SIM_ERROR_RATE", "0"))
+# 为 true 时在线程池中阻塞等待，复现同步 SDK 占用线程的行为
+SIM_BLOCKING_IO = os.getenv("SIM_BLOCKING_IO", "false").lower() == "true"
+
+SIM_URL_PREFIX = "https://sim.local/"
+
+_SENTENCES = [
+    "这一部分梳理了核心概念的来龙去脉。",
+    "关键在于把抽象原理落到具体场景中。",
+    "实际案例表明该方法能显著提升效率。",
+    "需要注意常见误区以及对应的规避方式。",
+    "未来的发展趋势集中在规模化与自动化。",
+    "重点要点可以归纳为三个层次逐步展开。",
+    "通过对比实验可以看出不同方案的取舍。",
+    "最后给出了可直接上手的实践建议。",
+]
+
+
+class LatencyModel:
+    """
+    延迟分布
+
+    格式：
+    - fixed:<秒>
+    - uniform:<下限>,<上限>
+    - normal:<均值>,<标准差>（小于 0 时截断为 0）
+    - lognormal:<中位数>,<sigma>
+    - longtail:<基础延迟>,<长尾概率>,<长尾倍数>：以给定概率在基础延迟上乘以 Pareto 分布的放大倍数
+    """
+
+    def __init__(self, kind: str, params: List[float]):
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, raw = spec.strip().partition(":")
+        if not raw:
+            kind, raw = "fixed", kind
+        try:
+            params = [float(p) for p in raw.split(",") if p.strip()]
+        except ValueError:
+            raise ValueError(f"invalid latency spec: {spec}")
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "longtail": 3}
+        if expected.get(kind) != len(params):
+            raise ValueError(f"invalid latency spec: {spec}")
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            return p[0]
+        if self.kind == "uniform":
+            return rng.uniform(p[0], p[1])
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(p[0], p[1]))
+        if self.kind == "lognormal":
+            return p[0] * math.exp(rng.gauss(0, p[1])) if p[0] > 0 else 0.0
+        base, tail_prob, tail_scale = p
+        if rng.random() < tail_prob:
+            return base * tail_scale * rng.paretovariate(2.0)
+        return base
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{','.join(str(x) for x in self.params)}"
+
+
+class Simulator:
+    """模拟服务的公共能力：延迟采样、错误注入、调用统计"""
+
+    def __init__(self, seed: int = SIM_SEED, blocking_io: bool = SIM_BLOCKING_IO):
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.blocking_io = blocking_io
+        self.latency: Dict[str, LatencyModel] = {
+            "search": LatencyModel.parse(SIM_SEARCH_LATENCY),
+            "llm_first_token": LatencyModel.parse(SIM_LLM_FIRST_TOKEN_LATENCY),
+            "llm_chunk": LatencyModel.parse(SIM_LLM_CHUNK_INTERVAL),
+            "tts": LatencyModel.parse(SIM_TTS_LATENCY),
+            "video": LatencyModel.parse(SIM_VIDEO_LATENCY),
+            "storage": LatencyModel.parse(SIM_STORAGE_LATENCY),
+        }
+        self.error_rates: Dict[str, float] = {
+            service: float(os.getenv(f"SIM_{service.upper()}_ERROR_RATE", SIM_ERROR_RATE))
+            for service in ("search", "llm", "tts", "video", "storage")
+        }
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def _sample(self, name: str) -> float:
+        with self._lock:
+            return self.latency[name].sample(self._rng)
+
+    def _check_error(self, service: str) -> None:
+        with self._lock:
+            self.calls[service] = self.calls.get(service, 0) + 1
+            failed = self._rng.random() < self.error_rates.get(service, 0.0)
+            if failed:
+                self.errors[service] = self.errors.get(service, 0) + 1
+        if failed:
+            raise APIError(f"simulated {service} error", status_code=503)
+
+    def wait(self, name: str) -> None:
+        latency = self._sample(name)
+        if latency > 0:
+            time.sleep(latency)
+
+    async def await_latency(self, name: str) -> None:
+        latency = self._sample(name)
+        if latency <= 0:
+            return
+        if self.blocking_io:
+            await asyncio.get_running_loop().run_in_executor(None, time.sleep, latency)
+        else:
+            await asyncio.sleep(latency)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {"calls": dict(self.calls), "errors": dict(self.errors)}
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _synthetic_text(seed: str, tokens: int, dialogue: bool = False) -> str:
+    """按输入哈希生成确定性的中文文本，长度约为 tokens 个 token（中文约一字一 token）"""
+    rng = random.Random(seed)
+    lines = [f"# 模拟输出 {seed[:8]}", ""]
+    length = sum(len(line) for line in lines)
+    turn = 0
+    while length < tokens:
+        sentence = "".join(rng.choice(_SENTENCES) for _ in range(3))
+        if dialogue:
+            sentence = f"{'Host A' if turn % 2 == 0 else 'Expert B'}：{sentence}"
+            turn += 1
+        lines.append(sentence)
+        length += len(sentence)
+    return "\n".join(lines)
+
+
+class SimulatedSearchClient:
+    """SearchClient 的模拟实现，按 query 返回确定性的搜索结果"""
+
+    def __init__(self, simulator: Simulator, ctx=None, **kwargs):
+        self.simulator = simulator
+        self.ctx = ctx
+
+    def search(self, query: str, search_type: str = "web", count: Optional[int] = 10, **kwargs) -> SearchResponse:
+        self.simulator.wait("search")
+        self.simulator._check_error("search")
+        items = []
+        for i in range(count or 10):
+            seed = _digest(query, str(i))
+            items.append(WebItem(
+                id=seed[:16],
+                sort_id=i,
+                title=f"模拟视频 {seed[:6]}",
+                url=f"https://www.youtube.com/watch?v={seed[:11]}",
+                snippet=_synthetic_text(seed, 60),
+                summary=_synthetic_text(seed, 150),
+                content=_synthetic_text(seed, 1200),
+                rank_score=round(1.0 - i * 0.05, 3),
+                auth_info_des="",
+                auth_info_level=0,
+            ))
+        return SearchResponse(web_items=items)
+
+
+class SimulatedChatModel(BaseChatModel):
+    """
+    模拟的 LangChain 聊天模型
+
+    与 ChatOpenAI 一样经由 BaseChatModel 的回调机制产出 token，
+    LangGraph 的 stream_mode="messages" 可以像真实模型一样逐块转发。
+    """
+
+    simulator: Any
+    max_completion_tokens: Optional[int] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated"
+
+    def _render(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = "\n".join(str(m.content) for m in messages)
+        tokens = min(SIM_LLM_OUTPUT_TOKENS, self.max_completion_tokens or SIM_LLM_OUTPUT_TOKENS)
+        text = _synthetic_text(_digest(prompt), tokens, dialogue="Host A" in prompt)
+        step = max(1, SIM_LLM_CHUNK_TOKENS)
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        content = "".join(chunk.message.content for chunk in self._stream(messages, stop, run_manager, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        self.simulator.wait("llm_first_token")
+        self.simulator._check_error("llm")
+        for index, piece in enumerate(self._render(messages)):
+            if index:
+                self.simulator.wait("llm_chunk")
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        await self.simulator.await_latency("llm_first_token")
+        self.simulator._check_error("llm")
+        for index, piece in enumerate(self._render(messages)):
+            if index:
+                await self.simulator.await_latency("llm_chunk")
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+
+class SimulatedLLMClient:
+    """LLMClient / AsyncLLMClient 的模拟实现，按消息内容生成确定性文本，支持流式分块节奏"""
+
+    def __init__(self, simulator: Simulator, ctx=None, **kwargs):
+        self.simulator = simulator
+        self.ctx = ctx
+
+    def _create_llm(self, max_completion_tokens: Optional[int]) -> SimulatedChatModel:
+        return SimulatedChatModel(simulator=self.simulator, max_completion_tokens=max_completion_tokens)
+
+    def stream(self, messages: List[BaseMessage], max_completion_tokens: Optional[int] = 32768, **kwargs) -> Iterator[BaseMessageChunk]:
+        yield from self._create_llm(max_completion_tokens).stream(messages)
+
+    def invoke(self, messages: List[BaseMessage], max_completion_tokens: Optional[int] = 32768, **kwargs) -> BaseMessage:
+        return self._create_llm(max_completion_tokens).invoke(messages)
+
+    async def astream(self, messages: List[BaseMessage], max_completion_tokens: Optional[int] = 32768, **kwargs) -> AsyncIterator[BaseMessageChunk]:
+        async for chunk in self._create_llm(max_completion_tokens).astream(messages):
+            yield chunk
+
+    async def ainvoke(self, messages: List[BaseMessage], max_completion_tokens: Optional[int] = 32768, **kwargs) -> BaseMessage:
+        return await self._create_llm(max_completion_tokens).ainvoke(messages)
+
+
+class SimulatedTTSClient:
+    """AsyncTTSClient 的模拟实现，音频字节数与文本长度成正比"""
+
+    def __init__(self, simulator: Simulator, ctx=None, **kwargs):
+        self.simulator = simulator
+        self.ctx = ctx
+
+    async def asynthesize_audio(self, uid: str, text: Optional[str] = None, ssml: Optional[str] = None, **kwargs) -> bytes:
+        await self.simulator.await_latency("tts")
+        self.simulator._check_error("tts")
+        return b"\x00" * (len(text or ssml or "") * 256)
+
+    async def asynthesize(self, uid: str, text: Optional[str] = None, ssml: Optional[str] = None, **kwargs) -> Tuple[str, int]:
+        audio = await self.asynthesize_audio(uid, text=text, ssml=ssml, **kwargs)
+        return f"{SIM_URL_PREFIX}tts/{_digest(text or ssml or '')[:16]}.mp3", len(audio)
+
+
+class SimulatedVideoGenerationClient:
+    """AsyncVideoGenerationClient 的模拟实现，任务在 SIM_VIDEO_LATENCY 后完成"""
+
+    def __init__(self, simulator: Simulator, ctx=None, **kwargs):
+        self.simulator = simulator
+        self.ctx = ctx
+
+    async def acreate_task(self, content_items, **kwargs) -> str:
+        self.simulator._check_error("video")
+        return f"sim-{uuid.uuid4().hex}"
+
+    async def await_task(self, task_id: str, max_wait_time: int = 900) -> Tuple[Optional[str], Dict, str]:
+        await self.simulator.await_latency("video")
+        video_url = f"{SIM_URL_PREFIX}video/{task_id}.mp4"
+        response = {"id": task_id, "status": "succeeded", "content": {"video_url": video_url}}
+        return video_url, response, ""
+
+    async def avideo_generation(self, content_items, max_wait_time: int = 900, **kwargs) -> Tuple[Optional[str], Dict, str]:
+        task_id = await self.acreate_task(content_items, **kwargs)
+        return await self.await_task(task_id, max_wait_time=max_wait_time)
+
+
+class SimulatedStorage:
+    """对象存储的模拟实现，只消费上传内容并返回确定性的 URL"""
+
+    def __init__(self, simulator: Simulator):
+        self.simulator = simulator
+        self._objects: Dict[str, bytes] = {}
+
+    def upload_file(self, *, file_content: bytes, file_name: str, **kwargs) -> str:
+        self.simulator.wait("storage")
+        self.simulator._check_error("storage")
+        key = f"{uuid.uuid4().hex[:8]}_{file_name}"
+        self._objects[key] = file_content
+        return key
+
+    def read_file(self, *, file_key: str, **kwargs) -> bytes:
+        self.simulator.wait("storage")
+        self.simulator._check_error("storage")
+        return self._objects[file_key]
+
+    def trunk_upload_file(self, *, chunk_iter, file_name: str, **kwargs) -> str:
+        size = sum(len(chunk) for chunk in chunk_iter)
+        self.simulator.wait("storage")
+        self.simulator._check_error("storage")
+        return f"{uuid.uuid4().hex[:8]}_{size}_{file_name}"
+
+    def generate_presigned_url(self, *, key: str, **kwargs) -> str:
+        return f"{SIM_URL_PREFIX}storage/{key}"
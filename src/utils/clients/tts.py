@@ -0,0 +1,137 @@
+import base64
+import json
+from typing import Optional, Tuple
+
+import httpx
+from coze_coding_dev_sdk import TTSClient
+from coze_coding_dev_sdk.core.exceptions import APIError, NetworkError, ValidationError
+from coze_coding_dev_sdk.voice.models import TTSConfig, TTSRequest
+from cozeloop.decorator import observe
+
+from utils.clients.base import AsyncRequestMixin
+from utils.clients.http_pool import get_http_pool
+
+
+class AsyncTTSClient(AsyncRequestMixin, TTSClient):
+    """TTSClient 的异步版本，协议与 TTSClient.synthesize 一致（SSE 分块返回音频）"""
+
+    http_pool_name = "tts"
+
+    @observe(name="tts_asynthesize")
+    async def asynthesize(
+        self,
+        uid: str,
+        text: Optional[str] = None,
+        ssml: Optional[str] = None,
+        speaker: str = TTSConfig.DEFAULT_SPEAKER,
+        audio_format: str = TTSConfig.DEFAULT_AUDIO_FORMAT,
+        sample_rate: int = TTSConfig.DEFAULT_SAMPLE_RATE,
+        speech_rate: int = TTSConfig.DEFAULT_SPEECH_RATE,
+        loudness_rate: int = TTSConfig.DEFAULT_LOUDNESS_RATE,
+    ) -> Tuple[str, int]:
+        """
+        合成音频
+
+        Returns:
+            (音频URL, 音频字节数)
+        """
+        audio_uri, audio_size, _ = await self._asynthesize(
+            uid, text, ssml, speaker, audio_format, sample_rate, speech_rate, loudness_rate, keep_audio=False
+        )
+        return audio_uri, audio_size
+
+    @observe(name="tts_asynthesize_audio")
+    async def asynthesize_audio(
+        self,
+        uid: str,
+        text: Optional[str] = None,
+        ssml: Optional[str] = None,
+        speaker: str = TTSConfig.DEFAULT_SPEAKER,
+        audio_format: str = TTSConfig.DEFAULT_AUDIO_FORMAT,
+        sample_rate: int = TTSConfig.DEFAULT_SAMPLE_RATE,
+        speech_rate: int = TTSConfig.DEFAULT_SPEECH_RATE,
+        loudness_rate: int = TTSConfig.DEFAULT_LOUDNESS_RATE,
+    ) -> bytes:
+        """
+        合成音频并返回音频字节，供多段音频拼接使用
+
+        Returns:
+            音频字节
+        """
+        _, _, audio = await self._asynthesize(
+            uid, text, ssml, speaker, audio_format, sample_rate, speech_rate, loudness_rate, keep_audio=True
+        )
+        return audio
+
+    async def _asynthesize(
+        self,
+        uid: str,
+        text: Optional[str],
+        ssml: Optional[str],
+        speaker: str,
+        audio_format: str,
+        sample_rate: int,
+        speech_rate: int,
+        loudness_rate: int,
+        keep_audio: bool,
+    ) -> Tuple[str, int, bytes]:
+        if not (text or ssml):
+            raise ValidationError("必须提供 text 或 ssml 其中之一", field="text/ssml")
+
+        request = TTSRequest(
+            uid=uid,
+            text=text,
+            ssml=ssml,
+            speaker=speaker,
+            audio_format=audio_format,
+            sample_rate=sample_rate,
+            speech_rate=speech_rate,
+            loudness_rate=loudness_rate,
+        )
+        headers = self._build_headers({"Connection": "keep-alive"})
+
+        audio_uri = None
+        audio = bytearray()
+        total_audio_size = 0
+        try:
+            async with get_http_pool().client(self.http_pool_name) as client:
+                async with client.stream(
+                    "POST",
+                    f"{self.base_url}/api/v3/tts/unidirectional",
+                    json=request.to_api_request(),
+                    headers=headers,
+                    timeout=self.config.timeout,
+                ) as response:
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+
+                        data = json.loads(line.replace("data:", ""))
+
+                        if data.get("code", 0) == 0 and "data" in data and data["data"]:
+                            chunk = base64.b64decode(data["data"])
+                            total_audio_size += len(chunk)
+                            if keep_audio:
+                                audio.extend(chunk)
+
+                        elif data.get("code", 0) == 20000000:
+                            if "url" in data and data["url"]:
+                                audio_uri = data["url"]
+                            break
+
+                        elif data.get("code", 0) > 0:
+                            raise APIError(
+                                f"合成音频失败: {data.get('message', '')}",
+                                code=str(data.get("code", 0)),
+                            )
+
+            return audio_uri or "", total_audio_size, bytes(audio)
+
+        except httpx.HTTPError as e:
+            raise NetworkError(str(e), e)
+        except json.JSONDecodeError as e:
+            raise APIError(f"响应解析失败: {str(e)}")
+        except APIError:
+            raise
+        except Exception as e:
+            raise APIError(f"合成异常: {str(e)}")
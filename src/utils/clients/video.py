@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from coze_coding_dev_sdk.core.exceptions import APIError
+from coze_coding_dev_sdk.video import VideoGenerationClient
+from coze_coding_dev_sdk.video.models import ImageURLContent, TextContent
+from cozeloop.decorator import observe
+
+from utils.clients.base import AsyncRequestMixin
+
+logger = logging.getLogger(__name__)
+
+# 任务状态轮询间隔（秒），与 SDK 同步实现保持一致
+POLL_INTERVAL = 5
+# 创建任务的最大重试次数
+CREATE_MAX_RETRIES = 3
+
+
+class AsyncVideoGenerationClient(AsyncRequestMixin, VideoGenerationClient):
+    """
+    VideoGenerationClient 的原生异步版本
+
+    SDK 自带的 video_generation_async 只是把同步实现丢进线程池，
+    这里的创建任务与状态轮询都直接在事件循环上完成，等待期间不占用线程。
+    """
+
+    http_pool_name = "video"
+
+    async def acreate_task(
+        self,
+        content_items: List[Union[TextContent, ImageURLContent]],
+        callback_url: Optional[str] = None,
+        return_last_frame: Optional[bool] = False,
+        model: str = "doubao-seedance-1-5-pro-251215",
+        resolution: Optional[str] = "720p",
+        ratio: Optional[str] = "16:9",
+        duration: Optional[int] = 5,
+        watermark: Optional[bool] = True,
+        seed: Optional[int] = None,
+        camerafixed: Optional[bool] = False,
+        generate_audio: Optional[bool] = True,
+    ) -> str:
+        """提交视频生成任务，返回任务ID"""
+        request_data = {
+            "model": model,
+            "content": [item.model_dump() for item in content_items],
+        }
+
+        if callback_url:
+            request_data["callback_url"] = callback_url
+        if return_last_frame:
+            request_data["return_last_frame"] = return_last_frame
+        if resolution is not None:
+            request_data["resolution"] = resolution
+        if ratio is not None:
+            request_data["ratio"] = ratio
+        if duration is not None:
+            if duration < 4 or duration > 12:
+                # 兜底策略，与 SDK 一致
+                duration = -1
+            request_data["duration"] = duration
+        if watermark is not None:
+            request_data["watermark"] = watermark
+        if seed is not None:
+            request_data["seed"] = seed
+        if camerafixed is not None:
+            request_data["camerafixed"] = camerafixed
+        if generate_audio is not None:
+            request_data["generate_audio"] = generate_audio
+
+        retry_count = 0
+        while True:
+            try:
+                response = await self._arequest(
+                    method="POST",
+                    url=f"{self.base_url}/api/v3/contents/generations/tasks",
+                    json=request_data,
+                )
+                task_id = response.get("id")
+                if not task_id:
+                    raise APIError("创建视频生成任务失败：响应中缺少任务ID")
+
+                logger.info(f"视频生成任务创建成功，任务ID: {task_id}")
+                return task_id
+
+            except APIError as e:
+                retry_count += 1
+                error_msg = str(e)
+                logger.error(f"创建视频生成任务失败（尝试 {retry_count}/{CREATE_MAX_RETRIES}）: {error_msg}")
+
+                if retry_count >= CREATE_MAX_RETRIES:
+                    raise APIError(f"创建视频生成任务失败，已重试{CREATE_MAX_RETRIES}次: {error_msg}")
+
+                if "rate limit" in error_msg.lower() or "429" in error_msg:
+                    await asyncio.sleep(min(2 ** retry_count, 10))
+                elif "timeout" in error_msg.lower():
+                    await asyncio.sleep(2)
+                else:
+                    raise
+
+    async def aget_task(self, task_id: str) -> Dict:
+        """查询视频生成任务，返回原始响应数据"""
+        return await self._arequest(
+            method="GET",
+            url=f"{self.base_url}/api/v3/contents/generations/tasks/{task_id}",
+        )
+
+    async def await_task(
+        self, task_id: str, max_wait_time: int = 900
+    ) -> Tuple[Optional[str], Dict, str]:
+        """
+        轮询等待任务结束
+
+        Returns:
+            (视频URL, 完整响应数据字典, 尾帧图像URL)，任务被取消时视频URL为 None
+        """
+        start_time = time.time()
+
+        while time.time() - start_time < max_wait_time:
+            try:
+                response = await self.aget_task(task_id)
+            except APIError as e:
+                error_msg = str(e)
+                logger.error(f"查询任务状态失败，任务ID: {task_id}, 错误: {error_msg}")
+                if "not found" in error_msg.lower() or "404" in error_msg:
+                    raise APIError(f"任务不存在或已过期，任务ID: {task_id}")
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+
+            status = response.get("status")
+            if status == "succeeded":
+                video_url = response.get("content", {}).get("video_url")
+                last_frame_url = response.get("content", {}).get("last_frame_url", "")
+                if not video_url:
+                    raise APIError(f"视频生成成功但响应中缺少视频URL，任务ID: {task_id}")
+                logger.info(f"视频生成成功，任务ID: {task_id}, 视频URL: {video_url}")
+                return video_url, response, last_frame_url
+
+            if status == "failed":
+                error_message = response.get("error_message", "未知错误")
+                logger.error(f"视频生成失败，任务ID: {task_id}, 错误: {error_message}")
+                raise APIError(f"视频生成失败: {error_message}")
+
+            if status == "cancelled":
+                logger.warning(f"视频生成任务被取消，任务ID: {task_id}")
+                return None, response, ""
+
+            if status not in ["queued", "running"]:
+                logger.warning(f"未知的任务状态: {status}，任务ID: {task_id}")
+            await asyncio.sleep(POLL_INTERVAL)
+
+        elapsed_time = int(time.time() - start_time)
+        logger.error(f"视频生成超时，任务ID: {task_id}, 已等待: {elapsed_time}秒")
+        raise APIError(f"视频生成超时，已等待 {elapsed_time} 秒，任务ID: {task_id}")
+
+    @observe(name="video_ageneration")
+    async def avideo_generation(
+        self,
+        content_items: List[Union[TextContent, ImageURLContent]],
+        callback_url: Optional[str] = None,
+        return_last_frame: Optional[bool] = False,
+        model: str = "doubao-seedance-1-5-pro-251215",
+        max_wait_time: int = 900,
+        resolution: Optional[str] = "720p",
+        ratio: Optional[str] = "16:9",
+        duration: Optional[int] = 5,
+        watermark: Optional[bool] = True,
+        seed: Optional[int] = None,
+        camerafixed: Optional[bool] = False,
+        generate_audio: Optional[bool] = True,
+    ) -> Tuple[Optional[str], Dict, str]:
+        """视频生成（提交任务并等待完成），参数与返回值同 VideoGenerationClient.video_generation"""
+        task_id = await self.acreate_task(
+            content_items=content_items,
+            callback_url=callback_url,
+            return_last_frame=return_last_frame,
+            model=model,
+            resolution=resolution,
+            ratio=ratio,
+            duration=duration,
+            watermark=watermark,
+            seed=seed,
+            camerafixed=camerafixed,
+            generate_audio=generate_audio,
+        )
+        return await self.await_task(task_id, max_wait_time=max_wait_time)
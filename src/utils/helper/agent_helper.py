@@ -1,8 +1,9 @@
 import uuid
 import json
 import os
-from typing import Any, Dict, List, Tuple, Iterator
+from typing import Any, AsyncIterator, Dict, List, Tuple, Iterator
 import time
+from dataclasses import dataclass, field
 from utils.file.file import File, FileOps, infer_file_category
 from utils.error import classify_error
 
@@ -22,14 +23,72 @@ from utils.messages.server import (
     MessageStartDetail,
     MessageEndDetail,
     TokenCost,
+    NodeUpdateDetail,
     MESSAGE_TYPE_MESSAGE_START,
     MESSAGE_TYPE_MESSAGE_END,
     MESSAGE_END_CODE_SUCCESS,
     MESSAGE_TYPE_ANSWER,
+    MESSAGE_TYPE_THINKING,
     MESSAGE_TYPE_TOOL_REQUEST,
     MESSAGE_TYPE_TOOL_RESPONSE,
+    MESSAGE_TYPE_NODE_UPDATE,
 )
 
+# 工作流流式输出中，完成时推送 node_update 事件的节点（逗号分隔）
+STREAM_UPDATE_NODES = frozenset(
+    n.strip() for n in os.getenv(
+        "STREAM_UPDATE_NODES", "video_recreation,learning_guide,podcast_script,video_pipeline,result_summary"
+    ).split(",") if n.strip()
+)
+# 流式接口是否在事件循环上直接消费 graph.astream；false 时沿用每个请求一个线程驱动同步流的方式
+STREAM_NATIVE_ASYNC = os.getenv("STREAM_NATIVE_ASYNC", "true").lower() == "true"
+
+
+@dataclass
+class NodeUpdate:
+    """updates 流中某个节点完成时的输出"""
+    node_name: str
+    output: Dict[str, Any] = field(default_factory=dict)
+    namespace: str = ""
+
+
+
+class ServerMessageCoalescer:
+    """
+    合并同一条流式消息（answer / thinking）的连续增量，供 StreamBuffer 的 coalesce 策略使用
+
+    消息为 ServerMessage.dict()。每合并掉一条，之后进入缓冲区的消息 sequence_id 减一，客户端看到的序号仍然连续。
+    """
+
+    _TEXT_FIELDS = {MESSAGE_TYPE_ANSWER: "answer", MESSAGE_TYPE_THINKING: "thinking"}
+
+    def __init__(self):
+        self.shift = 0
+
+    def key(self, item: Any) -> Any:
+        return item.get("msg_id") if isinstance(item, dict) else None
+
+    def renumber(self, item: Any) -> Any:
+        if self.shift and isinstance(item, dict) and "sequence_id" in item:
+            item["sequence_id"] -= self.shift
+        return item
+
+    def merge(self, prev: Any, item: Any) -> Any:
+        if not isinstance(prev, dict) or not isinstance(item, dict):
+            return None
+        text_field = self._TEXT_FIELDS.get(item.get("type"))
+        if (
+            text_field is None
+            or prev.get("type") != item.get("type")
+            or prev.get("finish")
+            or prev.get("msg_id") != item.get("msg_id")
+            or prev.get("node_name") != item.get("node_name")
+        ):
+            return None
+        prev["content"][text_field] = (prev["content"].get(text_field) or "") + (item["content"].get(text_field) or "")
+        prev["finish"] = item.get("finish")
+        self.shift += 1
+        return prev
 
 def to_stream_input(msg: ClientMessage) -> Dict[str, Any]:
     content_parts = []
@@ -199,6 +258,7 @@ def _item_to_server_messages(
             finish=finish,
             content=content,
             log_id=log_id,
+            node_name=(meta or {}).get("langgraph_node", ""),
         )
 
     seq = sequence_id_start
@@ -278,31 +338,41 @@ def _item_to_server_messages(
     return messages
 
 
-def _iter_body_to_server_messages(
-        items: Iterator[Dict[Any, Dict[str, Any]]],
-        *,
-        session_id: str,
-        query_msg_id: str,
-        reply_id: str,
-        sequence_id_start: int = 1,
-        log_id: str = "",
-) -> Iterator[ServerMessage]:
-    seq = sequence_id_start
-    # Stable msg_id mapping per logical message stream
-    # Keys are derived from meta to keep same msg_id across chunks
-    stable_ids: Dict[Tuple[str, Any], str] = {}
-
-    accumulated_tool_chunks: List[Any] = []
-    accumulated_tool_response_content: Dict[str, str] = {}
-
-    def _flush_tool_chunks(seq_num: int) -> Tuple[List[ServerMessage], int]:
-        nonlocal accumulated_tool_chunks
+class _BodyConverter:
+    """
+    把流式条目逐个转换为 ServerMessage
+
+    保存跨条目的状态（sequence_id、工具调用分片、msg_id 分组），
+    同步迭代（iter_server_messages）与异步迭代（aiter_server_messages）共用。
+    """
+
+    def __init__(
+            self,
+            *,
+            session_id: str,
+            query_msg_id: str,
+            reply_id: str,
+            sequence_id_start: int = 1,
+            log_id: str = "",
+    ):
+        self.session_id = session_id
+        self.query_msg_id = query_msg_id
+        self.reply_id = reply_id
+        self.log_id = log_id
+        self.seq = sequence_id_start
+        # Stable msg_id mapping per logical message stream
+        # Keys are derived from meta to keep same msg_id across chunks
+        self.stable_ids: Dict[Tuple[str, Any], str] = {}
+        self.accumulated_tool_chunks: List[Any] = []
+        self.accumulated_tool_response_content: Dict[str, str] = {}
+
+    def _flush_tool_chunks(self, seq_num: int) -> Tuple[List[ServerMessage], int]:
         msgs: List[ServerMessage] = []
-        if not accumulated_tool_chunks:
+        if not self.accumulated_tool_chunks:
             return msgs, seq_num
 
-        merged_tcs = _merge_tool_call_chunks(accumulated_tool_chunks)
-        accumulated_tool_chunks = []
+        merged_tcs = _merge_tool_call_chunks(self.accumulated_tool_chunks)
+        self.accumulated_tool_chunks = []
         for tc in merged_tcs:
             raw_args = tc.get("args", {})
             if isinstance(raw_args, str):
@@ -327,20 +397,42 @@ def _iter_body_to_server_messages(
             msgs.append(
                 ServerMessage(
                     type=MESSAGE_TYPE_TOOL_REQUEST,
-                    session_id=session_id,
-                    query_msg_id=query_msg_id,
-                    reply_id=reply_id,
+                    session_id=self.session_id,
+                    query_msg_id=self.query_msg_id,
+                    reply_id=self.reply_id,
                     msg_id=str(uuid.uuid4()),
                     sequence_id=seq_num,
                     finish=True,
                     content=content,
-                    log_id=log_id,
+                    log_id=self.log_id,
                 )
             )
             seq_num += 1
         return msgs, seq_num
 
-    for item in items:
+    def convert(self, item: Any) -> List[ServerMessage]:
+        """转换一个流式条目，返回 0 到多条按 sequence_id 连续编号的消息"""
+        session_id, query_msg_id, reply_id, log_id = self.session_id, self.query_msg_id, self.reply_id, self.log_id
+        seq = self.seq
+
+        # 节点完成事件：各分支一结束即推送其输出，不等待其余分支
+        if isinstance(item, NodeUpdate):
+            self.seq = seq + 1
+            return [ServerMessage(
+                type=MESSAGE_TYPE_NODE_UPDATE,
+                session_id=session_id,
+                query_msg_id=query_msg_id,
+                reply_id=reply_id,
+                msg_id=str(uuid.uuid4()),
+                sequence_id=seq,
+                finish=True,
+                content=ServerMessageContent(
+                    node_update=NodeUpdateDetail(node_name=item.node_name, namespace=item.namespace, output=item.output)
+                ),
+                log_id=log_id,
+                node_name=item.node_name,
+            )]
+
         chunk, meta = item
         chunk_type = chunk.__class__.__name__
         is_last = (meta or {}).get("chunk_position") == "last"
@@ -361,24 +453,24 @@ def _iter_body_to_server_messages(
         # because usually tool calls and text content are either separate or tool calls come first.
         # But let's be safe: only flush on ToolMessage or if is_last=True on AIMessageChunk.
 
-        if chunk_type == "ToolMessage" and accumulated_tool_chunks:
-            f_msgs, seq = _flush_tool_chunks(seq)
+        if chunk_type == "ToolMessage" and self.accumulated_tool_chunks:
+            f_msgs, seq = self._flush_tool_chunks(seq)
             flushed_msgs.extend(f_msgs)
 
         # 1. Handle AIMessageChunk with tool_call_chunks (Streaming Tool Request)
         if chunk_type == "AIMessageChunk":
             tc_chunks = getattr(chunk, "tool_call_chunks", None)
             if tc_chunks:
-                accumulated_tool_chunks.extend(tc_chunks)
+                self.accumulated_tool_chunks.extend(tc_chunks)
             # If we have accumulated chunks but this chunk has NO tool_call_chunks,
             # it implies the tool definition phase is likely over.
-            elif accumulated_tool_chunks:
-                f_msgs, seq = _flush_tool_chunks(seq)
+            elif self.accumulated_tool_chunks:
+                f_msgs, seq = self._flush_tool_chunks(seq)
                 flushed_msgs.extend(f_msgs)
 
             # Flush if this is the last chunk
-            if is_last and accumulated_tool_chunks:
-                f_msgs, seq = _flush_tool_chunks(seq)
+            if is_last and self.accumulated_tool_chunks:
+                f_msgs, seq = self._flush_tool_chunks(seq)
                 flushed_msgs.extend(f_msgs)
 
         # 2. Handle ToolMessage (Tool Response)
@@ -393,12 +485,12 @@ def _iter_body_to_server_messages(
                 full_result = result
                 should_emit = True
             else:
-                if tcid not in accumulated_tool_response_content:
-                    accumulated_tool_response_content[tcid] = ""
-                accumulated_tool_response_content[tcid] += str(result)
+                if tcid not in self.accumulated_tool_response_content:
+                    self.accumulated_tool_response_content[tcid] = ""
+                self.accumulated_tool_response_content[tcid] += str(result)
 
                 if is_last:
-                    full_result = accumulated_tool_response_content.pop(tcid)
+                    full_result = self.accumulated_tool_response_content.pop(tcid)
                     should_emit = True
 
             if should_emit:
@@ -455,7 +547,7 @@ def _iter_body_to_server_messages(
             final_msgs = flushed_msgs + msgs_to_yield
             msgs_to_yield = final_msgs
 
-
+        self.seq = seq
         for m in msgs_to_yield:
             # Derive a stable grouping base for this item
             group_base = (
@@ -481,34 +573,42 @@ def _iter_body_to_server_messages(
             else:
                 key = (m.type, group_base)
 
-            if key not in stable_ids:
-                stable_ids[key] = str(uuid.uuid4())
-            m.msg_id = stable_ids[key]
-
-            yield m
+            if key not in self.stable_ids:
+                self.stable_ids[key] = str(uuid.uuid4())
+            m.msg_id = self.stable_ids[key]
+        return msgs_to_yield
 
 
-def iter_server_messages(
+def _iter_body_to_server_messages(
         items: Iterator[Dict[Any, Dict[str, Any]]],
         *,
         session_id: str,
         query_msg_id: str,
-        local_msg_id: str,
-        run_id: str,
+        reply_id: str,
         sequence_id_start: int = 1,
-        log_id: str,
+        log_id: str = "",
 ) -> Iterator[ServerMessage]:
-    t0 = time.time()
-    reply_id = str(uuid.uuid4())
-    start_msg_id = str(uuid.uuid4())
-    # message_start
-    start_sm = ServerMessage(
+    converter = _BodyConverter(
+        session_id=session_id,
+        query_msg_id=query_msg_id,
+        reply_id=reply_id,
+        sequence_id_start=sequence_id_start,
+        log_id=log_id,
+    )
+    for item in items:
+        yield from converter.convert(item)
+
+
+def _message_start(
+        *, session_id: str, query_msg_id: str, reply_id: str, local_msg_id: str, run_id: str, sequence_id: int, log_id: str
+) -> ServerMessage:
+    return ServerMessage(
         type=MESSAGE_TYPE_MESSAGE_START,
         session_id=session_id,
         query_msg_id=query_msg_id,
         reply_id=reply_id,
-        msg_id=start_msg_id,
-        sequence_id=sequence_id_start,
+        msg_id=str(uuid.uuid4()),
+        sequence_id=sequence_id,
         finish=True,
         content=ServerMessageContent(
             message_start=MessageStartDetail(
@@ -517,67 +617,124 @@ def iter_server_messages(
         ),
         log_id=log_id,
     )
-    yield start_sm
-    next_seq = sequence_id_start + 1
-    last_seq = sequence_id_start
+
+
+def _message_end(
+        *, session_id: str, query_msg_id: str, reply_id: str, sequence_id: int, log_id: str, t0: float,
+        code: str = MESSAGE_END_CODE_SUCCESS, message: str = "",
+) -> ServerMessage:
+    return ServerMessage(
+        type=MESSAGE_TYPE_MESSAGE_END,
+        session_id=session_id,
+        query_msg_id=query_msg_id,
+        reply_id=reply_id,
+        msg_id=str(uuid.uuid4()),
+        sequence_id=sequence_id,
+        finish=True,
+        content=ServerMessageContent(
+            message_end=MessageEndDetail(
+                code=code,
+                message=message,
+                token_cost=TokenCost(input_tokens=0, output_tokens=0, total_tokens=0),
+                time_cost_ms=int((time.time() - t0) * 1000),
+            )
+        ),
+        log_id=log_id,
+    )
+
+
+def iter_server_messages(
+        items: Iterator[Dict[Any, Dict[str, Any]]],
+        *,
+        session_id: str,
+        query_msg_id: str,
+        local_msg_id: str,
+        run_id: str,
+        sequence_id_start: int = 1,
+        log_id: str,
+) -> Iterator[ServerMessage]:
+    t0 = time.time()
+    reply_id = str(uuid.uuid4())
+    ids = dict(session_id=session_id, query_msg_id=query_msg_id, reply_id=reply_id, log_id=log_id)
+    # message_start
+    yield _message_start(**ids, local_msg_id=local_msg_id, run_id=run_id, sequence_id=sequence_id_start)
+    converter = _BodyConverter(**ids, sequence_id_start=sequence_id_start + 1)
     try:
         # body stream
-        for sm in _iter_body_to_server_messages(
-                items,
-                session_id=session_id,
-                query_msg_id=query_msg_id,
-                reply_id=reply_id,
-                sequence_id_start=next_seq,
-                log_id=log_id,
-        ):
-            yield sm
-            last_seq = sm.sequence_id
-
+        for item in items:
+            yield from converter.convert(item)
         # message_end
-        t_ms = int((time.time() - t0) * 1000)
-        end_sm = ServerMessage(
-            type=MESSAGE_TYPE_MESSAGE_END,
-            session_id=session_id,
-            query_msg_id=query_msg_id,
-            reply_id=reply_id,
-            msg_id=str(uuid.uuid4()),
-            sequence_id=last_seq + 1,
-            finish=True,
-            content=ServerMessageContent(
-                message_end=MessageEndDetail(
-                    code=MESSAGE_END_CODE_SUCCESS,
-                    message="",
-                    token_cost=TokenCost(input_tokens=0, output_tokens=0, total_tokens=0),
-                    time_cost_ms=t_ms,
-                )
-            ),
-            log_id=log_id,
-        )
-        yield end_sm
+        yield _message_end(**ids, sequence_id=converter.seq, t0=t0)
     except Exception as ex:
         # 使用错误分类器获取错误码
         err = classify_error(ex, {"node_name": "stream"})
-        # message_end
-        t_ms = int((time.time() - t0) * 1000)
-        end_sm = ServerMessage(
-            type=MESSAGE_TYPE_MESSAGE_END,
-            session_id=session_id,
-            query_msg_id=query_msg_id,
-            reply_id=reply_id,
-            msg_id=str(uuid.uuid4()),
-            sequence_id=last_seq + 1,
-            finish=True,
-            content=ServerMessageContent(
-                message_end=MessageEndDetail(
-                    code=str(err.code),
-                    message=err.message,
-                    time_cost_ms=t_ms,
-                    token_cost=TokenCost(input_tokens=0, output_tokens=0, total_tokens=0),
-                )
-            ),
-            log_id=log_id,
-        )
-        yield end_sm
+        yield _message_end(**ids, sequence_id=converter.seq, t0=t0, code=str(err.code), message=err.message)
+
+
+async def aiter_server_messages(
+        items: AsyncIterator[Any],
+        *,
+        session_id: str,
+        query_msg_id: str,
+        local_msg_id: str,
+        run_id: str,
+        sequence_id_start: int = 1,
+        log_id: str,
+) -> AsyncIterator[ServerMessage]:
+    """iter_server_messages 的异步版本：直接消费 graph.astream，消息编号与结束消息完全一致"""
+    t0 = time.time()
+    reply_id = str(uuid.uuid4())
+    ids = dict(session_id=session_id, query_msg_id=query_msg_id, reply_id=reply_id, log_id=log_id)
+    yield _message_start(**ids, local_msg_id=local_msg_id, run_id=run_id, sequence_id=sequence_id_start)
+    converter = _BodyConverter(**ids, sequence_id_start=sequence_id_start + 1)
+    try:
+        async for item in items:
+            for sm in converter.convert(item):
+                yield sm
+        yield _message_end(**ids, sequence_id=converter.seq, t0=t0)
+    except Exception as ex:
+        err = classify_error(ex, {"node_name": "stream"})
+        yield _message_end(**ids, sequence_id=converter.seq, t0=t0, code=str(err.code), message=err.message)
+
+
+def _workflow_stream_items(namespace: Tuple[str, ...], mode: str, data: Any, update_nodes: frozenset) -> Iterator[Any]:
+    if mode == "messages":
+        yield data
+    elif mode == "updates" and isinstance(data, dict):
+        for node_name, output in data.items():
+            if node_name not in update_nodes:
+                continue
+            if hasattr(output, "model_dump"):
+                output = output.model_dump()
+            yield NodeUpdate(
+                node_name=node_name,
+                output=output if isinstance(output, dict) else {"value": output},
+                namespace="/".join(namespace),
+            )
+
+
+def iter_workflow_stream_items(
+        items: Iterator[Tuple[Tuple[str, ...], str, Any]],
+        update_nodes: frozenset = STREAM_UPDATE_NODES,
+) -> Iterator[Any]:
+    """
+    转换 graph.astream(stream_mode=["messages", "updates"], subgraphs=True) 的输出
+
+    messages 流的 (chunk, meta) 原样输出；updates 流中 update_nodes 内的节点输出转换为 NodeUpdate，
+    两者按到达顺序交错，供 iter_server_messages 统一编号。
+    """
+    for namespace, mode, data in items:
+        yield from _workflow_stream_items(namespace, mode, data, update_nodes)
+
+
+async def aiter_workflow_stream_items(
+        items: AsyncIterator[Tuple[Tuple[str, ...], str, Any]],
+        update_nodes: frozenset = STREAM_UPDATE_NODES,
+) -> AsyncIterator[Any]:
+    """iter_workflow_stream_items 的异步版本"""
+    async for namespace, mode, data in items:
+        for item in _workflow_stream_items(namespace, mode, data, update_nodes):
+            yield item
 
 
 def agent_iter_server_messages(
@@ -598,3 +755,23 @@ def agent_iter_server_messages(
         sequence_id_start=1,
         log_id=log_id,
     )
+
+
+def agent_aiter_server_messages(
+        items: AsyncIterator[Any],
+        *,
+        session_id: str,
+        query_msg_id: str,
+        local_msg_id: str,
+        run_id: str,
+        log_id: str,
+) -> AsyncIterator[ServerMessage]:
+    return aiter_server_messages(
+        items,
+        session_id=session_id,
+        query_msg_id=query_msg_id,
+        local_msg_id=local_msg_id,
+        run_id=run_id,
+        sequence_id_start=1,
+        log_id=log_id,
+    )
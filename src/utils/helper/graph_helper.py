@@ -1,12 +1,14 @@
 import os
+import asyncio
 import inspect
 import importlib
 import ast
 import textwrap
 from pydantic import BaseModel
-from typing import get_type_hints,Type,Optional,get_origin,Union,get_args
+from typing import get_type_hints,Type,Optional,get_origin,Union,get_args,Any,Iterator
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.graph import START, END
+from utils.clients.http_pool import get_http_pool
 
 
 def get_graph_instance(module_name):
@@ -20,31 +22,71 @@ def get_agent_instance(module_name, ctx):
     module = importlib.import_module(module_name)
     return module.build_agent(ctx)
 
-# return: func, input_class, output_class
-def get_graph_node_func_with_inout(graph, node_name):
+def iter_graph_node_funcs(graph) -> Iterator[Any]:
+    """遍历图中的业务节点，返回 (node_id, 节点函数)；graph 为 get_graph() 的结果"""
     for node_id, node in graph.nodes.items():
-        if node_id == START or node_id == END:
+        if node_id == START or node_id == END or not node.data:
             continue
+        # 异步节点的 RunnableCallable 只有 afunc
+        _func = getattr(node.data, "func", None) or getattr(node.data, "afunc", None)
+        if _func is not None:
+            yield node_id, _func
 
-        if node.data:
-            _func = node.data.func
-            if _func.__name__ != node_name:
-                continue
+# return: func, input_class, output_class
+def get_graph_node_func_with_inout(graph, node_name):
+    for _, _func in iter_graph_node_funcs(graph):
+        if _func.__name__ != node_name:
+            continue
 
-            # 获取函数签名
-            sig = inspect.signature(_func)
-            # 获取参数列表
-            params = list(sig.parameters.values())
-            input_cls = None
-            if params:
-                input_cls = params[0].annotation
+        # 获取函数签名
+        sig = inspect.signature(_func)
+        # 获取参数列表
+        params = list(sig.parameters.values())
+        input_cls = None
+        if params:
+            input_cls = params[0].annotation
 
-            output_cls = ParamExtractHelper.get_concrete_return_class(_func)
+        output_cls = ParamExtractHelper.get_concrete_return_class(_func)
 
-            return _func, input_cls, output_cls
+        return _func, input_cls, output_cls
 
     return None, None, None
 
+def iter_graph_stream(graph, stream_input, **kwargs) -> Iterator[Any]:
+    """
+    在非事件循环线程中同步迭代 graph.astream
+
+    图中包含 async 节点时 graph.stream 无法执行，后台线程生产者通过本函数驱动原生异步流，
+    参数与 graph.astream 一致。
+    挂载的 checkpointer 绑定了服务的事件循环（AsyncPostgresSaver）时，流在该事件循环上驱动。
+    """
+    saver_loop = getattr(getattr(graph, "checkpointer", None), "loop", None)
+    if isinstance(saver_loop, asyncio.AbstractEventLoop) and saver_loop.is_running():
+        items = graph.astream(stream_input, **kwargs)
+        try:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(items.__anext__(), saver_loop).result()
+                except StopAsyncIteration:
+                    break
+        finally:
+            asyncio.run_coroutine_threadsafe(items.aclose(), saver_loop).result()
+        return
+
+    loop = asyncio.new_event_loop()
+    items = graph.astream(stream_input, **kwargs)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(items.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(items.aclose())
+        loop.run_until_complete(get_http_pool().aclose())  # 本事件循环上的共享连接随之关闭
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
 def is_agent_proj() -> bool:
     return os.getenv("COZE_PROJECT_TYPE", "workflow") == "agent"
 
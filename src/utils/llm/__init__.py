@@ -0,0 +1,38 @@
+"""LLM 节点通用能力"""
+
+from utils.llm.config_registry import (
+    LLMConfigEntry,
+    LLMConfigRegistry,
+    get_llm_config,
+    get_llm_config_registry,
+)
+from utils.llm.content import get_text_content
+from utils.llm.hedge import (
+    HedgedLLMClient,
+    LatencyTracker,
+    get_latency_tracker,
+    remaining_budget,
+    set_run_deadline,
+)
+from utils.llm.prompt_budget import LLM_CONTEXT_WINDOW, PromptFit, fit_prompt
+from utils.llm.tokens import count_tokens, count_tokens_cached, split_by_tokens, truncate_to_tokens
+
+__all__ = [
+    "LLMConfigEntry",
+    "LLMConfigRegistry",
+    "get_llm_config",
+    "get_llm_config_registry",
+    "get_text_content",
+    "HedgedLLMClient",
+    "LatencyTracker",
+    "get_latency_tracker",
+    "remaining_budget",
+    "set_run_deadline",
+    "LLM_CONTEXT_WINDOW",
+    "PromptFit",
+    "fit_prompt",
+    "count_tokens",
+    "count_tokens_cached",
+    "split_by_tokens",
+    "truncate_to_tokens",
+]
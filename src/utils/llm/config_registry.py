@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from jinja2 import Template
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LLMConfigEntry:
+    """解析后的 LLM 配置文件（config/*_cfg.json）"""
+    path: str  # 配置文件绝对路径
+    mtime_ns: int  # 加载时文件的修改时间，用于失效判断
+    model_config: Dict[str, Any] = field(default_factory=dict)  # 模型参数
+    sp: str = ""  # 系统提示词
+    up: str = ""  # 用户提示词模板原文
+    up_template: Optional[Template] = None  # 编译后的用户提示词模板
+
+    def render_up(self, variables: Dict[str, Any]) -> str:
+        """渲染用户提示词"""
+        return self.up_template.render(variables)
+
+
+class LLMConfigRegistry:
+    """
+    进程级 LLM 配置注册表
+
+    按文件路径缓存解析后的配置和编译后的 Jinja 模板，文件 mtime 变化时自动重新加载，
+    节点每次调用只需一次 stat，不再重复 open/json.load/Template 编译。
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, LLMConfigEntry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    @staticmethod
+    def resolve_path(cfg_path: str) -> str:
+        """相对路径基于 COZE_WORKSPACE_PATH 解析"""
+        if os.path.isabs(cfg_path):
+            return cfg_path
+        return os.path.abspath(os.path.join(os.getenv("COZE_WORKSPACE_PATH", ""), cfg_path))
+
+    def get(self, cfg_path: str) -> LLMConfigEntry:
+        path = self.resolve_path(cfg_path)
+        mtime_ns = os.stat(path).st_mtime_ns
+
+        entry = self._entries.get(path)
+        if entry is not None and entry.mtime_ns == mtime_ns:
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            # 双重检查，避免并发时重复加载
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime_ns == mtime_ns:
+                self.hits += 1
+                return entry
+
+            entry = self._load(path, mtime_ns)
+            self._entries[path] = entry
+            self.loads += 1
+            return entry
+
+    @staticmethod
+    def _load(path: str, mtime_ns: int) -> LLMConfigEntry:
+        with open(path, 'r', encoding='utf-8') as fd:
+            llm_cfg = json.load(fd)
+
+        up = llm_cfg.get("up", "")
+        logger.info(f"LLM config loaded: {path}")
+        return LLMConfigEntry(
+            path=path,
+            mtime_ns=mtime_ns,
+            model_config=llm_cfg.get("config", {}),
+            sp=llm_cfg.get("sp", ""),
+            up=up,
+            up_template=Template(up),
+        )
+
+    def invalidate(self, cfg_path: Optional[str] = None) -> None:
+        """清除指定配置或全部配置的缓存"""
+        with self._lock:
+            if cfg_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self.resolve_path(cfg_path), None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "loads": self.loads}
+
+
+_llm_config_registry: Optional[LLMConfigRegistry] = None
+
+
+def get_llm_config_registry() -> LLMConfigRegistry:
+    global _llm_config_registry
+    if _llm_config_registry is None:
+        _llm_config_registry = LLMConfigRegistry()
+    return _llm_config_registry
+
+
+def get_llm_config(cfg_path: str) -> LLMConfigEntry:
+    """获取 LLM 配置，cfg_path 通常为节点 metadata 中的 llm_cfg"""
+    return get_llm_config_registry().get(cfg_path)
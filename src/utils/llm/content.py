@@ -0,0 +1,18 @@
+from typing import Any
+
+
+def get_text_content(content: Any) -> str:
+    """安全提取 LLM 消息（含流式分片）中的文本内容"""
+    if isinstance(content, str):
+        return content
+    elif isinstance(content, list):
+        if content and isinstance(content[0], str):
+            return " ".join(content)
+        else:
+            text_parts = [
+                item.get("text", "")
+                for item in content
+                if isinstance(item, dict) and item.get("type") == "text"
+            ]
+            return " ".join(text_parts)
+    return str(content)
@@ -0,0 +1,375 @@
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackHandler, BaseCallbackHandler, BaseCallbackManager
+from langchain_core.callbacks.manager import ahandle_event
+from langchain_core.runnables.config import var_child_runnable_config
+
+logger = logging.getLogger(__name__)
+
+# 是否开启对冲请求：主请求超过阈值仍未返回时再发一次，取先返回者（默认关闭，开启后会额外消耗 LLM 配额）
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+# 对冲阈值取该节点近期延迟的分位数
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+# 样本数达到该值后才使用分位数阈值，之前使用 LLM_HEDGE_INITIAL_DELAY
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# 样本不足时的对冲等待时间（秒）
+LLM_HEDGE_INITIAL_DELAY = float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "10"))
+# 对冲等待时间下限（秒），避免延迟很低时频繁重复请求
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))
+# 每个节点保留的最近延迟样本数
+LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+# 单次调用的最多请求数（含主请求）
+LLM_HEDGE_MAX_ATTEMPTS = int(os.getenv("LLM_HEDGE_MAX_ATTEMPTS", "2"))
+# 运行截止前为下游节点（结果汇总等）预留的时间（秒）
+LLM_DEADLINE_RESERVE_SECONDS = float(os.getenv("LLM_DEADLINE_RESERVE_SECONDS", "30"))
+
+# 流式响应没有任何分块时首个分块的取值
+_EMPTY_STREAM = object()
+
+# 当前运行的截止时间（time.monotonic），由 GraphService 在运行开始时设置
+run_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("run_deadline", default=None)
+
+
+def set_run_deadline(budget_seconds: float) -> float:
+    """设置当前运行的截止时间，需在创建图运行任务之前调用"""
+    deadline = time.monotonic() + budget_seconds
+    run_deadline.set(deadline)
+    return deadline
+
+
+def remaining_budget() -> Optional[float]:
+    """当前节点可用的剩余时间（秒），扣除为下游预留的时间；未设置截止时间时返回 None"""
+    deadline = run_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic() - LLM_DEADLINE_RESERVE_SECONDS
+
+
+class LatencyTracker:
+    """
+    节点 LLM 调用延迟直方图
+
+    每个 key（节点名 + 调用类型）保留最近 window 个样本，按分位数给出对冲阈值。
+    """
+
+    def __init__(self, window: int = LLM_HEDGE_WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, latency: float) -> None:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(latency)
+
+    def percentile(self, key: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def hedge_delay(self, key: str) -> float:
+        with self._lock:
+            count = len(self._samples.get(key, ()))
+        if count < LLM_HEDGE_MIN_SAMPLES:
+            return LLM_HEDGE_INITIAL_DELAY
+        return max(LLM_HEDGE_MIN_DELAY, self.percentile(key, LLM_HEDGE_PERCENTILE))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            keys = list(self._samples)
+        return {
+            key: {
+                "samples": len(self._samples[key]),
+                "p50_ms": int(self.percentile(key, 0.5) * 1000),
+                "p95_ms": int(self.percentile(key, 0.95) * 1000),
+                "hedge_delay_ms": int(self.hedge_delay(key) * 1000),
+            }
+            for key in keys
+        }
+
+
+_latency_tracker: Optional[LatencyTracker] = None
+_latency_tracker_lock = threading.Lock()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    global _latency_tracker
+    if _latency_tracker is None:
+        with _latency_tracker_lock:
+            if _latency_tracker is None:
+                _latency_tracker = LatencyTracker()
+    return _latency_tracker
+
+
+def _max_attempts() -> int:
+    return max(1, LLM_HEDGE_MAX_ATTEMPTS) if LLM_HEDGE_ENABLED else 1
+
+
+class _AttemptCallbacks(AsyncCallbackHandler):
+    """
+    单个对冲请求的模型回调缓冲
+
+    请求胜出前，模型运行的回调（开始、token、结束、失败）只暂存在这里；
+    胜出后按原顺序重放给调用方的回调并改为直接转发，落败的请求整体丢弃。
+    这样 LangGraph 的 stream_mode="messages"、token 背压与节点日志只会看到胜出请求的输出。
+    """
+
+    run_inline = True
+    raise_error = True
+
+    def __init__(self, handlers: List[BaseCallbackHandler]):
+        self.handlers = handlers
+        self._events: List[Tuple[str, str, tuple, dict]] = []
+        self._forwarding = False
+        self._discarded = False
+
+    async def _handle(self, event: str, ignore_condition: str, *args: Any, **kwargs: Any) -> None:
+        if self._discarded:
+            return
+        if self._forwarding:
+            await ahandle_event(self.handlers, event, ignore_condition, *args, **kwargs)
+        else:
+            self._events.append((event, ignore_condition, args, kwargs))
+
+    async def release(self) -> None:
+        """请求胜出：重放暂存的回调，之后的回调直接转发"""
+        while self._events:
+            event, ignore_condition, args, kwargs = self._events.pop(0)
+            await ahandle_event(self.handlers, event, ignore_condition, *args, **kwargs)
+        self._forwarding = True
+
+    def discard(self) -> None:
+        """请求落败：丢弃已暂存和之后的全部回调"""
+        self._discarded = True
+        self._events.clear()
+
+    async def on_chat_model_start(self, serialized, messages, **kwargs: Any) -> None:
+        await self._handle("on_chat_model_start", "ignore_chat_model", serialized, messages, **kwargs)
+
+    async def on_llm_start(self, serialized, prompts, **kwargs: Any) -> None:
+        await self._handle("on_llm_start", "ignore_llm", serialized, prompts, **kwargs)
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        await self._handle("on_llm_new_token", "ignore_llm", token, **kwargs)
+
+    async def on_llm_end(self, response, **kwargs: Any) -> None:
+        await self._handle("on_llm_end", "ignore_llm", response, **kwargs)
+
+    async def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        await self._handle("on_llm_error", "ignore_llm", error, **kwargs)
+
+
+def _buffered_context() -> Tuple[Optional[contextvars.Context], Optional[_AttemptCallbacks]]:
+    """
+    复制当前上下文，并把其中子运行配置的回调换成缓冲回调
+
+    模型在请求任务里通过 ensure_config 读取该上下文的配置，回调因此先进入缓冲。
+    当前没有回调时返回 (None, None)。
+    """
+    config = var_child_runnable_config.get()
+    callbacks = config.get("callbacks") if config else None
+    if isinstance(callbacks, BaseCallbackManager):
+        if not callbacks.handlers:
+            return None, None
+        buffer = _AttemptCallbacks(callbacks.handlers)
+        manager = callbacks.copy()
+        manager.handlers = [buffer]
+        manager.inheritable_handlers = [buffer]
+    elif callbacks:
+        buffer = _AttemptCallbacks(list(callbacks))
+        manager = [buffer]
+    else:
+        return None, None
+    context = contextvars.copy_context()
+    context.run(var_child_runnable_config.set, {**config, "callbacks": manager})
+    return context, buffer
+
+
+async def _cancel(tasks: List[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class HedgedLLMClient:
+    """
+    带对冲请求与截止时间的 LLM 客户端包装
+
+    - astream：以首个 token 的延迟为准，主请求超过阈值仍无输出时再发一次，
+      先产出首个分块的请求胜出，其余请求立即取消
+    - ainvoke：以完整响应的延迟为准，规则相同
+    - 开启对冲时每个请求的模型回调先缓冲（_AttemptCallbacks），只把胜出请求的回调交给调用方，
+      stream_mode="messages" 不会收到落败请求的 token
+    - 阈值取该节点近期延迟的分位数（LatencyTracker），样本不足时使用固定值
+    - 单次调用不超过运行的剩余时间，超时抛出 asyncio.TimeoutError；某个请求失败时等待其余请求
+    """
+
+    def __init__(self, client, name: str, tracker: Optional[LatencyTracker] = None):
+        """
+        Args:
+            client: AsyncLLMClient 或模拟客户端，需支持并发调用
+            name: 节点名，用于区分延迟统计
+        """
+        self.client = client
+        self.name = name
+        self.tracker = tracker or get_latency_tracker()
+        self.hedged = 0
+
+    async def _race(self, key: str, start_attempt) -> Tuple[Any, asyncio.Task, List[asyncio.Task]]:
+        """
+        按对冲规则发起请求并等待第一个成功的结果
+
+        Returns:
+            (结果, 胜出的任务, 全部任务)
+        """
+        budget = remaining_budget()
+        if budget is not None and budget <= 0:
+            raise asyncio.TimeoutError(f"LLM call for {self.name} has no remaining run budget")
+        deadline = time.monotonic() + budget if budget is not None else None
+        max_attempts = _max_attempts()
+        delay = self.tracker.hedge_delay(key)
+
+        started: Dict[asyncio.Task, float] = {}
+
+        def launch() -> asyncio.Task:
+            task = start_attempt()
+            started[task] = time.monotonic()
+            tasks.append(task)
+            pending.add(task)
+            return task
+
+        tasks: List[asyncio.Task] = []
+        pending = set()
+        launch()
+        next_hedge_at = time.monotonic() + delay
+        last_error: Optional[BaseException] = None
+        try:
+            while True:
+                can_hedge = len(tasks) < max_attempts
+                waits = []
+                if can_hedge:
+                    waits.append(max(0.0, next_hedge_at - time.monotonic()))
+                if deadline is not None:
+                    waits.append(max(0.0, deadline - time.monotonic()))
+                done = set()
+                if pending:
+                    done, pending = await asyncio.wait(
+                        pending, timeout=min(waits) if waits else None, return_when=asyncio.FIRST_COMPLETED
+                    )
+                for task in done:
+                    if task.exception() is None:
+                        self.tracker.record(key, time.monotonic() - started[task])
+                        return task.result(), task, tasks
+                    last_error = task.exception()
+                    logger.warning(f"LLM attempt failed for {self.name}: {last_error}")
+
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    raise asyncio.TimeoutError(f"LLM call for {self.name} exceeded the run deadline")
+                if can_hedge and (not pending or now >= next_hedge_at):
+                    # 已有请求超过阈值仍未返回或已失败：再发一次
+                    self.hedged += 1
+                    logger.info(f"Hedging LLM call for {self.name} ({key}) after {now - started[tasks[0]]:.2f}s")
+                    launch()
+                    next_hedge_at = now + delay
+                elif not pending:
+                    raise last_error
+        except BaseException:
+            await _cancel(tasks)
+            raise
+
+    @staticmethod
+    def _spawn(coro, buffers: Dict[asyncio.Task, Optional[_AttemptCallbacks]]) -> asyncio.Task:
+        """在独立任务中发起一次请求，可能对冲时该请求的回调先进入缓冲"""
+        context, buffer = _buffered_context() if _max_attempts() > 1 else (None, None)
+        task = asyncio.get_running_loop().create_task(coro, context=context)
+        buffers[task] = buffer
+        return task
+
+    @staticmethod
+    async def _settle(winner: Optional[asyncio.Task], buffers: Dict[asyncio.Task, Optional[_AttemptCallbacks]]) -> None:
+        """丢弃落败请求的回调，重放胜出请求的回调；winner 为 None（全部失败或超时）时全部丢弃"""
+        for task, buffer in buffers.items():
+            if buffer is not None and task is not winner:
+                buffer.discard()
+        if winner is not None and buffers[winner] is not None:
+            await buffers[winner].release()
+
+    async def _race_buffered(
+        self, key: str, start_attempt, buffers: Dict[asyncio.Task, Optional[_AttemptCallbacks]]
+    ) -> Tuple[Any, asyncio.Task, List[asyncio.Task]]:
+        """_race，结束后只把胜出请求的回调交给调用方"""
+        try:
+            result, winner, tasks = await self._race(key, start_attempt)
+        except BaseException:
+            await self._settle(None, buffers)
+            raise
+        await self._settle(winner, buffers)
+        return result, winner, tasks
+
+    async def astream(self, messages, **kwargs) -> AsyncIterator[Any]:
+        """参数与 AsyncLLMClient.astream 一致"""
+        streams: Dict[asyncio.Task, Any] = {}
+        buffers: Dict[asyncio.Task, Optional[_AttemptCallbacks]] = {}
+
+        async def first_chunk(stream) -> Any:
+            # 空响应是成功的结果，不能让 StopAsyncIteration 被当作失败再次对冲
+            try:
+                return await stream.__anext__()
+            except StopAsyncIteration:
+                return _EMPTY_STREAM
+
+        def start_attempt() -> asyncio.Task:
+            # 生成器首次迭代时才读取配置，因此在请求任务（缓冲回调的上下文）中取首个分块
+            stream = self.client.astream(messages=messages, **kwargs)
+            task = self._spawn(first_chunk(stream), buffers)
+            streams[task] = stream
+            return task
+
+        first, winner, tasks = await self._race_buffered(f"{self.name}.first_token", start_attempt, buffers)
+        losers = [t for t in tasks if t is not winner]
+        await _cancel(losers)
+        for task in losers:
+            await streams[task].aclose()
+
+        stream = streams[winner]
+        budget = remaining_budget()
+        deadline = time.monotonic() + budget if budget is not None else None
+        try:
+            if first is _EMPTY_STREAM:
+                return
+            yield first
+            while True:
+                try:
+                    if deadline is None:
+                        chunk = await stream.__anext__()
+                    else:
+                        chunk = await asyncio.wait_for(stream.__anext__(), timeout=max(0.0, deadline - time.monotonic()))
+                except StopAsyncIteration:
+                    break
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    async def ainvoke(self, messages, **kwargs) -> Any:
+        """参数与 AsyncLLMClient.ainvoke 一致"""
+
+        buffers: Dict[asyncio.Task, Optional[_AttemptCallbacks]] = {}
+
+        def start_attempt() -> asyncio.Task:
+            return self._spawn(self.client.ainvoke(messages=messages, **kwargs), buffers)
+
+        result, winner, tasks = await self._race_buffered(f"{self.name}.invoke", start_attempt, buffers)
+        await _cancel([t for t in tasks if t is not winner])
+        return result
@@ -0,0 +1,74 @@
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from utils.llm.config_registry import LLMConfigEntry
+from utils.llm.tokens import count_tokens_cached, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# 单次 LLM 调用的上下文窗口（提示词 + 输出 token），LLM 配置的 config.context_window 可单独覆盖
+LLM_CONTEXT_WINDOW = int(os.getenv("LLM_CONTEXT_WINDOW", "32768"))
+# 每条消息的格式开销（角色标记等），按 OpenAI 聊天格式估计
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+@dataclass
+class PromptFit:
+    """按 token 预算渲染后的提示词"""
+    sp: str
+    user_prompt: str
+    prompt_tokens: int  # 系统与用户提示词合计 token 数（含消息格式开销）
+    max_completion_tokens: int  # 不超过上下文窗口剩余空间的输出上限
+    truncated_tokens: int = 0  # 可变字段被截掉的 token 数
+
+
+def fit_prompt(
+    llm_cfg: LLMConfigEntry,
+    variables: Dict[str, Any],
+    fit_field: str,
+    max_completion_tokens: int,
+    context_window: Optional[int] = None,
+) -> PromptFit:
+    """
+    渲染用户提示词，使提示词与输出合计不超过上下文窗口
+
+    只有 fit_field（通常是转录文本）参与截断，在句子边界截断到剩余预算；
+    提示词其余部分与 max_completion_tokens 优先保证。长文本的 token 数按内容缓存，
+    同一转录文本在多个节点中只编码一次。
+
+    Args:
+        llm_cfg: LLM 配置
+        variables: 提示词模板变量
+        fit_field: 可截断的变量名
+        max_completion_tokens: 期望的输出 token 上限
+        context_window: 上下文窗口，默认取 config.context_window 或 LLM_CONTEXT_WINDOW
+    """
+    window = context_window or int(llm_cfg.model_config.get("context_window") or LLM_CONTEXT_WINDOW)
+    value = str(variables.get(fit_field) or "")
+
+    # 模板固定部分：可变字段置空后渲染
+    skeleton = llm_cfg.render_up({**variables, fit_field: ""})
+    fixed_tokens = count_tokens_cached(llm_cfg.sp) + count_tokens_cached(skeleton) + 2 * MESSAGE_TOKEN_OVERHEAD
+    value_tokens = count_tokens_cached(value)
+
+    budget = max(0, window - max_completion_tokens - fixed_tokens)
+    truncated_tokens = 0
+    if value_tokens > budget:
+        truncated = truncate_to_tokens(value, budget)
+        truncated_tokens = value_tokens - count_tokens_cached(truncated)
+        logger.info(
+            f"Prompt field '{fit_field}' truncated from {value_tokens} to {value_tokens - truncated_tokens} tokens "
+            f"to fit context window {window} (max_completion_tokens={max_completion_tokens})"
+        )
+        value, value_tokens = truncated, value_tokens - truncated_tokens
+
+    prompt_tokens = fixed_tokens + value_tokens
+    return PromptFit(
+        sp=llm_cfg.sp,
+        user_prompt=llm_cfg.render_up({**variables, fit_field: value}),
+        prompt_tokens=prompt_tokens,
+        max_completion_tokens=max(1, min(max_completion_tokens, window - prompt_tokens)),
+        truncated_tokens=truncated_tokens,
+    )
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+测试：HedgedLLMClient 的对冲、截止时间与空响应处理
+
+运行（在 src 目录下）：python -m pytest utils/llm/test_hedge.py
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.runnables import RunnableLambda
+
+# 添加src目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.llm import hedge
+from utils.llm.hedge import HedgedLLMClient, LatencyTracker, set_run_deadline
+
+
+class _FakeLLM:
+    """按调用序号使用不同首包延迟的模拟客户端，记录被取消的调用"""
+
+    def __init__(self, delays, chunks=("a", "b"), errors=()):
+        self.delays = list(delays)
+        self.chunks = chunks
+        self.errors = set(errors)
+        self.calls = 0
+        self.cancelled = []
+
+    async def astream(self, messages, **kwargs):
+        attempt = self.calls
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delays[attempt])
+        except asyncio.CancelledError:
+            self.cancelled.append(attempt)
+            raise
+        if attempt in self.errors:
+            raise RuntimeError(f"attempt {attempt} failed")
+        for chunk in self.chunks:
+            yield f"{chunk}{attempt}"
+
+    async def ainvoke(self, messages, **kwargs):
+        chunks = [c async for c in self.astream(messages, **kwargs)]
+        return "".join(chunks)
+
+
+class _StreamingChatModel(BaseChatModel):
+    """按调用序号使用不同分块间隔的模拟模型，与真实模型一样经由回调逐块输出 token"""
+
+    intervals: list
+    emitted: list = []
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        attempt = self.calls
+        self.calls += 1
+        for i in range(3):
+            await asyncio.sleep(self.intervals[attempt])
+            piece = f"t{i}-{attempt}"
+            self.emitted.append(piece)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+
+class _ChatClient:
+    """与 AsyncLLMClient 一致：astream 透传模型分块，ainvoke 拼接流式输出"""
+
+    def __init__(self, model: BaseChatModel):
+        self.model = model
+
+    async def astream(self, messages, **kwargs):
+        async for chunk in self.model.astream(messages):
+            yield chunk
+
+    async def ainvoke(self, messages, **kwargs):
+        return "".join([chunk.content async for chunk in self.astream(messages)])
+
+
+class _TokenRecorder(BaseCallbackHandler):
+    """与 LangGraph 的 StreamMessagesHandler 一样内联接收模型回调"""
+
+    run_inline = True
+
+    def __init__(self):
+        self.starts = 0
+        self.tokens = []
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.starts += 1
+
+    def on_llm_new_token(self, token, **kwargs):
+        # 流结束时 LangChain 会再发一个空分块
+        if token:
+            self.tokens.append(token)
+
+
+async def _in_node(call, recorder: _TokenRecorder):
+    """在带回调的 Runnable 中调用，模拟图节点内的 LLM 调用"""
+    async def node(_):
+        return await call()
+
+    return await RunnableLambda(node).ainvoke(None, config={"callbacks": [recorder]})
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    monkeypatch.setattr(hedge, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(hedge, "LLM_HEDGE_INITIAL_DELAY", 0.05)
+    monkeypatch.setattr(hedge, "LLM_DEADLINE_RESERVE_SECONDS", 0.0)
+
+
+async def _collect(client: HedgedLLMClient):
+    return [chunk async for chunk in client.astream(messages=[])]
+
+
+def test_hedging_is_off_by_default():
+    assert hedge.LLM_HEDGE_ENABLED is False
+
+    async def main():
+        llm = _FakeLLM(delays=[0.15, 0.0])
+        assert await _collect(HedgedLLMClient(llm, "n", tracker=LatencyTracker())) == ["a0", "b0"]
+        assert llm.calls == 1
+
+    asyncio.run(main())
+
+
+def test_slow_primary_is_hedged_and_loser_cancelled(hedging):
+    async def main():
+        llm = _FakeLLM(delays=[5.0, 0.0])
+        client = HedgedLLMClient(llm, "n", tracker=LatencyTracker())
+        t0 = time.monotonic()
+        assert await _collect(client) == ["a1", "b1"]
+        assert time.monotonic() - t0 < 1.0
+        assert llm.calls == 2 and client.hedged == 1
+        # 落败的主请求被取消，不会重复推送 token
+        assert llm.cancelled == [0]
+
+    asyncio.run(main())
+
+
+def test_failed_attempt_is_retried_immediately(hedging):
+    async def main():
+        llm = _FakeLLM(delays=[0.0, 0.0], errors={0})
+        assert await HedgedLLMClient(llm, "n", tracker=LatencyTracker()).ainvoke(messages=[]) == "a1b1"
+        assert llm.calls == 2
+
+    asyncio.run(main())
+
+
+def test_run_deadline_bounds_the_call(hedging):
+    async def main():
+        llm = _FakeLLM(delays=[5.0, 5.0])
+        client = HedgedLLMClient(llm, "n", tracker=LatencyTracker())
+        set_run_deadline(0.2)
+        t0 = time.monotonic()
+        with pytest.raises(asyncio.TimeoutError):
+            await _collect(client)
+        assert time.monotonic() - t0 < 1.0
+        assert sorted(llm.cancelled) == [0, 1]
+
+        # 剩余时间已用尽时不再发起请求
+        set_run_deadline(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await _collect(client)
+        assert llm.calls == 2
+
+    asyncio.run(main())
+
+
+def test_empty_stream_is_a_successful_empty_result(hedging):
+    async def main():
+        llm = _FakeLLM(delays=[0.0, 0.0], chunks=())
+        client = HedgedLLMClient(llm, "n", tracker=LatencyTracker())
+        assert await _collect(client) == []
+        assert llm.calls == 1 and client.hedged == 0
+
+    asyncio.run(main())
+
+
+def test_only_winner_tokens_reach_callbacks_when_both_attempts_stream(hedging):
+    async def main():
+        # 主请求 0.04s 后就开始输出 token，对冲请求在 0.05s 发出后更快地输出完
+        model = _StreamingChatModel(intervals=[0.04, 0.01])
+        client = HedgedLLMClient(_ChatClient(model), "n", tracker=LatencyTracker())
+        recorder = _TokenRecorder()
+        result = await _in_node(lambda: client.ainvoke(messages=[HumanMessage("hi")]), recorder)
+
+        assert result == "t0-1t1-1t2-1" and client.hedged == 1
+        assert "t0-0" in model.emitted
+        # 落败请求输出过的 token 不会出现在回调（stream_mode="messages"）里
+        assert recorder.tokens == ["t0-1", "t1-1", "t2-1"] and recorder.starts == 1
+
+    asyncio.run(main())
+
+
+def test_streamed_tokens_follow_the_winner(hedging):
+    async def main():
+        model = _StreamingChatModel(intervals=[0.2, 0.01])
+        client = HedgedLLMClient(_ChatClient(model), "n", tracker=LatencyTracker())
+        recorder = _TokenRecorder()
+        seen = []
+
+        async def consume():
+            async for chunk in client.astream(messages=[HumanMessage("hi")]):
+                if not chunk.content:
+                    continue
+                # 每个分块产出前，对应的 token 回调已送达
+                seen.append((chunk.content, list(recorder.tokens)))
+
+        await _in_node(consume, recorder)
+        assert [content for content, _ in seen] == ["t0-1", "t1-1", "t2-1"]
+        assert all(tokens[-1] == content for content, tokens in seen)
+        assert recorder.tokens == ["t0-1", "t1-1", "t2-1"] and recorder.starts == 1
+
+    asyncio.run(main())
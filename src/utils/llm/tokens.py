@@ -0,0 +1,149 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# tiktoken 编码名称；离线环境可通过 TIKTOKEN_CACHE_DIR 指向预置的编码文件
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "cl100k_base")
+# 按文本内容哈希缓存 token 数的条目数，同一转录文本在摘要与三个分支节点间只编码一次
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "256"))
+
+# 切分优先在段落、句子边界进行
+_SEGMENT_RE = re.compile(r"(?<=[\n。！？!?；;])")
+_SENTENCE_END_RE = re.compile(r"[\n。！？!?；;]")
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+# 内容 sha256 -> token 数（LRU），只保存计数，不持有原文
+_token_counts: "OrderedDict[str, int]" = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+
+def get_encoding():
+    """获取 tiktoken 编码（进程级缓存），编码文件不可用时返回 None，由调用方退化为估算"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+                except Exception as e:
+                    logger.warning(f"Failed to load tiktoken encoding {TOKEN_ENCODING}: {e}, will fallback to estimation")
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """计算文本 token 数；无编码文件时按中文字符 1 token、其他字符 4 个 1 token 估算"""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def count_tokens_cached(text: str, content_id: Optional[str] = None) -> int:
+    """
+    count_tokens 的缓存版本，用于转录文本等会被多个节点重复计算的长文本
+
+    缓存以内容的 sha256 为键，只保存计数，长文本用完即可释放。
+    文本由 BlobStore 引用读取而来时可传入 blob_content_id(引用)（同为内容 sha256），省去一次哈希。
+    """
+    if not text:
+        return 0
+    key = content_id or hashlib.sha256(text.encode("utf-8")).hexdigest()
+    with _token_counts_lock:
+        count = _token_counts.get(key)
+        if count is not None:
+            _token_counts.move_to_end(key)
+            return count
+    count = count_tokens(text)
+    with _token_counts_lock:
+        _token_counts[key] = count
+        _token_counts.move_to_end(key)
+        while len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+    return count
+
+
+def split_by_tokens(text: str, max_tokens: int) -> List[str]:
+    """
+    按 token 上限切分文本
+
+    优先在段落、句子边界切分，单句超过上限时再按字符硬切。
+    """
+    if count_tokens(text) <= max_tokens:
+        return [text] if text else []
+
+    chunks: List[str] = []
+    current = ""
+    current_tokens = 0
+    for segment in _SEGMENT_RE.split(text):
+        if not segment:
+            continue
+        segment_tokens = count_tokens(segment)
+        if segment_tokens > max_tokens:
+            if current:
+                chunks.append(current)
+                current, current_tokens = "", 0
+            chunks.extend(_hard_split(segment, max_tokens))
+            continue
+        if current_tokens + segment_tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = "", 0
+        current += segment
+        current_tokens += segment_tokens
+    if current:
+        chunks.append(current)
+    return [c for c in chunks if c.strip()]
+
+
+def _hard_split(text: str, max_tokens: int) -> List[str]:
+    encoding = get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+    # 估算模式下按最坏情况（每字符 1 token）切分
+    return [text[i:i + max_tokens] for i in range(0, len(text), max_tokens)]
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    截断文本至 token 上限，截断点落在句子边界
+
+    只编码一次：取前 max_tokens 个 token 对应的前缀，再回退到前缀内最后一个句子结束符；
+    前缀后半段没有句子边界时（超长句子）在 token 边界硬切。
+    """
+    if not text or max_tokens <= 0:
+        return ""
+    encoding = get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        # 前缀末尾可能是被截断的多字节字符
+        prefix = encoding.decode(tokens[:max_tokens]).rstrip("\ufffd")
+    else:
+        if count_tokens(text) <= max_tokens:
+            return text
+        # 估算模式下按最坏情况（每字符 1 token）截取
+        prefix = text[:max_tokens]
+
+    boundary = None
+    for match in _SENTENCE_END_RE.finditer(prefix):
+        boundary = match.end()
+    if boundary is not None and boundary >= len(prefix) // 2:
+        return prefix[:boundary]
+    return prefix
@@ -6,6 +6,7 @@ from utils.log.config import LOG_DIR
 from utils.log.common import get_execute_mode, is_prod
 import uuid
 from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.types import Send
 from coze_coding_utils.runtime_ctx.context import Context
 import os
 import sys
@@ -445,6 +446,7 @@ def _serialize_data(data: Any) -> str:
     增强版数据序列化函数，支持：
     - Pydantic BaseModel
     - 字典/列表等基础类型
+    - LangGraph Send（条件边扇出时的返回值）
     - 自定义对象（通过 __dict__ 序列化）
     - 特殊字符（保证 ASCII 编码）
     """
@@ -463,6 +465,10 @@ def _serialize_data(data: Any) -> str:
         elif isinstance(item, dict):
             return {key: _recursive_serialize(value) for key, value in item.items()}
 
+        # 处理 Send（使用 __slots__，没有 __dict__）
+        elif isinstance(item, Send):
+            return {"node": item.node, "arg": _recursive_serialize(item.arg)}
+
         # 处理自定义对象（有 __dict__ 属性的）
         elif hasattr(item, '__dict__') and not isinstance(item, (str, int, float, bool, type(None))):
             return _recursive_serialize(item.__dict__)
@@ -221,7 +221,8 @@ class LangGraphParser:
 
             data = getattr(node, "data", None)
             if data:
-                _func = getattr(data, "func", None)
+                # 异步节点的 RunnableCallable 只有 afunc
+                _func = getattr(data, "func", None) or getattr(data, "afunc", None)
                 if _func is None and callable(data):
                     _func = cast(Callable[..., Any], data)
                 if _func is None:
@@ -10,6 +10,7 @@ MESSAGE_TYPE_TOOL_RESPONSE = "tool_response"
 MESSAGE_TYPE_MESSAGE_START = "message_start"
 MESSAGE_TYPE_MESSAGE_END = "message_end"
 MESSAGE_TYPE_ERROR = "error"
+MESSAGE_TYPE_NODE_UPDATE = "node_update"
 
 
 
@@ -21,12 +22,14 @@ MessageType = Literal[
     MESSAGE_TYPE_MESSAGE_START,
     MESSAGE_TYPE_MESSAGE_END,
     MESSAGE_TYPE_ERROR,
+    MESSAGE_TYPE_NODE_UPDATE,
 ]
 
 
 # Message End Codes
 MESSAGE_END_CODE_SUCCESS = "0"
 MESSAGE_END_CODE_CANCELED = "1"
+MESSAGE_END_CODE_SLOW_CONSUMER = "SLOW_CONSUMER"  # 客户端读取过慢, 服务端断开
 
 # Tool Response Codes
 TOOL_RESP_CODE_SUCCESS = "0"
@@ -46,6 +49,7 @@ class MessageEndDetail:
 
     token_cost: Optional[TokenCost] = field(default=None)  # 消耗的token数量
     time_cost_ms: Optional[int] = field(default=None)  # 耗时，单位毫秒
+    queue_wait_ms: Optional[int] = field(default=None)  # 准入队列中的等待时间，单位毫秒（HTTP 入口）
 
 
 @dataclass
@@ -78,6 +82,13 @@ class ToolResponseDetail:
     time_cost_ms: Optional[int] = field(default=None)  # 耗时，单位毫秒
 
 
+@dataclass
+class NodeUpdateDetail:
+    node_name: str = field(default_factory=str)  # 完成的图节点名
+    namespace: str = field(default_factory=str)  # 子图命名空间, Top-N 模式下区分各视频的流水线, 主图为空
+    output: Dict[str, Any] = field(default_factory=dict)  # 节点输出
+
+
 @dataclass
 class ServerMessageContent:
     answer: Optional[str] = field(default=None)  # 回答内容
@@ -86,6 +97,7 @@ class ServerMessageContent:
     tool_response: Optional[ToolResponseDetail] = field(default=None)  # tool响应详情
 
     error: Optional[ErrorDetail] = field(default=None)  # 错误详情
+    node_update: Optional[NodeUpdateDetail] = field(default=None)  # 节点完成时的输出（工作流 updates 流）
 
     message_start: Optional[MessageStartDetail] = field(default=None)  # 消息开始详情, 接收到消息后发送
     message_end: Optional[MessageEndDetail] = field(default=None)      # 消息结束详情, 处理完消息后发送
@@ -108,6 +120,7 @@ class ServerMessage:
         default_factory=ServerMessageContent
     )  # 消息内容
     log_id: str = field(default_factory=str)  # 日志id, 用于关联日志
+    node_name: str = field(default_factory=str)  # 产生该消息的图节点名, 工作流并行分支据此区分流式输出
 
     def dict(self):
         return asdict(self)
@@ -465,3 +465,45 @@ class ResponseConverter:
                 total_tokens=0,
             ),
         )
+
+
+class SseChunkCoalescer:
+    """
+    合并连续的纯文本增量 chunk，供 StreamBuffer 的 coalesce 策略使用
+
+    只合并同一 id、单个 choice、delta 只含 content 且没有 finish_reason 的 chunk，
+    role、工具调用、结束与错误 chunk 原样保留。
+    """
+
+    _PREFIX = "data: "
+
+    def key(self, item: Any) -> Any:
+        # 只有一路输出：只与缓冲区末尾合并，不跨过工具调用等 chunk
+        return None
+
+    def renumber(self, item: Any) -> Any:
+        return item
+
+    @classmethod
+    def _parse_text_delta(cls, item: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(item, str) or not item.startswith(cls._PREFIX + "{"):
+            return None
+        try:
+            chunk = json.loads(item[len(cls._PREFIX):])
+        except ValueError:
+            return None
+        choices = chunk.get("choices") or []
+        if len(choices) != 1 or choices[0].get("finish_reason"):
+            return None
+        delta = choices[0].get("delta") or {}
+        if not isinstance(delta.get("content"), str) or any(v for k, v in delta.items() if k != "content"):
+            return None
+        return chunk
+
+    def merge(self, prev: Any, item: Any) -> Optional[str]:
+        prev_chunk = self._parse_text_delta(prev)
+        chunk = self._parse_text_delta(item)
+        if prev_chunk is None or chunk is None or prev_chunk.get("id") != chunk.get("id"):
+            return None
+        prev_chunk["choices"][0]["delta"]["content"] += chunk["choices"][0]["delta"]["content"]
+        return f"{self._PREFIX}{json.dumps(prev_chunk, ensure_ascii=False)}\n\n"
@@ -11,7 +11,9 @@ from fastapi.responses import StreamingResponse, JSONResponse
 from coze_coding_utils.runtime_ctx.context import Context
 from utils.openai.types.response import OpenAIError, OpenAIErrorResponse
 from utils.openai.converter.request_converter import RequestConverter
-from utils.openai.converter.response_converter import ResponseConverter
+from utils.openai.converter.response_converter import ResponseConverter, SseChunkCoalescer
+from utils.messages.server import MESSAGE_END_CODE_SLOW_CONSUMER
+from utils.serving.stream_buffer import SlowConsumerError, get_stream_buffers
 from utils.error import classify_error
 
 logger = logging.getLogger(__name__)
@@ -106,66 +108,75 @@ class OpenAIChatHandler:
 
         async def stream_generator() -> AsyncGenerator[str, None]:
             """异步流式生成器"""
-            loop = asyncio.get_running_loop()
-            queue: asyncio.Queue = asyncio.Queue()
             context = contextvars.copy_context()
-
-            def producer():
-                """后台线程生产者"""
+            # 有界缓冲区：客户端读得慢时按 STREAM_BUFFER_POLICY 等待、合并文本增量或断开
+            with get_stream_buffers().open(ctx.run_id, coalescer=SseChunkCoalescer()) as buffer:
+
+                def producer():
+                    """后台线程生产者"""
+                    try:
+                        # 获取 graph 并配置
+                        from utils.helper import graph_helper
+                        graph = self.graph_service._get_graph(ctx)
+
+                        if graph_helper.is_agent_proj():
+                            from utils.log.loop_trace import init_agent_config
+                            run_config = init_agent_config(graph, ctx)
+                        else:
+                            from utils.log.loop_trace import init_run_config
+                            run_config = init_run_config(graph, ctx)
+
+                        run_config["recursion_limit"] = 100
+                        run_config["configurable"] = {"thread_id": self.graph_service._thread_id(session_id, ctx)}
+
+                        # 流式执行 - 直接使用 LangGraph 原始流
+                        items = graph_helper.iter_graph_stream(
+                            graph,
+                            stream_input,
+                            stream_mode="messages",
+                            config=run_config,
+                            context=ctx,
+                        )
+
+                        # 使用 iter_langgraph_stream 方法，支持工具参数流式输出
+                        for sse_data in response_converter.iter_langgraph_stream(items):
+                            if sse_data != "data: [DONE]\n\n":  # 不在这里发送 DONE
+                                # 缓冲区已断开（客户端过慢或已离开）时停止
+                                if not buffer.put_threadsafe(sse_data):
+                                    logger.info(f"Stream producer stopped, buffer closed for run_id: {ctx.run_id}")
+                                    return
+
+                    except Exception as ex:
+                        logger.error(f"Stream producer error: {ex}", exc_info=True)
+                        err = classify_error(ex, {"node_name": "openai_stream"})
+                        error_chunk = self._create_error_sse_chunk(
+                            str(err.code),
+                            str(ex),
+                            response_converter.request_id,
+                        )
+                        buffer.put_threadsafe(error_chunk)
+                    finally:
+                        buffer.put_threadsafe("data: [DONE]\n\n")
+                        buffer.close_threadsafe()
+
+                # 启动后台线程
+                threading.Thread(target=lambda: context.run(producer), daemon=True).start()
+
+                # 从缓冲区消费
                 try:
-                    # 获取 graph 并配置
-                    from utils.helper import graph_helper
-                    graph = self.graph_service._get_graph(ctx)
-
-                    if graph_helper.is_agent_proj():
-                        from utils.log.loop_trace import init_agent_config
-                        run_config = init_agent_config(graph, ctx)
-                    else:
-                        from utils.log.loop_trace import init_run_config
-                        run_config = init_run_config(graph, ctx)
-
-                    run_config["recursion_limit"] = 100
-                    run_config["configurable"] = {"thread_id": session_id}
-
-                    # 流式执行 - 直接使用 LangGraph 原始流
-                    items = graph.stream(
-                        stream_input,
-                        stream_mode="messages",
-                        config=run_config,
-                        context=ctx,
-                    )
-
-                    # 使用 iter_langgraph_stream 方法，支持工具参数流式输出
-                    for sse_data in response_converter.iter_langgraph_stream(items):
-                        if sse_data != "data: [DONE]\n\n":  # 不在这里发送 DONE
-                            loop.call_soon_threadsafe(queue.put_nowait, sse_data)
-
-                except Exception as ex:
-                    logger.error(f"Stream producer error: {ex}", exc_info=True)
-                    err = classify_error(ex, {"node_name": "openai_stream"})
-                    error_chunk = self._create_error_sse_chunk(
-                        str(err.code),
-                        str(ex),
+                    async for item in buffer:
+                        yield item
+                except SlowConsumerError as e:
+                    logger.warning(f"Slow consumer disconnected for run_id: {ctx.run_id}: {e}")
+                    yield self._create_error_sse_chunk(
+                        MESSAGE_END_CODE_SLOW_CONSUMER,
+                        str(e),
                         response_converter.request_id,
                     )
-                    loop.call_soon_threadsafe(queue.put_nowait, error_chunk)
-                finally:
-                    loop.call_soon_threadsafe(queue.put_nowait, "data: [DONE]\n\n")
-                    loop.call_soon_threadsafe(queue.put_nowait, None)
-
-            # 启动后台线程
-            threading.Thread(target=lambda: context.run(producer), daemon=True).start()
-
-            # 从队列消费
-            try:
-                while True:
-                    item = await queue.get()
-                    if item is None:
-                        break
-                    yield item
-            except asyncio.CancelledError:
-                logger.info(f"Stream cancelled for run_id: {ctx.run_id}")
-                raise
+                    yield "data: [DONE]\n\n"
+                except asyncio.CancelledError:
+                    logger.info(f"Stream cancelled for run_id: {ctx.run_id}")
+                    raise
 
         return StreamingResponse(
             stream_generator(),
@@ -199,10 +210,11 @@ class OpenAIChatHandler:
                     run_config = init_run_config(graph, ctx)
 
                 run_config["recursion_limit"] = 100
-                run_config["configurable"] = {"thread_id": session_id}
+                run_config["configurable"] = {"thread_id": self.graph_service._thread_id(session_id, ctx)}
 
                 # 流式执行 - 直接使用 LangGraph 原始流
-                items = graph.stream(
+                items = graph_helper.iter_graph_stream(
+                    graph,
                     stream_input,
                     stream_mode="messages",
                     config=run_config,
@@ -0,0 +1,9 @@
+"""播客音频合成"""
+
+from utils.podcast.tts_pipeline import PodcastTTSPipeline, ScriptTurnSplitter, split_long_text
+
+__all__ = [
+    "PodcastTTSPipeline",
+    "ScriptTurnSplitter",
+    "split_long_text",
+]
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from storage.s3.s3_storage import S3SyncStorage
+from utils.clients import AsyncTTSClient, get_client_provider
+
+logger = logging.getLogger(__name__)
+
+# 同时进行的 TTS 请求数上限
+PODCAST_TTS_CONCURRENCY = int(os.getenv("PODCAST_TTS_CONCURRENCY", "4"))
+# 单次 TTS 请求的最大字符数，超长的轮次按句切分为多段
+PODCAST_TTS_MAX_CHARS = int(os.getenv("PODCAST_TTS_MAX_CHARS", "800"))
+# 两位角色的音色
+PODCAST_HOST_SPEAKER = os.getenv("PODCAST_HOST_SPEAKER", "zh_male_m191_uranus_bigtts")
+PODCAST_EXPERT_SPEAKER = os.getenv("PODCAST_EXPERT_SPEAKER", "zh_female_xiaohe_uranus_bigtts")
+
+HOST_ROLE = "Host A"
+EXPERT_ROLE = "Expert B"
+
+# 轮次标记，兼容 **Host A**：/ Host A: / 【Expert B】: 等写法
+TURN_MARKER_RE = re.compile(r"^[\s*#【\[]*(Host A|Expert B)[\s*】\]]*[：:]\s*", re.IGNORECASE | re.MULTILINE)
+SENTENCE_END_RE = re.compile(r"(?<=[。！？!?；;\n])")
+
+
+def split_long_text(text: str, max_chars: int = PODCAST_TTS_MAX_CHARS) -> List[str]:
+    """按句子边界把超长文本切分为不超过 max_chars 的片段"""
+    if len(text) <= max_chars:
+        return [text]
+    pieces: List[str] = []
+    current = ""
+    for sentence in SENTENCE_END_RE.split(text):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if len(current) + len(sentence) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += sentence
+    if current.strip():
+        pieces.append(current)
+    return [p for p in pieces if p.strip()]
+
+
+class ScriptTurnSplitter:
+    """
+    对谈脚本轮次切分器
+
+    逐块接收 LLM 流式输出，遇到下一个角色标记时即认为上一轮已完整，立刻返回，
+    无需等待整篇脚本生成结束。
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._role: Optional[str] = None
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """追加文本，返回本次新完成的 (角色, 台词) 列表"""
+        self._buffer += text
+        turns: List[Tuple[str, str]] = []
+        while True:
+            marker = TURN_MARKER_RE.search(self._buffer)
+            if marker is None:
+                break
+            # 第一个标记之前的内容（标题、说明等）不参与合成
+            if self._role is not None:
+                turns.extend(self._make_turns(self._role, self._buffer[:marker.start()]))
+            self._role = self._canonical_role(marker.group(1))
+            self._buffer = self._buffer[marker.end():]
+        return turns
+
+    def close(self) -> List[Tuple[str, str]]:
+        """脚本结束，返回最后一轮；若全文没有角色标记则整体作为主持人台词"""
+        text, self._buffer = self._buffer, ""
+        return self._make_turns(self._role or HOST_ROLE, text)
+
+    def _make_turns(self, role: str, text: str) -> List[Tuple[str, str]]:
+        text = text.strip().strip("*").strip()
+        if not text:
+            return []
+        return [(role, piece) for piece in split_long_text(text)]
+
+    @staticmethod
+    def _canonical_role(raw: str) -> str:
+        return HOST_ROLE if raw.lower() == HOST_ROLE.lower() else EXPERT_ROLE
+
+
+def create_podcast_storage() -> S3SyncStorage:
+    """按环境变量创建对象存储（凭证由 x-storage-token 注入）"""
+    return S3SyncStorage(
+        endpoint_url=os.getenv("COZE_BUCKET_ENDPOINT_URL"),
+        access_key="",
+        secret_key="",
+        bucket_name=os.getenv("COZE_BUCKET_NAME", ""),
+        region="cn-beijing",
+    )
+
+
+class PodcastTTSPipeline:
+    """
+    播客音频流水线
+
+    - feed() 接收 LLM 流式输出，每完成一轮对话就提交一次 TTS，合成与脚本生成重叠进行
+    - 多轮 TTS 在信号量限制下并发执行
+    - finish() 按原始顺序拼接各段音频，通过 S3SyncStorage.trunk_upload_file 分片上传并返回签名 URL
+    """
+
+    def __init__(
+        self,
+        tts_client: AsyncTTSClient,
+        storage: Optional[S3SyncStorage] = None,
+        concurrency: int = PODCAST_TTS_CONCURRENCY,
+        speakers: Optional[Dict[str, str]] = None,
+        uid: str = "podcast_user",
+        audio_format: str = "mp3",
+    ):
+        self.tts_client = tts_client
+        self.storage = storage
+        self.speakers = speakers or {HOST_ROLE: PODCAST_HOST_SPEAKER, EXPERT_ROLE: PODCAST_EXPERT_SPEAKER}
+        self.uid = uid
+        self.audio_format = audio_format
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._splitter = ScriptTurnSplitter()
+        self._tasks: List[asyncio.Task] = []
+
+    def feed(self, text: str) -> None:
+        """追加一段流式脚本文本"""
+        for role, line in self._splitter.feed(text):
+            self._submit(role, line)
+
+    def _submit(self, role: str, text: str) -> None:
+        self._tasks.append(asyncio.create_task(self._synthesize(role, text)))
+
+    async def _synthesize(self, role: str, text: str) -> bytes:
+        async with self._semaphore:
+            return await self.tts_client.asynthesize_audio(
+                uid=self.uid,
+                text=text,
+                speaker=self.speakers.get(role, PODCAST_HOST_SPEAKER),
+                audio_format=self.audio_format,
+                sample_rate=24000,
+                speech_rate=0,
+                loudness_rate=0,
+            )
+
+    async def finish(self, file_name: str = "podcast.mp3") -> str:
+        """
+        等待全部片段合成完成，拼接上传
+
+        Returns:
+            音频签名 URL
+        """
+        for role, line in self._splitter.close():
+            self._submit(role, line)
+        if not self._tasks:
+            raise ValueError("播客脚本为空，无可合成的对话")
+
+        segments = await asyncio.gather(*self._tasks)
+        logger.info(f"Podcast TTS finished: {len(segments)} segments, {sum(len(s) for s in segments)} bytes")
+
+        storage = self.storage or get_client_provider().storage()
+        key = await asyncio.to_thread(
+            storage.trunk_upload_file,
+            chunk_iter=iter(segments),
+            file_name=file_name,
+            content_type="audio/mpeg" if self.audio_format == "mp3" else "application/octet-stream",
+        )
+        return await asyncio.to_thread(storage.generate_presigned_url, key=key, expire_time=86400)
+
+    def cancel(self) -> None:
+        """取消尚未完成的合成任务"""
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
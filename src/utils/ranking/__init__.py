@@ -0,0 +1,15 @@
+"""搜索结果排序"""
+
+from utils.ranking.hotspot import (
+    KeywordMatcher,
+    quality_scores,
+    rank_hotspot_candidates,
+    select_source_text,
+)
+
+__all__ = [
+    "KeywordMatcher",
+    "quality_scores",
+    "rank_hotspot_candidates",
+    "select_source_text",
+]
@@ -0,0 +1,131 @@
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 综合评分中各信号的权重：相关性（rank_score）、文本质量、关键词密度
+HOTSPOT_RANK_WEIGHT = float(os.getenv("HOTSPOT_RANK_WEIGHT", "0.5"))
+HOTSPOT_QUALITY_WEIGHT = float(os.getenv("HOTSPOT_QUALITY_WEIGHT", "0.4"))
+HOTSPOT_DENSITY_WEIGHT = float(os.getenv("HOTSPOT_DENSITY_WEIGHT", "0.1"))
+# 需要 LLM 增强的候选扣分；不小于三项权重之和时，任何无需增强的候选都会排在其前面
+HOTSPOT_FALLBACK_PENALTY = float(os.getenv("HOTSPOT_FALLBACK_PENALTY", "1.0"))
+# 每千字关键词出现次数达到该值时密度得分记满
+HOTSPOT_DENSITY_CAP = float(os.getenv("HOTSPOT_DENSITY_CAP", "10"))
+
+CONTENT_KEYWORDS = ("核心", "关键", "重点", "要点", "案例", "实际", "应用", "趋势", "发展")
+STRUCTURE_MARKERS = ("第一部分", "1.", "1）", "一、")
+SENTENCE_MARKERS = ("。", "？", "！")
+
+
+class KeywordMatcher:
+    """
+    多关键词单遍匹配
+
+    把所有关键词编译成一个正则分支（长词优先），一次扫描得到每个关键词的出现次数，
+    代替逐个关键词 `in` 的多次扫描。
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(k for k in keywords if k))
+        pattern = "|".join(re.escape(k) for k in sorted(self.keywords, key=len, reverse=True))
+        self._pattern = re.compile(pattern) if pattern else None
+
+    def counts(self, text: str) -> np.ndarray:
+        """各关键词的出现次数（不重叠计数），顺序与 keywords 一致"""
+        if self._pattern is None or not text:
+            return np.zeros(len(self.keywords), dtype=np.int32)
+        found = Counter(self._pattern.findall(text))
+        return np.fromiter((found.get(k, 0) for k in self.keywords), dtype=np.int32, count=len(self.keywords))
+
+    def count_matrix(self, texts: Sequence[str]) -> np.ndarray:
+        """形状为 (len(texts), len(keywords)) 的出现次数矩阵"""
+        if not texts:
+            return np.zeros((0, len(self.keywords)), dtype=np.int32)
+        return np.stack([self.counts(text) for text in texts])
+
+
+@lru_cache(maxsize=1)
+def _quality_matcher() -> KeywordMatcher:
+    return KeywordMatcher(CONTENT_KEYWORDS + STRUCTURE_MARKERS + SENTENCE_MARKERS)
+
+
+@lru_cache(maxsize=64)
+def _density_matcher(domain: str) -> KeywordMatcher:
+    return KeywordMatcher(CONTENT_KEYWORDS + tuple(domain.split()))
+
+
+def select_source_text(content: Optional[str], summary: Optional[str], snippet: Optional[str]) -> Optional[str]:
+    """
+    按优先级选出可直接使用的文本：完整内容 > AI 摘要 > 片段描述
+
+    都不满足长度要求时返回 None，表示需要 LLM 增强。
+    """
+    if content and len(content) > 200:
+        return content
+    if summary and len(summary) > 100:
+        return summary
+    if snippet and len(snippet) > 50:
+        return snippet
+    return None
+
+
+def quality_scores(texts: Sequence[str]) -> np.ndarray:
+    """
+    批量评估文本质量（0-100）
+
+    长度 0-40 分、结构 0-30 分（有分段标记 30，仅有句读 15）、内容关键词每个 5 分至多 30 分，空文本 0 分。
+    """
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    matcher = _quality_matcher()
+    counts = matcher.count_matrix(texts) > 0
+    n_content, n_structure = len(CONTENT_KEYWORDS), len(STRUCTURE_MARKERS)
+    keyword_hits = counts[:, :n_content].sum(axis=1)
+    has_structure = counts[:, n_content:n_content + n_structure].any(axis=1)
+    has_sentence = counts[:, n_content + n_structure:].any(axis=1)
+
+    length_score = np.select([lengths >= 500, lengths >= 300, lengths >= 100], [40, 30, 20], default=10)
+    structure_score = np.where(has_structure, 30, np.where(has_sentence, 15, 0))
+    keyword_score = np.minimum(keyword_hits * 5, 30)
+    scores = np.minimum(length_score + structure_score + keyword_score, 100)
+    return np.where(lengths > 0, scores, 0).astype(np.int64)
+
+
+def rank_hotspot_candidates(web_items: Sequence, domain: str = "") -> List[int]:
+    """
+    对全部搜索结果做综合排序，返回候选下标（得分降序，同分保持原顺序）
+
+    得分 = 相关性权重 * 归一化 rank_score + 质量权重 * 文本质量 / 100
+          + 密度权重 * 关键词密度 - 需要 LLM 增强时的扣分
+    """
+    if not web_items:
+        return []
+    texts = []
+    needs_fallback = np.zeros(len(web_items), dtype=bool)
+    for i, item in enumerate(web_items):
+        text = select_source_text(item.content, item.summary, item.snippet)
+        if text is None:
+            needs_fallback[i] = True
+            text = ""
+        texts.append(text)
+
+    rank = np.array([item.rank_score or 0.0 for item in web_items], dtype=np.float64)
+    rank_max = rank.max()
+    rank_norm = rank / rank_max if rank_max > 0 else np.zeros_like(rank)
+
+    quality = quality_scores(texts) / 100.0
+
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.float64, count=len(texts))
+    occurrences = _density_matcher(domain).count_matrix(texts).sum(axis=1)
+    density = np.divide(occurrences * 1000.0, lengths, out=np.zeros_like(lengths), where=lengths > 0)
+    density_score = np.minimum(density / HOTSPOT_DENSITY_CAP, 1.0)
+
+    score = (
+        HOTSPOT_RANK_WEIGHT * rank_norm
+        + HOTSPOT_QUALITY_WEIGHT * quality
+        + HOTSPOT_DENSITY_WEIGHT * density_score
+        - HOTSPOT_FALLBACK_PENALTY * needs_fallback
+    )
+    return np.argsort(-score, kind="stable").tolist()
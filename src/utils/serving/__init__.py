@@ -0,0 +1,71 @@
+"""服务层组件"""
+
+from utils.serving.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    AdmissionTicket,
+    ADMISSION_ENABLED,
+    ADMISSION_PRIORITY_HEADER,
+    get_admission_controller,
+    parse_priority,
+    queue_wait_ms,
+)
+from utils.serving.batch import BatchRunner, BATCH_RUN_CONCURRENCY, parse_batch_input
+from utils.serving.checkpoints import RunCheckpointRegistry, RUN_CHECKPOINT_ENABLED
+from utils.serving.coalescer import RunCoalescer, RUN_COALESCE_ENABLED
+from utils.serving.run_registry import (
+    RunRecord,
+    RunRegistry,
+    HTTP_WORKERS,
+    RUN_REGISTRY_ENABLED,
+    get_run_registry,
+)
+from utils.serving.stream_buffer import (
+    StreamBackpressureHandler,
+    StreamBuffer,
+    StreamBufferRegistry,
+    SlowConsumerError,
+    STREAM_BUFFER_POLICY,
+    get_stream_buffers,
+)
+from utils.serving.video_jobs import (
+    VideoJob,
+    VideoJobRegistry,
+    VIDEO_JOB_MODE,
+    artifact_url,
+    get_video_job_registry,
+)
+
+__all__ = [
+    "AdmissionController",
+    "AdmissionRejected",
+    "AdmissionTicket",
+    "ADMISSION_ENABLED",
+    "ADMISSION_PRIORITY_HEADER",
+    "get_admission_controller",
+    "parse_priority",
+    "queue_wait_ms",
+    "BatchRunner",
+    "BATCH_RUN_CONCURRENCY",
+    "parse_batch_input",
+    "RunCheckpointRegistry",
+    "RUN_CHECKPOINT_ENABLED",
+    "RunCoalescer",
+    "RUN_COALESCE_ENABLED",
+    "RunRecord",
+    "RunRegistry",
+    "HTTP_WORKERS",
+    "RUN_REGISTRY_ENABLED",
+    "get_run_registry",
+    "StreamBackpressureHandler",
+    "StreamBuffer",
+    "StreamBufferRegistry",
+    "SlowConsumerError",
+    "STREAM_BUFFER_POLICY",
+    "get_stream_buffers",
+    "VideoJob",
+    "VideoJobRegistry",
+    "VIDEO_JOB_MODE",
+    "artifact_url",
+    "get_video_job_registry",
+]
@@ -0,0 +1,261 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# 是否启用准入控制；关闭后所有请求立即执行
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+# 每个入口同时执行的请求数上限，0 表示不限制
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32"))
+# 每个入口的等待队列长度上限，队列满时返回 429
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "128"))
+# 按入口覆盖上述两项，格式 "run=16:64,stream_run=32"（入口=并发上限[:队列长度]）
+ADMISSION_LIMITS = os.getenv("ADMISSION_LIMITS", "")
+# 在队列中等待超过该时间（秒）仍未轮到则放弃，返回 503
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "60"))
+# 尚无执行耗时样本时返回的 Retry-After（秒）
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "5"))
+
+# 请求优先级请求头：整数，越大越先出队，缺省为 0
+ADMISSION_PRIORITY_HEADER = "x-priority"
+
+# 执行耗时的指数滑动平均系数，用于估算 Retry-After
+_HOLD_EWMA_ALPHA = 0.2
+
+# 当前请求在准入队列中的等待时间（毫秒），由 HTTP 入口在准入后设置，写入 message_end
+queue_wait_ms: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("queue_wait_ms", default=None)
+
+
+class AdmissionRejected(Exception):
+    """请求未被准入：队列已满（429）或排队超时（503），retry_after 为建议的重试间隔（秒）"""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_priority(headers: Optional[Mapping[str, str]]) -> int:
+    """从请求头读取优先级，缺省或无法解析时为 0"""
+    value = (headers or {}).get(ADMISSION_PRIORITY_HEADER)
+    try:
+        return int(value) if value is not None else 0
+    except ValueError:
+        logger.warning(f"Invalid {ADMISSION_PRIORITY_HEADER} header: {value!r}, using 0")
+        return 0
+
+
+def _parse_limits(spec: str) -> Dict[str, tuple]:
+    limits = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        try:
+            endpoint, value = part.split("=", 1)
+            max_in_flight, _, queue_size = value.partition(":")
+            limits[endpoint.strip()] = (int(max_in_flight), int(queue_size) if queue_size else ADMISSION_QUEUE_SIZE)
+        except ValueError:
+            logger.warning(f"Ignoring invalid ADMISSION_LIMITS entry: {part!r}")
+    return limits
+
+
+class AdmissionTicket:
+    """已准入请求持有的执行名额，请求结束（含取消、断开）时调用 release 归还，可重复调用"""
+
+    def __init__(self, lane: Optional["_Lane"], endpoint: str, priority: int, wait_seconds: float):
+        self._lane = lane
+        self.endpoint = endpoint
+        self.priority = priority
+        self.wait_seconds = wait_seconds
+        self.admitted_at = time.monotonic()
+        self._released = False
+
+    @property
+    def wait_ms(self) -> int:
+        return int(self.wait_seconds * 1000)
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        if self._lane is not None:
+            self._lane.release(time.monotonic() - self.admitted_at)
+
+
+class _Lane:
+    """单个入口的并发名额与按优先级排序的等待队列，只在事件循环上访问"""
+
+    def __init__(self, endpoint: str, max_in_flight: int, queue_size: int):
+        self.endpoint = endpoint
+        self.max_in_flight = max_in_flight
+        self.queue_size = max(0, queue_size)
+        self.in_flight = 0
+        # (-priority, 入队序号, future)：优先级高者先出队，同优先级先到先得
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+        self.hold_ewma: Optional[float] = None
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self.peak_in_flight = 0
+        self.peak_queue = 0
+
+    def retry_after(self) -> int:
+        """按平均执行耗时估算排在队尾的请求需要等待多久"""
+        if self.hold_ewma is None or self.max_in_flight <= 0:
+            return ADMISSION_RETRY_AFTER_SECONDS
+        return max(1, math.ceil(self.hold_ewma * (len(self._waiters) + 1) / self.max_in_flight))
+
+    def _admit(self, priority: int, wait_seconds: float) -> AdmissionTicket:
+        self.admitted += 1
+        self.wait_seconds_total += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return AdmissionTicket(self, self.endpoint, priority, wait_seconds)
+
+    async def acquire(self, priority: int, timeout: float) -> AdmissionTicket:
+        if self.max_in_flight <= 0 or (self.in_flight < self.max_in_flight and not self._waiters):
+            self.in_flight += 1
+            return self._admit(priority, 0.0)
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            raise AdmissionRejected(
+                f"Too many requests for {self.endpoint}: {self.in_flight} running, {len(self._waiters)} queued",
+                status_code=429,
+                retry_after=self.retry_after(),
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [-priority, next(self._seq), future]
+        heapq.heappush(self._waiters, entry)
+        self.queued += 1
+        self.peak_queue = max(self.peak_queue, len(self._waiters))
+        t0 = time.monotonic()
+        granted = False
+        try:
+            await asyncio.wait_for(future, timeout=timeout)
+            granted = True
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise AdmissionRejected(
+                f"Request for {self.endpoint} waited {timeout}s in queue without being admitted",
+                status_code=503,
+                retry_after=self.retry_after(),
+            )
+        finally:
+            if not granted:
+                if future.done() and not future.cancelled():
+                    # 名额已移交但等待方已离开（取消、客户端断开）：转交给下一位
+                    self.release(None)
+                elif entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+        return self._admit(priority, time.monotonic() - t0)
+
+    def release(self, hold_seconds: Optional[float]) -> None:
+        if hold_seconds is not None:
+            self.hold_ewma = hold_seconds if self.hold_ewma is None else (
+                _HOLD_EWMA_ALPHA * hold_seconds + (1 - _HOLD_EWMA_ALPHA) * self.hold_ewma
+            )
+        # 名额直接移交给优先级最高的等待者，in_flight 不变
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "peak_in_flight": self.peak_in_flight,
+            "peak_queue": self.peak_queue,
+            "admitted": self.admitted,
+            "waited": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.wait_seconds_total / self.admitted * 1000, 1) if self.admitted else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 1),
+            "avg_hold_ms": round(self.hold_ewma * 1000, 1) if self.hold_ewma is not None else None,
+            "retry_after_s": self.retry_after(),
+        }
+
+
+class AdmissionController:
+    """
+    GraphService 前的准入控制
+
+    每个 HTTP 入口（run、stream_run、openai_chat）有独立的并发上限和有界等待队列。
+    名额已满的请求按优先级请求头排队，队列满时立即拒绝（429 + Retry-After），
+    避免突发流量同时压到下游 LLM 配额上、拖慢所有运行。
+    """
+
+    def __init__(
+        self,
+        enabled: bool = ADMISSION_ENABLED,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        queue_size: int = ADMISSION_QUEUE_SIZE,
+        limits: Optional[Dict[str, tuple]] = None,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.enabled = enabled
+        self.max_in_flight = max_in_flight
+        self.queue_size = queue_size
+        self.limits = _parse_limits(ADMISSION_LIMITS) if limits is None else limits
+        self.queue_timeout = queue_timeout
+        self._lanes: Dict[str, _Lane] = {}
+
+    def _lane(self, endpoint: str) -> _Lane:
+        lane = self._lanes.get(endpoint)
+        if lane is None:
+            max_in_flight, queue_size = self.limits.get(endpoint, (self.max_in_flight, self.queue_size))
+            lane = self._lanes[endpoint] = _Lane(endpoint, max_in_flight, queue_size)
+        return lane
+
+    async def acquire(self, endpoint: str, priority: int = 0) -> AdmissionTicket:
+        """
+        获取执行名额，名额已满时按优先级排队等待
+
+        Raises:
+            AdmissionRejected: 队列已满或排队超时
+        """
+        if not self.enabled:
+            ticket = AdmissionTicket(None, endpoint, priority, 0.0)
+        else:
+            ticket = await self._lane(endpoint).acquire(priority, self.queue_timeout)
+            if ticket.wait_seconds > 0:
+                logger.info(f"Admitted {endpoint} request after {ticket.wait_ms}ms in queue, priority={priority}")
+        queue_wait_ms.set(ticket.wait_ms)
+        return ticket
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "queue_timeout_s": self.queue_timeout,
+            "endpoints": {name: lane.stats() for name, lane in self._lanes.items()},
+        }
+
+
+_admission_controller: Optional[AdmissionController] = None
+_admission_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    global _admission_controller
+    if _admission_controller is None:
+        with _admission_controller_lock:
+            if _admission_controller is None:
+                _admission_controller = AdmissionController()
+    return _admission_controller
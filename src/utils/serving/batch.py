@@ -0,0 +1,143 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from coze_coding_utils.runtime_ctx.context import new_context
+
+from utils.log.write_log import request_context
+
+logger = logging.getLogger(__name__)
+
+# 批量运行默认并发数
+BATCH_RUN_CONCURRENCY = int(os.getenv("BATCH_RUN_CONCURRENCY", "8"))
+# 批量运行并发数上限，防止单个请求占满服务
+BATCH_RUN_MAX_CONCURRENCY = int(os.getenv("BATCH_RUN_MAX_CONCURRENCY", "64"))
+
+BATCH_STATUS_SUCCESS = "success"
+BATCH_STATUS_ERROR = "error"
+BATCH_STATUS_TIMEOUT = "timeout"
+BATCH_STATUS_CANCELLED = "cancelled"
+
+
+def parse_batch_input(text: str) -> Tuple[List[Any], Optional[int]]:
+    """
+    解析批量输入
+
+    支持三种格式：
+    - JSON 数组：[{"domain": "科技"}, ...]
+    - JSON 对象：{"items": [...], "concurrency": 16}
+    - JSONL：每行一个 payload
+
+    Returns:
+        (payload 列表, 请求中指定的并发数或 None)
+    """
+    text = text.strip()
+    if not text:
+        raise ValueError("batch input is empty")
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = None
+        items = []
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"invalid JSON at line {line_no}: {e}")
+        return items, None
+
+    if isinstance(data, list):
+        return data, None
+    if isinstance(data, dict) and isinstance(data.get("items"), list):
+        concurrency = data.get("concurrency")
+        return data["items"], int(concurrency) if concurrency else None
+    # 单个 payload 也视为一行 JSONL
+    return [data], None
+
+
+class BatchRunner:
+    """
+    批量运行
+
+    在同一进程内通过 GraphService.run 执行多个 payload：
+    - 固定数量的 worker 依次领取 payload，并发数受 concurrency 限制
+    - 进程级的客户端配置、LLM 配置缓存、搜索缓存等在各条目间共享
+    - 单个条目的异常、超时、取消只影响该条目，结果按完成顺序逐条产出
+    - 每个条目有独立的 run_id，并登记到 running_tasks，可通过 /cancel/{run_id} 单独取消
+    """
+
+    def __init__(self, service, concurrency: int = BATCH_RUN_CONCURRENCY, item_timeout: Optional[float] = None):
+        """
+        Args:
+            service: GraphService 实例
+            concurrency: 并发数，超过 BATCH_RUN_MAX_CONCURRENCY 时取上限
+            item_timeout: 单个条目的超时时间（秒），None 表示不限制
+        """
+        self.service = service
+        self.concurrency = max(1, min(concurrency, BATCH_RUN_MAX_CONCURRENCY))
+        self.item_timeout = item_timeout
+
+    async def run(self, payloads: Iterable[Any]) -> AsyncIterator[Dict[str, Any]]:
+        """按完成顺序产出每个条目的结果"""
+        queue: asyncio.Queue = asyncio.Queue()
+        items = enumerate(payloads)
+
+        async def worker():
+            # 所有 worker 共享同一个迭代器，next() 是同步调用，不会重复领取
+            for index, payload in items:
+                queue.put_nowait(await self._run_one(index, payload))
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+
+        async def close():
+            await asyncio.gather(*workers, return_exceptions=True)
+            queue.put_nowait(None)
+
+        closer = asyncio.create_task(close())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            # 调用方提前退出（如客户端断开）时取消剩余条目
+            for w in workers:
+                w.cancel()
+            closer.cancel()
+
+    async def _run_one(self, index: int, payload: Any) -> Dict[str, Any]:
+        ctx = new_context(method="batch_run")
+        run_id = ctx.run_id
+        request_context.set(ctx)
+        t0 = time.time()
+        record: Dict[str, Any] = {"index": index, "run_id": run_id}
+
+        if not isinstance(payload, dict):
+            record.update(status=BATCH_STATUS_ERROR, error={"code": "invalid_payload", "message": "payload must be a JSON object"})
+            return record
+
+        task = asyncio.create_task(self.service.run(payload, ctx))
+        self.service.running_tasks[run_id] = task
+        try:
+            result = await asyncio.wait_for(task, timeout=self.item_timeout)
+            if isinstance(result, dict) and result.get("status") == "cancelled":
+                record.update(status=BATCH_STATUS_CANCELLED)
+            else:
+                record.update(status=BATCH_STATUS_SUCCESS, result=result)
+        except asyncio.TimeoutError:
+            logger.error(f"Batch item {index} timeout after {self.item_timeout}s, run_id: {run_id}")
+            record.update(status=BATCH_STATUS_TIMEOUT, error={"code": "timeout", "message": f"Execution timeout: exceeded {self.item_timeout} seconds"})
+        except Exception as e:
+            err = self.service.error_classifier.classify(e, {"node_name": "batch_run", "run_id": run_id})
+            record.update(status=BATCH_STATUS_ERROR, error={"code": str(err.code), "message": err.message})
+        finally:
+            self.service.running_tasks.pop(run_id, None)
+
+        record["time_cost_ms"] = int((time.time() - t0) * 1000)
+        return record
@@ -0,0 +1,127 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+from utils.blob import require_durable_refs
+
+logger = logging.getLogger(__name__)
+
+# 工作流是否挂载 checkpointer，失败的运行可通过 /resume/{run_id} 从最后完成的节点继续
+RUN_CHECKPOINT_ENABLED = os.getenv("RUN_CHECKPOINT_ENABLED", "true").lower() == "true"
+# checkpoint 存储：auto（配置了数据库时使用 Postgres，否则进程内）、postgres、memory
+RUN_CHECKPOINT_BACKEND = os.getenv("RUN_CHECKPOINT_BACKEND", "auto")
+# 本进程最多保留的未完成运行数，超出后删除最早的 checkpoint
+RUN_CHECKPOINT_MAX_RUNS = int(os.getenv("RUN_CHECKPOINT_MAX_RUNS", "256"))
+
+
+class RunCheckpointRegistry:
+    """
+    工作流运行的 checkpoint 保留策略
+
+    每次运行以 run_id 作为 thread_id 写入 checkpoint：
+    - 成功的运行不再需要恢复，完成后立即删除 checkpoint，避免 checkpoint 随请求数无限增长
+    - 失败、取消或超时的运行保留 checkpoint 以便恢复，本进程按时间顺序最多保留 max_runs 个
+    - 是否可恢复以 checkpoint 本身为准（仍有待执行的节点），持久化存储下进程重启后仍可恢复
+
+    图以进程内 MemorySaver 编译；服务启动后 open() 在事件循环上创建 Postgres checkpointer 并替换，
+    AsyncPostgresSaver 绑定创建时的事件循环，不能在导入时创建。
+    """
+
+    def __init__(self, graph: Any, max_runs: int = RUN_CHECKPOINT_MAX_RUNS):
+        """
+        Args:
+            graph: 以 checkpointer 编译的工作流图，None 表示不使用 checkpoint（agent 项目）
+        """
+        self.graph = graph
+        self.max_runs = max_runs
+        self._unfinished: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._manager = None
+
+    @property
+    def checkpointer(self) -> Optional[BaseCheckpointSaver]:
+        return getattr(self.graph, "checkpointer", None)
+
+    @property
+    def enabled(self) -> bool:
+        return self.checkpointer is not None
+
+    @property
+    def persistent(self) -> bool:
+        """checkpoint 是否在进程外保存（进程重启、其他 worker 均可恢复）"""
+        return self.enabled and not isinstance(self.checkpointer, InMemorySaver)
+
+    async def open(self) -> None:
+        """在服务的事件循环上按 RUN_CHECKPOINT_BACKEND 挂载 Postgres checkpointer，不可用时保留 MemorySaver"""
+        if not self.enabled or RUN_CHECKPOINT_BACKEND == "memory":
+            return
+        from storage.memory.memory_saver import get_memory_manager
+
+        self._manager = get_memory_manager()
+        checkpointer = await self._manager.acreate_postgres_checkpointer()
+        if checkpointer is None:
+            log = logger.warning if RUN_CHECKPOINT_BACKEND == "postgres" else logger.info
+            log("Postgres checkpointer unavailable, run checkpoints stay in process memory")
+            return
+        self.graph.checkpointer = checkpointer
+        # 恢复可能发生在进程重启后或其他 worker 上，状态中的文本引用需跨进程可读
+        require_durable_refs()
+        logger.info("Run checkpoints are stored in Postgres, /resume survives restarts")
+
+    async def aclose(self) -> None:
+        if self._manager is not None:
+            await self._manager.aclose()
+            self._manager = None
+
+    async def _delete(self, run_id: str) -> None:
+        try:
+            await self.checkpointer.adelete_thread(run_id)
+        except Exception as e:
+            logger.warning(f"Failed to delete checkpoint for run_id {run_id}: {e}")
+
+    async def finished(self, run_id: str) -> None:
+        """运行成功结束"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._unfinished.pop(run_id, None)
+        await self._delete(run_id)
+
+    async def unfinished(self, run_id: str) -> None:
+        """运行失败、取消或超时，保留 checkpoint"""
+        if not self.enabled:
+            return
+        evicted = []
+        with self._lock:
+            self._unfinished[run_id] = None
+            self._unfinished.move_to_end(run_id)
+            while len(self._unfinished) > self.max_runs:
+                evicted.append(self._unfinished.popitem(last=False)[0])
+        for old_run_id in evicted:
+            logger.info(f"Evicting checkpoint for unfinished run_id {old_run_id}")
+            await self._delete(old_run_id)
+        logger.info(f"Kept checkpoint for unfinished run_id {run_id}, resume with /resume/{run_id}")
+
+    async def is_resumable(self, run_id: str) -> bool:
+        """run_id 的最后一个 checkpoint 仍有待执行的节点"""
+        if not self.enabled:
+            return False
+        checkpointer = self.checkpointer
+        # MemorySaver 查询不存在的 thread 会留下空记录
+        if isinstance(checkpointer, InMemorySaver) and run_id not in checkpointer.storage:
+            return False
+        snapshot = await self.graph.aget_state({"configurable": {"thread_id": run_id}})
+        return bool(snapshot.next)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "backend": type(self.checkpointer).__name__ if self.enabled else "none",
+                "unfinished_runs": len(self._unfinished),
+            }
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 是否开启 /run 请求合并（默认关闭）
+RUN_COALESCE_ENABLED = os.getenv("RUN_COALESCE_ENABLED", "false").lower() == "true"
+# 运行成功后结果继续复用的时间（秒），0 表示只合并仍在执行中的请求
+RUN_COALESCE_WINDOW_SECONDS = float(os.getenv("RUN_COALESCE_WINDOW_SECONDS", "0"))
+# 参与计算合并 key 的字段，逗号分隔，为空表示使用整个 payload
+RUN_COALESCE_KEY_FIELDS = [f.strip() for f in os.getenv("RUN_COALESCE_KEY_FIELDS", "").split(",") if f.strip()]
+
+
+def _normalize(value: Any) -> Any:
+    """归一化 payload：字符串去首尾空白、合并连续空白并忽略大小写"""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+@dataclass
+class _SharedRun:
+    task: asyncio.Task
+    leader_run_id: str
+    finished_at: Optional[float] = None
+    waiters: int = 0
+
+
+class RunCoalescer:
+    """
+    相同 payload 的运行合并
+
+    第一个请求（leader）启动真正的图执行，之后 key 相同的请求（follower）直接挂到
+    同一个 asyncio.Task 上等待结果，各自返回一份结果拷贝（调用方再写入自己的 run_id）。
+    所有等待方都被取消时，才取消共享的执行任务。
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = RUN_COALESCE_WINDOW_SECONDS,
+        key_fields: Optional[List[str]] = None,
+        key_fn: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None,
+    ):
+        """
+        Args:
+            window_seconds: 成功结果在完成后继续复用的时间（秒）
+            key_fields: 参与计算 key 的 payload 字段，默认取 RUN_COALESCE_KEY_FIELDS
+            key_fn: 自定义 key 计算函数，返回 None 表示该请求不参与合并
+        """
+        self.window_seconds = window_seconds
+        self.key_fields = key_fields if key_fields is not None else RUN_COALESCE_KEY_FIELDS
+        self.key_fn = key_fn
+        self._runs: Dict[str, _SharedRun] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def make_key(self, payload: Dict[str, Any]) -> Optional[str]:
+        if self.key_fn is not None:
+            return self.key_fn(payload)
+        if not isinstance(payload, dict):
+            return None
+        data = {k: payload.get(k) for k in self.key_fields} if self.key_fields else payload
+        return json.dumps(_normalize(data), sort_keys=True, ensure_ascii=False, default=str)
+
+    def _is_reusable(self, shared: _SharedRun) -> bool:
+        if not shared.task.done():
+            return True
+        if shared.task.cancelled() or shared.task.exception() is not None:
+            return False
+        return shared.finished_at is not None and time.monotonic() - shared.finished_at <= self.window_seconds
+
+    def _on_done(self, key: str, shared: _SharedRun) -> None:
+        shared.finished_at = time.monotonic()
+        if not self._is_reusable(shared) and self._runs.get(key) is shared:
+            del self._runs[key]
+
+    def _evict_expired(self) -> None:
+        expired = [k for k, s in self._runs.items() if not self._is_reusable(s)]
+        for k in expired:
+            del self._runs[k]
+
+    async def run(self, payload: Dict[str, Any], factory: Callable[[], Awaitable[Any]], run_id: str = "") -> Any:
+        """
+        执行或合并一次运行
+
+        Args:
+            payload: 请求 payload，用于计算合并 key
+            factory: 真正执行运行的协程工厂，仅 leader 调用
+            run_id: 当前请求的 run_id，仅用于日志
+        """
+        key = self.make_key(payload)
+        if key is None:
+            return await factory()
+
+        self._evict_expired()
+        shared = self._runs.get(key)
+        if shared is None:
+            shared = _SharedRun(task=asyncio.create_task(factory()), leader_run_id=run_id)
+            shared.task.add_done_callback(lambda _t, k=key, s=shared: self._on_done(k, s))
+            self._runs[key] = shared
+            self.leaders += 1
+        else:
+            self.followers += 1
+            logger.info(f"Run {run_id} coalesced into run {shared.leader_run_id}")
+
+        shared.waiters += 1
+        try:
+            result = await asyncio.shield(shared.task)
+        except asyncio.CancelledError:
+            if shared.waiters == 1 and not shared.task.done():
+                logger.info(f"All waiters of run {shared.leader_run_id} cancelled, cancelling shared execution")
+                shared.task.cancel()
+            raise
+        finally:
+            shared.waiters -= 1
+
+        return dict(result) if isinstance(result, dict) else result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "shared_runs": len(self._runs),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
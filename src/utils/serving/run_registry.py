@@ -0,0 +1,247 @@
+import asyncio
+import contextlib
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# HTTP 服务的 worker 进程数（uvicorn workers），大于 1 时默认开启跨进程运行登记
+HTTP_WORKERS = int(os.getenv("HTTP_WORKERS", "1"))
+# 是否开启跨进程运行登记：各 worker 通过 Unix socket 互相查询运行归属，转发取消、状态与恢复请求
+RUN_REGISTRY_ENABLED = os.getenv("RUN_REGISTRY_ENABLED", str(HTTP_WORKERS > 1)).lower() == "true"
+# worker 控制 socket 所在目录，同一主机上的 worker 需使用同一目录
+RUN_REGISTRY_DIR = os.getenv("RUN_REGISTRY_DIR", os.path.join(tempfile.gettempdir(), "run_registry"))
+# 每个 worker 保留的已结束运行记录数，供状态查询
+RUN_REGISTRY_HISTORY = int(os.getenv("RUN_REGISTRY_HISTORY", "1024"))
+# 查询其他 worker 的超时时间（秒）
+RUN_REGISTRY_PEER_TIMEOUT = float(os.getenv("RUN_REGISTRY_PEER_TIMEOUT", "2"))
+
+RUN_STATUS_RUNNING = "running"
+RUN_STATUS_SUCCEEDED = "succeeded"
+RUN_STATUS_FAILED = "failed"
+RUN_STATUS_CANCELLED = "cancelled"
+
+# 单条控制消息的长度上限（恢复运行的结果可能较大）
+_MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+OpHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class RunRecord:
+    """一次运行的归属与状态"""
+    run_id: str
+    method: str
+    worker_pid: int
+    status: str = RUN_STATUS_RUNNING
+    started_at: float = 0.0
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class RunRegistry:
+    """
+    跨 worker 的运行登记
+
+    每个 worker 在本进程内登记自己执行的运行（run_id 即 checkpoint 的 thread_id），
+    开启后在 RUN_REGISTRY_DIR 下监听 worker-<pid>.sock。请求落到非归属 worker 时，
+    先向其他 worker 广播 lookup 找到归属者，再把取消、状态查询、恢复等操作转发过去，
+    保证 MemorySaver 中的 checkpoint 与 running_tasks 中的任务始终由同一进程处理。
+    """
+
+    def __init__(self, directory: str = RUN_REGISTRY_DIR, history: int = RUN_REGISTRY_HISTORY):
+        self.directory = directory
+        self.history = history
+        self.pid = os.getpid()
+        self.socket_path = os.path.join(directory, f"worker-{self.pid}.sock")
+        self._records: "OrderedDict[str, RunRecord]" = OrderedDict()
+        self._handlers: Dict[str, OpHandler] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.forwarded = 0
+
+    # ---- 本进程登记 ----
+
+    def start(self, run_id: str, method: str) -> None:
+        with self._lock:
+            self._records[run_id] = RunRecord(run_id=run_id, method=method, worker_pid=self.pid, started_at=time.time())
+            self._records.move_to_end(run_id)
+
+    def finish(self, run_id: str, status: str) -> None:
+        with self._lock:
+            record = self._records.get(run_id)
+            if record is None:
+                return
+            record.status = status
+            record.finished_at = time.time()
+            # 只淘汰已结束的记录，运行中的记录一直保留
+            finished = [rid for rid, r in self._records.items() if r.finished_at is not None]
+            for rid in finished[:max(0, len(finished) - self.history)]:
+                del self._records[rid]
+
+    @contextlib.contextmanager
+    def track(self, run_id: str, method: str) -> Iterator[None]:
+        """登记运行并按退出方式记录结束状态"""
+        self.start(run_id, method)
+        status = RUN_STATUS_FAILED
+        try:
+            yield
+            status = RUN_STATUS_SUCCEEDED
+        except (asyncio.CancelledError, GeneratorExit):
+            status = RUN_STATUS_CANCELLED
+            raise
+        finally:
+            self.finish(run_id, status)
+
+    def get(self, run_id: str) -> Optional[RunRecord]:
+        with self._lock:
+            return self._records.get(run_id)
+
+    # ---- worker 间通信 ----
+
+    @property
+    def serving(self) -> bool:
+        return self._server is not None
+
+    def register_handler(self, op: str, handler: OpHandler) -> None:
+        """注册可被其他 worker 调用的操作，handler 接收请求消息并返回可 JSON 序列化的结果"""
+        self._handlers[op] = handler
+
+    async def serve(self) -> None:
+        """在当前事件循环上监听本 worker 的控制 socket（应用启动时调用）"""
+        # worker 进程可能由创建登记表的进程 fork 而来，以监听时的 pid 为准
+        self.pid = os.getpid()
+        self.socket_path = os.path.join(self.directory, f"worker-{self.pid}.sock")
+        os.makedirs(self.directory, exist_ok=True)
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path, limit=_MAX_MESSAGE_BYTES)
+        logger.info(f"Run registry listening on {self.socket_path}")
+
+    async def aclose(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            message = json.loads(await reader.readline())
+            op = message.get("op")
+            if op == "lookup":
+                record = self.get(message.get("run_id", ""))
+                response: Dict[str, Any] = {"found": record is not None, "record": record.to_dict() if record else None}
+            elif op in self._handlers:
+                response = await self._handlers[op](message)
+            else:
+                response = {"error": f"unknown op: {op}"}
+            writer.write(json.dumps(response, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+            await writer.drain()
+        except Exception as e:
+            logger.warning(f"Run registry request failed: {e}")
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    def _peers(self) -> List[str]:
+        return [p for p in glob.glob(os.path.join(self.directory, "worker-*.sock")) if p != self.socket_path]
+
+    @staticmethod
+    def _remove_if_dead(path: str) -> None:
+        """连接失败且进程已退出时清理遗留的 socket 文件"""
+        try:
+            pid = int(os.path.basename(path)[len("worker-"):-len(".sock")])
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+        except (ValueError, PermissionError):
+            pass
+
+    async def _call(self, path: str, message: Dict[str, Any], timeout: float) -> Optional[Dict[str, Any]]:
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(path, limit=_MAX_MESSAGE_BYTES), timeout=RUN_REGISTRY_PEER_TIMEOUT
+            )
+            writer.write(json.dumps(message, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+            await writer.drain()
+            line = await asyncio.wait_for(reader.readline(), timeout=timeout)
+            return json.loads(line) if line else None
+        except (ConnectionRefusedError, FileNotFoundError):
+            self._remove_if_dead(path)
+            return None
+        except (asyncio.TimeoutError, OSError, ValueError) as e:
+            logger.warning(f"Run registry call to {path} failed: {e}")
+            return None
+        finally:
+            if writer is not None:
+                writer.close()
+
+    async def find_owner(self, run_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """向其他 worker 广播查询 run_id 的归属，返回 (socket 路径, 运行记录)"""
+        if not self.serving:
+            return None
+        peers = self._peers()
+        responses = await asyncio.gather(
+            *[self._call(path, {"op": "lookup", "run_id": run_id}, RUN_REGISTRY_PEER_TIMEOUT) for path in peers]
+        )
+        for path, response in zip(peers, responses):
+            if response and response.get("found"):
+                return path, response["record"]
+        return None
+
+    async def forward(self, run_id: str, op: str, timeout: float = RUN_REGISTRY_PEER_TIMEOUT, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        """
+        把操作转发给 run_id 的归属 worker
+
+        Returns:
+            归属 worker 的处理结果；未开启、找不到归属者或归属者无响应时返回 None
+        """
+        owner = await self.find_owner(run_id)
+        if owner is None:
+            return None
+        path, record = owner
+        logger.info(f"Forwarding {op} for run_id {run_id} to worker {record.get('worker_pid')}")
+        self.forwarded += 1
+        return await self._call(path, {"op": op, "run_id": run_id, **kwargs}, timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = sum(1 for r in self._records.values() if r.finished_at is None)
+            total = len(self._records)
+        return {
+            "enabled": self.serving,
+            "worker_pid": self.pid,
+            "peers": len(self._peers()) if self.serving else 0,
+            "running": running,
+            "records": total,
+            "forwarded": self.forwarded,
+        }
+
+
+_run_registry: Optional[RunRegistry] = None
+_run_registry_lock = threading.Lock()
+
+
+def get_run_registry() -> RunRegistry:
+    global _run_registry
+    if _run_registry is None:
+        with _run_registry_lock:
+            if _run_registry is None:
+                _run_registry = RunRegistry()
+    return _run_registry
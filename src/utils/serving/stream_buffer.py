@@ -0,0 +1,340 @@
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional, Protocol
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+# 每个流式连接的缓冲区高水位（条），达到后按 STREAM_BUFFER_POLICY 处理
+STREAM_BUFFER_HIGH_WATER = int(os.getenv("STREAM_BUFFER_HIGH_WATER", "256"))
+# 达到高水位时的策略：block（生产者等待）、coalesce（合并同一条消息的连续增量，无法合并时等待）、
+# disconnect（生产者最多等待宽限期，之后断开该连接）
+STREAM_BUFFER_POLICY = os.getenv("STREAM_BUFFER_POLICY", "coalesce")
+# disconnect 策略的宽限期（秒）
+STREAM_BUFFER_GRACE_SECONDS = float(os.getenv("STREAM_BUFFER_GRACE_SECONDS", "30"))
+
+POLICY_BLOCK = "block"
+POLICY_COALESCE = "coalesce"
+POLICY_DISCONNECT = "disconnect"
+
+# /stats 中按深度列出的流数量上限
+_STATS_TOP_STREAMS = 20
+
+
+class SlowConsumerError(Exception):
+    """客户端读取过慢，缓冲区在宽限期内一直处于高水位，服务端断开该连接"""
+
+
+class Coalescer(Protocol):
+    def key(self, item: Any) -> Any:
+        """消息所属的逻辑流（如 msg_id），只与缓冲区中同一逻辑流的最后一条尝试合并"""
+
+    def renumber(self, item: Any) -> Any:
+        """每条进入缓冲区的消息都会经过这里，可用于合并后顺延序号"""
+
+    def merge(self, prev: Any, item: Any) -> Optional[Any]:
+        """尝试把 item 合并进缓冲区末尾的 prev，返回合并后的消息，无法合并返回 None"""
+
+
+class StreamBuffer:
+    """
+    单个流式连接的有界缓冲区，位于图的生产者与 SSE 响应之间
+
+    生产者可以在事件循环上（put）或后台线程中（put_threadsafe）写入，消费者在事件循环上按序读取。
+    客户端读得慢时缓冲区不再无限增长：达到高水位后按策略让生产者等待、合并增量或断开连接。
+    """
+
+    def __init__(
+        self,
+        stream_id: str,
+        high_water: int = STREAM_BUFFER_HIGH_WATER,
+        policy: str = STREAM_BUFFER_POLICY,
+        grace_seconds: float = STREAM_BUFFER_GRACE_SECONDS,
+        coalescer: Optional[Coalescer] = None,
+    ):
+        self.stream_id = stream_id
+        self.high_water = max(1, high_water)
+        self.policy = policy
+        self.grace_seconds = grace_seconds
+        self.coalescer = coalescer
+        self._loop = asyncio.get_running_loop()
+        self._items: Deque[Any] = deque()
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+        # 节点已输出、生产者尚未从图的流中取走的 token 数（见 StreamBackpressureHandler）
+        self._emitted = 0
+        self._emit_room = asyncio.Event()
+        self._closed = False
+        self._dropped = False
+        # 因客户端过慢被断开（区别于消费者主动离开）
+        self.slow_consumer = False
+        # 线程生产者已提交、尚未进入缓冲区的条数
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.created_at = time.monotonic()
+        self.peak_depth = 0
+        self.items_in = 0
+        self.coalesced = 0
+        self.producer_waits = 0
+        self.producer_wait_seconds = 0.0
+        self.emitter_waits = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    @property
+    def dropped(self) -> bool:
+        return self._dropped
+
+    def _renumber(self, item: Any) -> Any:
+        return self.coalescer.renumber(item) if self.coalescer is not None else item
+
+    def _append(self, item: Any) -> None:
+        self._items.append(item)
+        self.items_in += 1
+        self.peak_depth = max(self.peak_depth, len(self._items))
+        self._readable.set()
+
+    def _try_coalesce(self, item: Any) -> bool:
+        if self.policy != POLICY_COALESCE or self.coalescer is None:
+            return False
+        key = self.coalescer.key(item)
+        # 并行分支的增量交错到达，向前找同一逻辑流的最后一条，合并后该流内的顺序不变
+        for index in range(len(self._items) - 1, -1, -1):
+            if self.coalescer.key(self._items[index]) != key:
+                continue
+            merged = self.coalescer.merge(self._items[index], item)
+            if merged is None:
+                return False
+            self._items[index] = merged
+            self.coalesced += 1
+            return True
+        return False
+
+    async def _wait_writable(self) -> bool:
+        self.producer_waits += 1
+        t0 = time.monotonic()
+        try:
+            while len(self._items) >= self.high_water and not self._dropped:
+                self._writable.clear()
+                if self.policy != POLICY_DISCONNECT:
+                    await self._writable.wait()
+                    continue
+                remaining = self.grace_seconds - (time.monotonic() - t0)
+                try:
+                    await asyncio.wait_for(self._writable.wait(), timeout=max(0.0, remaining))
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        f"Stream {self.stream_id} buffer stayed at high water {self.high_water} "
+                        f"for {self.grace_seconds}s, disconnecting slow consumer"
+                    )
+                    self.slow_consumer = True
+                    self._drop()
+        finally:
+            self.producer_wait_seconds += time.monotonic() - t0
+        return not self._dropped
+
+    async def acquire_emit(self) -> None:
+        """节点输出一个 token 后调用：尚未被生产者取走的 token 达到高水位时等待"""
+        if self._emitted >= self.high_water and not (self._dropped or self._closed):
+            self.emitter_waits += 1
+            while self._emitted >= self.high_water and not (self._dropped or self._closed):
+                self._emit_room.clear()
+                await self._emit_room.wait()
+        self._emitted += 1
+
+    def release_emit(self) -> None:
+        """生产者从图的流中取走一条"""
+        if self._emitted:
+            self._emitted -= 1
+            self._emit_room.set()
+
+    async def put(self, item: Any) -> bool:
+        """
+        在事件循环上写入一条消息，缓冲区满时按策略等待
+
+        Returns:
+            False 表示连接已断开（客户端过慢或已离开），生产者应停止
+        """
+        if self._dropped or self._closed:
+            return False
+        item = self._renumber(item)
+        if len(self._items) >= self.high_water:
+            if self._try_coalesce(item):
+                return True
+            if not await self._wait_writable():
+                return False
+        self._append(item)
+        return True
+
+    def _put_in_flight(self, item: Any) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        if not (self._dropped or self._closed):
+            self._append(self._renumber(item))
+
+    def put_threadsafe(self, item: Any) -> bool:
+        """put 的线程版本：缓冲区未满时不等待事件循环，满时阻塞当前线程"""
+        with self._lock:
+            fast = not (self._dropped or self._closed) and len(self._items) + self._in_flight < self.high_water
+            if fast:
+                self._in_flight += 1
+        try:
+            if fast:
+                self._loop.call_soon_threadsafe(self._put_in_flight, item)
+                return True
+            return asyncio.run_coroutine_threadsafe(self.put(item), self._loop).result()
+        except RuntimeError:
+            # 事件循环已关闭（服务退出）
+            return False
+
+    def close(self) -> None:
+        """生产者结束，消费者读完剩余消息后停止"""
+        self._closed = True
+        self._readable.set()
+        self._emit_room.set()
+
+    def close_threadsafe(self) -> None:
+        with contextlib.suppress(RuntimeError):
+            self._loop.call_soon_threadsafe(self.close)
+
+    def _drop(self) -> None:
+        self._dropped = True
+        self._items.clear()
+        self._readable.set()
+        self._writable.set()
+        self._emit_room.set()
+
+    def abort(self) -> None:
+        """消费者离开（取消、断开）：唤醒并停止仍在等待的生产者"""
+        if not self._closed:
+            self._drop()
+
+    def __aiter__(self) -> "StreamBuffer":
+        return self
+
+    async def __anext__(self) -> Any:
+        while not self._items:
+            if self._dropped:
+                raise SlowConsumerError(f"Client read too slowly, buffer stayed full for {self.grace_seconds}s")
+            if self._closed:
+                raise StopAsyncIteration
+            self._readable.clear()
+            await self._readable.wait()
+        item = self._items.popleft()
+        if len(self._items) < self.high_water:
+            self._writable.set()
+        return item
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "stream_id": self.stream_id,
+            "depth": len(self._items),
+            "peak_depth": self.peak_depth,
+            "items_in": self.items_in,
+            "coalesced": self.coalesced,
+            "producer_waits": self.producer_waits,
+            "producer_wait_ms": round(self.producer_wait_seconds * 1000, 1),
+            "emitter_waits": self.emitter_waits,
+            "age_s": round(time.monotonic() - self.created_at, 1),
+        }
+
+
+class StreamBackpressureHandler(AsyncCallbackHandler):
+    """
+    把缓冲区的背压传到节点内的 LLM token 输出
+
+    原生异步流式运行时图与 SSE 生产者在同一事件循环上，生产者阻塞在已满的缓冲区上时，
+    LangGraph 内部的流队列（无界）仍会继续接收节点输出的 token。挂到运行的 callbacks 后，
+    已输出但生产者尚未取走的 token 达到高水位时 token 输出等待，内部队列最多比高水位多出
+    每个进行中的 LLM 调用一条。生产者合并增量（coalesce）而不阻塞时 token 会被及时取走，不受影响。
+    线程方式的生产者阻塞时整个图的事件循环都会暂停，无需挂载。
+    """
+
+    def __init__(self, buffer: StreamBuffer):
+        self.buffer = buffer
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        await self.buffer.acquire_emit()
+
+    async def track(self, items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """包装 graph.astream 的输出，每取走一条归还一个名额"""
+        async for item in items:
+            self.buffer.release_emit()
+            yield item
+
+
+class StreamBufferRegistry:
+    """登记进行中的流式缓冲区，汇总 /stats 中的队列深度指标"""
+
+    def __init__(self):
+        self._buffers: Dict[int, StreamBuffer] = {}
+        self._lock = threading.Lock()
+        self.finished = 0
+        self.coalesced = 0
+        self.producer_waits = 0
+        self.emitter_waits = 0
+        self.disconnected = 0
+        self.peak_depth = 0
+
+    @contextlib.contextmanager
+    def open(self, stream_id: str, coalescer: Optional[Coalescer] = None, **kwargs: Any) -> Iterator[StreamBuffer]:
+        """在当前事件循环上创建缓冲区，退出时停止生产者并计入汇总"""
+        buffer = StreamBuffer(stream_id, coalescer=coalescer, **kwargs)
+        with self._lock:
+            self._buffers[id(buffer)] = buffer
+        try:
+            yield buffer
+        finally:
+            buffer.abort()
+            with self._lock:
+                self._buffers.pop(id(buffer), None)
+                self.finished += 1
+                self.coalesced += buffer.coalesced
+                self.producer_waits += buffer.producer_waits
+                self.emitter_waits += buffer.emitter_waits
+                self.disconnected += int(buffer.slow_consumer)
+                self.peak_depth = max(self.peak_depth, buffer.peak_depth)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buffers = list(self._buffers.values())
+            totals = {
+                "finished_streams": self.finished,
+                "coalesced": self.coalesced + sum(b.coalesced for b in buffers),
+                "producer_waits": self.producer_waits + sum(b.producer_waits for b in buffers),
+                "emitter_waits": self.emitter_waits + sum(b.emitter_waits for b in buffers),
+                "disconnected": self.disconnected,
+                "peak_depth": max([self.peak_depth] + [b.peak_depth for b in buffers]),
+            }
+        streams = sorted((b.stats() for b in buffers), key=lambda s: s["depth"], reverse=True)
+        return {
+            "policy": STREAM_BUFFER_POLICY,
+            "high_water": STREAM_BUFFER_HIGH_WATER,
+            "active_streams": len(buffers),
+            "buffered_items": sum(s["depth"] for s in streams),
+            "max_depth": streams[0]["depth"] if streams else 0,
+            "streams": streams[:_STATS_TOP_STREAMS],
+            **totals,
+        }
+
+
+_stream_buffers: Optional[StreamBufferRegistry] = None
+_stream_buffers_lock = threading.Lock()
+
+
+def get_stream_buffers() -> StreamBufferRegistry:
+    global _stream_buffers
+    if _stream_buffers is None:
+        with _stream_buffers_lock:
+            if _stream_buffers is None:
+                _stream_buffers = StreamBufferRegistry()
+    return _stream_buffers
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+测试：准入控制的优先级排队、队列满拒绝与等待者离开时的名额移交
+
+运行（在 src 目录下）：python -m pytest utils/serving/test_admission.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加src目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.serving.admission import AdmissionController, AdmissionRejected, _Lane
+
+
+async def _queue(lane: _Lane, priority: int, admitted: list, timeout: float = 5.0, hold: bool = True) -> asyncio.Task:
+    """排队等待名额，hold=False 时准入后立即归还"""
+    async def waiter():
+        ticket = await lane.acquire(priority, timeout)
+        admitted.append(priority)
+        if not hold:
+            ticket.release()
+        return ticket
+
+    task = asyncio.create_task(waiter())
+    await asyncio.sleep(0)
+    return task
+
+
+def test_waiters_are_admitted_by_priority_then_arrival():
+    async def main():
+        lane = _Lane("run", max_in_flight=1, queue_size=8)
+        running = await lane.acquire(0, 5.0)
+        admitted = []
+        tasks = [await _queue(lane, p, admitted, hold=False) for p in (0, 5, 1, 5)]
+        assert lane.stats()["queued"] == 4
+
+        running.release()
+        await asyncio.gather(*tasks)
+        # 高优先级先出队，同优先级先到先得
+        assert admitted == [5, 5, 1, 0]
+        assert lane.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_full_queue_is_rejected_with_429():
+    async def main():
+        lane = _Lane("run", max_in_flight=1, queue_size=1)
+        running = await lane.acquire(0, 5.0)
+        queued = await _queue(lane, 0, [])
+        with pytest.raises(AdmissionRejected) as exc:
+            await lane.acquire(9, 5.0)
+        assert exc.value.status_code == 429 and exc.value.retry_after >= 1
+        assert lane.stats()["rejected"] == 1
+
+        running.release()
+        (await queued).release()
+        assert lane.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_queue_timeout_is_rejected_with_503():
+    async def main():
+        lane = _Lane("run", max_in_flight=1, queue_size=4)
+        running = await lane.acquire(0, 5.0)
+        with pytest.raises(AdmissionRejected) as exc:
+            await lane.acquire(0, 0.05)
+        assert exc.value.status_code == 503
+        # 超时的等待者已出队，不会占用后续释放的名额
+        assert lane.stats()["queued"] == 0 and lane.stats()["timed_out"] == 1
+        running.release()
+        assert lane.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def main():
+        lane = _Lane("run", max_in_flight=1, queue_size=4)
+        running = await lane.acquire(0, 5.0)
+        admitted = []
+        leaving = await _queue(lane, 5, admitted)
+        staying = await _queue(lane, 0, admitted)
+        leaving.cancel()
+        await asyncio.gather(leaving, return_exceptions=True)
+        assert lane.stats()["queued"] == 1
+
+        running.release()
+        (await staying).release()
+        assert admitted == [0] and lane.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_slot_granted_to_cancelled_waiter_is_handed_to_next():
+    async def main():
+        lane = _Lane("run", max_in_flight=1, queue_size=4)
+        running = await lane.acquire(0, 5.0)
+        admitted = []
+        first = await _queue(lane, 5, admitted)
+        second = await _queue(lane, 0, admitted)
+
+        # 名额已移交给 first，但 first 在被调度前取消（客户端断开）
+        running.release()
+        first.cancel()
+        results = await asyncio.gather(first, return_exceptions=True)
+        if not isinstance(results[0], asyncio.CancelledError):
+            # wait_for 在结果已就绪时可能仍返回结果，此时由持有者归还
+            results[0].release()
+
+        (await asyncio.wait_for(second, timeout=1)).release()
+        assert admitted[-1] == 0 and lane.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_controller_limits_are_per_endpoint():
+    async def main():
+        controller = AdmissionController(enabled=True, max_in_flight=1, queue_size=0, limits={"stream_run": (2, 0)})
+        run = await controller.acquire("run")
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire("run")
+        streams = [await controller.acquire("stream_run") for _ in range(2)]
+        for ticket in [run, *streams]:
+            ticket.release()
+            # 重复归还不会多释放名额
+            ticket.release()
+        assert all(lane["in_flight"] == 0 for lane in controller.stats()["endpoints"].values())
+
+    asyncio.run(main())
+
+
+def test_disabled_controller_admits_immediately():
+    async def main():
+        controller = AdmissionController(enabled=False, max_in_flight=1, queue_size=0)
+        tickets = [await controller.acquire("run") for _ in range(3)]
+        assert all(t.wait_ms == 0 for t in tickets)
+        assert controller.stats()["endpoints"] == {}
+
+    asyncio.run(main())
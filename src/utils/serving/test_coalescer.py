@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+测试：RunCoalescer 的合并与取消语义
+
+运行（在 src 目录下）：python -m pytest utils/serving/test_coalescer.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加src目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.serving.coalescer import RunCoalescer
+
+
+def _factory(started: list, release: asyncio.Event, result=None):
+    async def run():
+        started.append(1)
+        try:
+            await release.wait()
+        except asyncio.CancelledError:
+            started.append("cancelled")
+            raise
+        return result if result is not None else {"ok": True}
+    return run
+
+
+def test_followers_share_one_execution():
+    async def main():
+        coalescer = RunCoalescer(window_seconds=0)
+        started, release = [], asyncio.Event()
+        tasks = [
+            asyncio.create_task(coalescer.run({"domain": " 科技 "}, _factory(started, release), run_id=f"r{i}"))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+        assert started == [1]
+        assert results == [{"ok": True}] * 3
+        # 每个等待方拿到独立的拷贝
+        assert len({id(r) for r in results}) == 3
+        assert coalescer.stats()["leaders"] == 1 and coalescer.stats()["followers"] == 2
+
+    asyncio.run(main())
+
+
+def test_cancelling_one_waiter_keeps_shared_execution():
+    async def main():
+        coalescer = RunCoalescer(window_seconds=0)
+        started, release = [], asyncio.Event()
+        leader = asyncio.create_task(coalescer.run({"domain": "a"}, _factory(started, release)))
+        follower = asyncio.create_task(coalescer.run({"domain": "a"}, _factory(started, release)))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await follower == {"ok": True}
+        assert "cancelled" not in started
+
+    asyncio.run(main())
+
+
+def test_last_waiter_cancel_cancels_shared_execution():
+    async def main():
+        coalescer = RunCoalescer(window_seconds=0)
+        started, release = [], asyncio.Event()
+        waiters = [asyncio.create_task(coalescer.run({"domain": "a"}, _factory(started, release))) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert started == [1, "cancelled"]
+        # 被取消的执行不再复用，下一个相同请求重新执行
+        assert coalescer.stats()["shared_runs"] == 0
+        release.set()
+        assert await coalescer.run({"domain": "a"}, _factory(started, release)) == {"ok": True}
+        assert started.count(1) == 2
+
+    asyncio.run(main())
+
+
+def test_window_reuses_finished_result():
+    async def main():
+        coalescer = RunCoalescer(window_seconds=60)
+        started, release = [], asyncio.Event()
+        release.set()
+        await coalescer.run({"domain": "A  b"}, _factory(started, release))
+        await coalescer.run({"domain": "a b"}, _factory(started, release))
+        assert started == [1]
+
+    asyncio.run(main())
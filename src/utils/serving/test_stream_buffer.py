@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+测试：StreamBuffer 的高水位策略、线程写入与 token 背压
+
+运行（在 src 目录下）：python -m pytest utils/serving/test_stream_buffer.py
+"""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# 添加src目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.serving.stream_buffer import (
+    POLICY_BLOCK,
+    POLICY_COALESCE,
+    POLICY_DISCONNECT,
+    SlowConsumerError,
+    StreamBackpressureHandler,
+    StreamBuffer,
+)
+
+
+class _DeltaCoalescer:
+    """(key, text) 形式的消息，同一 key 的连续增量拼接"""
+
+    def key(self, item):
+        return item[0]
+
+    def renumber(self, item):
+        return item
+
+    def merge(self, prev, item):
+        return (prev[0], prev[1] + item[1])
+
+
+async def _drain(buffer: StreamBuffer) -> list:
+    return [item async for item in buffer]
+
+
+def test_block_policy_waits_for_consumer():
+    async def main():
+        buffer = StreamBuffer("s", high_water=2, policy=POLICY_BLOCK)
+        assert await buffer.put(1) and await buffer.put(2)
+        third = asyncio.create_task(buffer.put(3))
+        await asyncio.sleep(0.01)
+        assert not third.done() and buffer.depth == 2
+        assert await buffer.__anext__() == 1
+        assert await third
+        buffer.close()
+        assert await _drain(buffer) == [2, 3]
+        assert buffer.producer_waits == 1 and buffer.peak_depth == 2
+
+    asyncio.run(main())
+
+
+def test_coalesce_policy_merges_deltas_of_same_stream():
+    async def main():
+        buffer = StreamBuffer("s", high_water=2, policy=POLICY_COALESCE, coalescer=_DeltaCoalescer())
+        for item in [("a", "1"), ("b", "1"), ("a", "2"), ("b", "2"), ("a", "3")]:
+            assert await asyncio.wait_for(buffer.put(item), timeout=1)
+        buffer.close()
+        # 交错到达的增量按逻辑流合并，各流内的顺序不变，生产者不必等待
+        assert await _drain(buffer) == [("a", "123"), ("b", "12")]
+        assert buffer.coalesced == 3 and buffer.producer_waits == 0
+
+    asyncio.run(main())
+
+
+def test_coalesce_policy_waits_when_merge_is_not_possible():
+    class _NoMerge(_DeltaCoalescer):
+        def merge(self, prev, item):
+            return None
+
+    async def main():
+        buffer = StreamBuffer("s", high_water=1, policy=POLICY_COALESCE, coalescer=_NoMerge())
+        await buffer.put(("a", "1"))
+        second = asyncio.create_task(buffer.put(("a", "2")))
+        await asyncio.sleep(0.01)
+        assert not second.done()
+        await buffer.__anext__()
+        assert await second
+
+    asyncio.run(main())
+
+
+def test_disconnect_policy_drops_slow_consumer_after_grace():
+    async def main():
+        buffer = StreamBuffer("s", high_water=1, policy=POLICY_DISCONNECT, grace_seconds=0.05)
+        await buffer.put(1)
+        assert await buffer.put(2) is False
+        assert buffer.slow_consumer and buffer.dropped
+        # 断开后缓冲区清空，消费者收到 SlowConsumerError，后续写入直接失败
+        with pytest.raises(SlowConsumerError):
+            await buffer.__anext__()
+        assert await buffer.put(3) is False
+
+    asyncio.run(main())
+
+
+def test_abort_wakes_blocked_producer():
+    async def main():
+        buffer = StreamBuffer("s", high_water=1, policy=POLICY_BLOCK)
+        await buffer.put(1)
+        blocked = asyncio.create_task(buffer.put(2))
+        await asyncio.sleep(0.01)
+        buffer.abort()
+        assert await blocked is False
+        assert not buffer.slow_consumer
+
+    asyncio.run(main())
+
+
+def test_put_threadsafe_blocks_thread_when_full():
+    async def main():
+        buffer = StreamBuffer("s", high_water=2, policy=POLICY_BLOCK)
+        results = []
+
+        def producer():
+            for i in range(5):
+                results.append(buffer.put_threadsafe(i))
+            buffer.close_threadsafe()
+
+        thread = threading.Thread(target=producer)
+        thread.start()
+        await asyncio.sleep(0.05)
+        # 线程在高水位处阻塞，缓冲区（含已提交未入队的条目）不超过高水位
+        assert len(results) == 2 and buffer.depth == 2
+        items = []
+        async for item in buffer:
+            items.append(item)
+            await asyncio.sleep(0.005)
+        await asyncio.to_thread(thread.join)
+        assert items == [0, 1, 2, 3, 4]
+        assert results == [True] * 5
+        assert buffer.peak_depth <= 2
+
+    asyncio.run(main())
+
+
+def test_put_threadsafe_returns_false_after_abort():
+    async def main():
+        buffer = StreamBuffer("s", high_water=1, policy=POLICY_BLOCK)
+        assert await asyncio.to_thread(buffer.put_threadsafe, 1)
+        blocked = asyncio.ensure_future(asyncio.to_thread(buffer.put_threadsafe, 2))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        buffer.abort()
+        assert await blocked is False
+        assert await asyncio.to_thread(buffer.put_threadsafe, 3) is False
+
+    asyncio.run(main())
+
+
+def test_backpressure_handler_bounds_emitted_tokens():
+    async def main():
+        buffer = StreamBuffer("s", high_water=3, policy=POLICY_BLOCK)
+        handler = StreamBackpressureHandler(buffer)
+        emitted = []
+
+        async def emitter():
+            for i in range(10):
+                await handler.on_llm_new_token(str(i))
+                emitted.append(i)
+
+        task = asyncio.create_task(emitter())
+        await asyncio.sleep(0.01)
+        # 生产者没有取走时，输出的 token 数不超过高水位
+        assert len(emitted) == 3 and buffer.emitter_waits == 1
+
+        async def graph_items():
+            for i in range(10):
+                yield i
+
+        taken = []
+        async for item in handler.track(graph_items()):
+            await buffer.put(item)
+            taken.append(await buffer.__anext__())
+            await asyncio.sleep(0)
+        await asyncio.wait_for(task, timeout=1)
+        assert emitted == list(range(10)) and taken == list(range(10))
+
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+测试：视频任务登记表按 task_id 区分同一运行的多个视频
+
+运行（在 src 目录下）：python -m pytest utils/serving/test_video_jobs.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加src目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.serving.video_jobs import JOB_STATUS_PENDING, JOB_STATUS_SUCCEEDED, VideoJobRegistry, artifact_url
+
+
+class _FakeVideoClient:
+    def __init__(self, done: asyncio.Event):
+        self.done = done
+
+    async def await_task(self, task_id, max_wait_time=0):
+        await self.done.wait()
+        return f"https://video/{task_id}.mp4", None, ""
+
+
+def test_fan_out_jobs_of_one_run_are_kept_apart():
+    async def main():
+        done = asyncio.Event()
+        registry = VideoJobRegistry(client_factory=lambda: _FakeVideoClient(done), retention_seconds=0)
+        # Top-N 扇出：同一运行的各分支各自提交视频任务
+        for task_id in ("t1", "t2", "t3"):
+            registry.submit("run", task_id)
+        registry.submit("other", "t4")
+
+        assert [job.task_id for job in registry.list("run")] == ["t1", "t2", "t3"]
+        assert registry.get("run", "t2").status == JOB_STATUS_PENDING
+        assert registry.get("other", "t2") is None
+        assert len({artifact_url("run", t) for t in ("t1", "t2", "t3")}) == 3
+
+        done.set()
+        await asyncio.gather(*registry._watchers)
+        assert [job.video_url for job in registry.list("run")] == [f"https://video/t{i}.mp4" for i in (1, 2, 3)]
+        assert registry.stats() == {JOB_STATUS_SUCCEEDED: 4}
+
+        # 保留期过后整个运行的记录一并清理
+        registry._evict_expired()
+        assert registry.list("run") == [] and registry.stats() == {}
+
+    asyncio.run(main())
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from coze_coding_utils.runtime_ctx.context import new_context
+
+from utils.clients import AsyncVideoGenerationClient, get_client_provider, get_http_pool
+
+logger = logging.getLogger(__name__)
+
+# 是否开启视频任务模式：节点只提交任务，由后台轮询跟踪完成情况（默认关闭）
+VIDEO_JOB_MODE = os.getenv("VIDEO_JOB_MODE", "false").lower() == "true"
+# 单个视频任务的最长等待时间（秒）
+VIDEO_JOB_MAX_WAIT_SECONDS = int(os.getenv("VIDEO_JOB_MAX_WAIT_SECONDS", "900"))
+# 任务结束后记录的保留时间（秒）
+VIDEO_JOB_RETENTION_SECONDS = float(os.getenv("VIDEO_JOB_RETENTION_SECONDS", "3600"))
+# 默认的完成回调地址，请求中未指定时使用
+VIDEO_JOB_CALLBACK_URL = os.getenv("VIDEO_JOB_CALLBACK_URL", "")
+# 回调请求超时（秒）
+VIDEO_JOB_CALLBACK_TIMEOUT = float(os.getenv("VIDEO_JOB_CALLBACK_TIMEOUT", "10"))
+
+JOB_STATUS_PENDING = "pending"
+JOB_STATUS_SUCCEEDED = "succeeded"
+JOB_STATUS_FAILED = "failed"
+JOB_STATUS_CANCELLED = "cancelled"
+
+
+def artifact_url(run_id: str, task_id: str) -> str:
+    """单个视频任务的产物查询地址，视频完成前作为短视频的占位 URL"""
+    return f"/artifacts/{run_id}/{task_id}"
+
+
+@dataclass
+class VideoJob:
+    run_id: str
+    task_id: str
+    callback_url: str = ""
+    status: str = JOB_STATUS_PENDING
+    video_url: str = ""
+    last_frame_url: str = ""
+    error: str = ""
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class VideoJobRegistry:
+    """
+    视频生成任务登记表
+
+    video_recreation_node 在任务模式下只提交生成任务并在此登记，
+    每个任务由一个后台协程通过 AsyncVideoGenerationClient.await_task 轮询至结束，
+    结束后更新状态并触发可选的完成回调。
+    任务按 task_id 登记（Top-N 扇出时一次运行会提交多个视频），
+    结果可通过 GET /artifacts/{run_id}（该运行的全部任务）或 GET /artifacts/{run_id}/{task_id} 查询。
+    """
+
+    def __init__(
+        self,
+        client_factory: Optional[Callable[[], AsyncVideoGenerationClient]] = None,
+        max_wait_seconds: int = VIDEO_JOB_MAX_WAIT_SECONDS,
+        retention_seconds: float = VIDEO_JOB_RETENTION_SECONDS,
+    ):
+        self.client_factory = client_factory or (lambda: get_client_provider().video(ctx=new_context(method="video.poll")))
+        self.max_wait_seconds = max_wait_seconds
+        self.retention_seconds = retention_seconds
+        # task_id -> 任务
+        self._jobs: Dict[str, VideoJob] = {}
+        # run_id -> 该运行提交的 task_id（按提交顺序）
+        self._runs: Dict[str, List[str]] = {}
+        # 持有后台协程的引用，避免被垃圾回收
+        self._watchers: Set[asyncio.Task] = set()
+
+    def submit(self, run_id: str, task_id: str, callback_url: str = "") -> VideoJob:
+        """登记已提交的视频任务并启动后台轮询，需在事件循环中调用"""
+        self._evict_expired()
+        job = VideoJob(run_id=run_id, task_id=task_id, callback_url=callback_url or VIDEO_JOB_CALLBACK_URL)
+        self._jobs[task_id] = job
+        task_ids = self._runs.setdefault(run_id, [])
+        if task_id not in task_ids:
+            task_ids.append(task_id)
+        watcher = asyncio.get_running_loop().create_task(self._watch(job))
+        self._watchers.add(watcher)
+        watcher.add_done_callback(self._watchers.discard)
+        logger.info(f"Video job registered: run_id={run_id}, task_id={task_id}")
+        return job
+
+    def get(self, run_id: str, task_id: str) -> Optional[VideoJob]:
+        job = self._jobs.get(task_id)
+        return job if job is not None and job.run_id == run_id else None
+
+    def list(self, run_id: str) -> List[VideoJob]:
+        """该运行的全部视频任务，按提交顺序"""
+        return [self._jobs[task_id] for task_id in self._runs.get(run_id, ()) if task_id in self._jobs]
+
+    async def _watch(self, job: VideoJob) -> None:
+        try:
+            video_url, _, last_frame_url = await self.client_factory().await_task(
+                job.task_id, max_wait_time=self.max_wait_seconds
+            )
+            if video_url is None:
+                job.status = JOB_STATUS_CANCELLED
+            else:
+                job.status = JOB_STATUS_SUCCEEDED
+                job.video_url = video_url
+                job.last_frame_url = last_frame_url
+        except asyncio.CancelledError:
+            job.status = JOB_STATUS_CANCELLED
+            job.finished_at = time.time()
+            raise
+        except Exception as e:
+            logger.error(f"Video job failed: run_id={job.run_id}, task_id={job.task_id}, error={e}")
+            job.status = JOB_STATUS_FAILED
+            job.error = str(e)
+        job.finished_at = time.time()
+        logger.info(f"Video job finished: run_id={job.run_id}, task_id={job.task_id}, status={job.status}")
+
+        if job.callback_url:
+            await self._notify(job)
+
+    async def _notify(self, job: VideoJob) -> None:
+        try:
+            async with get_http_pool().client("callback") as client:
+                resp = await client.post(job.callback_url, json=job.to_dict(), timeout=VIDEO_JOB_CALLBACK_TIMEOUT)
+                resp.raise_for_status()
+        except Exception as e:
+            # 回调失败不影响任务状态，调用方仍可通过 /artifacts 查询
+            logger.warning(f"Video job callback failed: run_id={job.run_id}, url={job.callback_url}, error={e}")
+
+    def _evict_expired(self) -> None:
+        now = time.time()
+        expired = [
+            job for job in self._jobs.values()
+            if job.finished_at is not None and now - job.finished_at > self.retention_seconds
+        ]
+        for job in expired:
+            del self._jobs[job.task_id]
+            task_ids = self._runs.get(job.run_id)
+            if task_ids is not None:
+                task_ids.remove(job.task_id)
+                if not task_ids:
+                    del self._runs[job.run_id]
+
+    def stats(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+
+_video_job_registry: Optional[VideoJobRegistry] = None
+
+
+def get_video_job_registry() -> VideoJobRegistry:
+    global _video_job_registry
+    if _video_job_registry is None:
+        _video_job_registry = VideoJobRegistry()
+    return _video_job_registry